@@ -0,0 +1,63 @@
+"""
+Discrete-event simulation of drone delivery hubs.
+
+Public names are imported lazily on first access, so `import hubsim` is cheap and a command-line run or worker process
+only loads the modules it uses. Optional heavy dependencies are never imported here: pandas is imported by
+OrderLog.to_frame(), pyarrow by Parquet readers, and streamlit/plotly only by the app (streamlit run hubsim/run.py).
+"""
+
+from importlib import import_module
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from hubsim.arrivals import poisson_arrivals, read_arrivals, replay
+    from hubsim.cache import ResultCache
+    from hubsim.checkpoint import Checkpoint, hub_checkpoint, replications_from
+    from hubsim.config import Config, DataMonitor
+    from hubsim.hub import Hub
+    from hubsim.hub_resources import HubEnvironment
+    from hubsim.network import HubNetwork, HubSite, Region, grid_region, run_network
+    from hubsim.queueing import estimate_hub
+    from hubsim.replications import ReplicationSummary, run_replications
+    from hubsim.shared import ResultChannel
+    from hubsim.sweep import sweep
+
+# Public name -> module defining it
+_EXPORTS = {
+    "Config": "config",
+    "DataMonitor": "config",
+    "HubEnvironment": "hub_resources",
+    "Hub": "hub",
+    "HubNetwork": "network",
+    "HubSite": "network",
+    "Region": "network",
+    "grid_region": "network",
+    "run_network": "network",
+    "ReplicationSummary": "replications",
+    "run_replications": "replications",
+    "Checkpoint": "checkpoint",
+    "hub_checkpoint": "checkpoint",
+    "replications_from": "checkpoint",
+    "poisson_arrivals": "arrivals",
+    "read_arrivals": "arrivals",
+    "replay": "arrivals",
+    "ResultCache": "cache",
+    "ResultChannel": "shared",
+    "estimate_hub": "queueing",
+    "sweep": "sweep",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name: str) -> Any:
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f"{__name__}.{module}"), name)
+    globals()[name] = value  # Later lookups skip __getattr__
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
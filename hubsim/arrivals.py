@@ -0,0 +1,252 @@
+"""
+Order arrival sources. An arrival source is any iterable of order creation times in simulation minutes, in increasing
+order, consumed lazily by Hub.create_orders(). Sources are generator pipelines, so a year of historical orders is
+streamed from disk a batch at a time instead of being loaded into memory:
+
+    times = read_arrivals("orders_2022.csv", time_column="created_at", hub="hub-7")
+    Hub(env, arrivals=times)
+
+Synthetic sources cover the Config settings: uniform gaps (ORDER_CREATION_INTERVAL) and Poisson arrivals with
+time-varying rates, e.g. an hour-of-day profile (ORDER_ARRIVAL_RATES).
+"""
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Generator,
+    Iterable,
+    Iterator,
+    Optional,
+    Sequence,
+    Union,
+)
+
+import numpy as np
+
+from hubsim.samplers import DEFAULT_BLOCK_SIZE, BufferedSampler
+from hubsim.streams import RandomStreams
+
+if TYPE_CHECKING:
+    import pyarrow.parquet as pq
+    from simpy import Timeout
+
+    from hubsim.hub import Hub
+    from hubsim.hub_resources import HubEnvironment
+
+PARQUET_BATCH_SIZE = 65536
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def interval_arrivals(gap: BufferedSampler, start: float = 0.0) -> Iterator[float]:
+    """
+    Arrivals separated by sampled gaps
+    Args:
+        gap: Sampler of times between orders in minutes, e.g. env.sampler(ORDERS, config.ORDER_CREATION_INTERVAL)
+        start: Time the first gap is counted from
+
+    Returns: Iterator of arrival times
+    """
+    time = start
+    while True:
+        time += gap()
+        yield time
+
+
+def poisson_arrivals(
+    rates: Union[float, Sequence[float]],
+    streams: RandomStreams,
+    name: str,
+    period: float = 24 * 60,
+    start: float = 0.0,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+) -> Iterator[float]:
+    """
+    Non-homogeneous Poisson arrivals with a piecewise constant rate profile, by thinning: candidates are drawn at the
+    peak rate and each is kept with probability rate(t) / peak rate. Candidates are drawn in NumPy blocks, the rest of
+    a block is discarded if the streams are reseeded.
+    Args:
+        rates: Orders per hour, constant or one rate per equal segment of the period (24 values for an hour-of-day
+            profile)
+        streams: Random streams of the environment, env.rng
+        name: Name of substream, e.g. streams.ORDERS
+        period: Length of the repeating profile in minutes
+        start: Time arrivals start from
+        block_size: Number of candidates drawn at once
+
+    Returns: Iterator of arrival times
+    """
+    profile = np.atleast_1d(np.asarray(rates, dtype=float)) / 60.0  # Orders per minute
+    if (profile < 0).any():
+        raise ValueError("ERROR: Arrival rates cannot be negative")
+    peak = profile.max()
+    if peak <= 0:
+        return
+    segment = period / len(profile)
+
+    time = start
+    while True:
+        epoch, generator = streams.epoch, streams.generator(name)
+        candidates = time + np.cumsum(generator.exponential(1.0 / peak, size=block_size))
+        time = float(candidates[-1])
+        if len(profile) > 1:
+            rate = profile[((candidates % period) // segment).astype(int) % len(profile)]
+            candidates = candidates[generator.random(block_size) * peak < rate]
+        for arrival in candidates.tolist():
+            yield arrival
+            if streams.epoch != epoch:
+                time = arrival  # Reseeded: draw a new block from the last arrival, Poisson arrivals are memoryless
+                break
+
+
+def _to_minutes(value: Any, start: Optional[datetime]) -> tuple[float, Optional[datetime]]:
+    """
+    Convert a raw time value to simulation minutes
+    Args:
+        value: Number (already minutes since start of simulation) or ISO 8601 timestamp (string or datetime)
+        start: Timestamp of simulation time 0, None to use midnight of the first timestamp
+
+    Returns: Minutes since start, and start (set on the first timestamp)
+    """
+    if isinstance(value, str):
+        try:
+            return float(value), start
+        except ValueError:
+            value = datetime.fromisoformat(value)
+    if isinstance(value, datetime):
+        if start is None:
+            start = value.replace(hour=0, minute=0, second=0, microsecond=0)
+        return (value - start).total_seconds() / 60.0, start
+    return float(value), start
+
+
+def _csv_rows(path: Path, columns: Sequence[str]) -> Iterator[tuple[Any, ...]]:
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            yield tuple(row[column] for column in columns)
+
+
+def _parquet_file(path: Path) -> "pq.ParquetFile":
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("ERROR: Reading Parquet order files requires pyarrow (pip install pyarrow)") from e
+    return pq.ParquetFile(path)
+
+
+def _parquet_rows(file: "pq.ParquetFile", columns: Sequence[str], batch_size: int) -> Iterator[tuple[Any, ...]]:
+    for batch in file.iter_batches(batch_size=batch_size, columns=list(columns)):
+        # One batch is materialized at a time, converted to Python objects column by column
+        yield from zip(*(batch.column(column).to_pylist() for column in columns))
+
+
+def _rows(path: Union[str, Path], columns: Sequence[str], batch_size: int) -> Iterator[tuple[Any, ...]]:
+    """
+    Stream selected columns of a CSV or Parquet file as tuples. The header is checked right away, so a missing column
+    raises here rather than when the simulation first asks for an order
+    """
+    path = Path(path)
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        file = _parquet_file(path)
+        header = file.schema_arrow.names
+    else:
+        with open(path, newline="") as f:
+            header = next(csv.reader(f), [])
+    missing = [column for column in columns if column not in header]
+    if missing:
+        raise ValueError(f"ERROR: {path} has no column {', '.join(map(repr, missing))}, found {header}")
+    if path.suffix.lower() in PARQUET_SUFFIXES:
+        return _parquet_rows(file, columns, batch_size)
+    return _csv_rows(path, columns)
+
+
+def read_routed_arrivals(
+    path: Union[str, Path],
+    time_column: str = "created_at",
+    hub_column: str = "hub",
+    start: Optional[datetime] = None,
+    batch_size: int = PARQUET_BATCH_SIZE,
+) -> Iterator[tuple[float, str]]:
+    """
+    Stream order creation times and hub names from a historical order file, for replaying orders across many hubs
+    Args:
+        path: CSV or Parquet file (by suffix), sorted by creation time
+        time_column: Column with creation times, minutes since simulation start or timestamps
+        hub_column: Column with the name of the hub that served the order
+        start: Timestamp of simulation time 0, defaults to midnight of the first order's day
+        batch_size: Rows read at once from Parquet files
+
+    Returns: Iterator of (arrival time, hub name)
+    """
+    return _routed_times(_rows(path, (time_column, hub_column), batch_size), start)
+
+
+def _routed_times(rows: Iterator[tuple[Any, ...]], start: Optional[datetime]) -> Iterator[tuple[float, str]]:
+    for value, hub in rows:
+        time, start = _to_minutes(value, start)
+        yield time, str(hub)
+
+
+def read_arrivals(
+    path: Union[str, Path],
+    time_column: str = "created_at",
+    hub_column: Optional[str] = None,
+    hub: Optional[str] = None,
+    start: Optional[datetime] = None,
+    batch_size: int = PARQUET_BATCH_SIZE,
+) -> Iterator[float]:
+    """
+    Stream order creation times from a historical order file
+    Args:
+        path: CSV or Parquet file (by suffix), sorted by creation time
+        time_column: Column with creation times, minutes since simulation start or timestamps
+        hub_column: Column with hub names, needed to select the orders of one hub
+        hub: Only replay orders of this hub
+        start: Timestamp of simulation time 0, defaults to midnight of the first order's day
+        batch_size: Rows read at once from Parquet files
+
+    Returns: Iterator of arrival times
+    """
+    # Not a generator itself, so bad arguments and missing columns raise on the call instead of the first order
+    if hub is None:
+        return _times(_rows(path, (time_column,), batch_size), start)
+    if hub_column is None:
+        raise ValueError("ERROR: hub_column is required to select orders of a hub")
+    return _hub_times(_rows(path, (time_column, hub_column), batch_size), start, hub)
+
+
+def _times(rows: Iterator[tuple[Any, ...]], start: Optional[datetime]) -> Iterator[float]:
+    for (value,) in rows:
+        time, start = _to_minutes(value, start)
+        yield time
+
+
+def _hub_times(rows: Iterator[tuple[Any, ...]], start: Optional[datetime], hub: str) -> Iterator[float]:
+    for value, name in rows:
+        time, start = _to_minutes(value, start)  # Converted before filtering, so all hubs share time 0
+        if str(name) == hub:
+            yield time
+
+
+def replay(
+    env: "HubEnvironment", hubs: dict[str, "Hub"], arrivals: Iterable[tuple[float, str]]
+) -> Generator["Timeout", Any, Any]:
+    """
+    Process placing routed orders at their hubs, e.g. env.process(replay(env, network.hubs, read_routed_arrivals(...)))
+    One process serves all hubs, so the file is read once. Orders of unknown hubs are skipped.
+    Args:
+        env: Simulation environment
+        hubs: Hubs by name, created with generate_orders=False
+        arrivals: (arrival time, hub name) in increasing time order
+
+    Returns: Generator for order replay process
+    """
+    for time, name in arrivals:
+        hub = hubs.get(name)
+        if hub is None:
+            continue
+        if time > env.now:
+            yield env.timeout(time - env.now)
+        hub.place_order()  # Out of order or past rows are placed immediately
@@ -0,0 +1,244 @@
+"""
+Background simulation with progressive results. A BackgroundRun advances an environment in chunks of simulated time
+on a worker thread and publishes a Snapshot of the monitor after every chunk, so a UI can plot partial results while
+the run goes on and cancel it as soon as its configuration is stale:
+
+    run = start(Config(), until=12 * 60)
+    for snapshot in run.snapshots():  # Blocks until the next chunk, ends with the final snapshot
+        plot(snapshot.monitor)
+    run.cancel()  # Stops the worker at the end of the current chunk
+
+Async code uses the same run through an asyncio bridge: `async for snapshot in run.updates(): ...`.
+
+Snapshots are independent copies (DataMonitor.snapshot()), taken by the worker between chunks, so readers never see
+the monitor being modified. The simulation holds the GIL while it runs, a thread keeps it off the UI's event loop but
+does not run it in parallel with other Python code.
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+
+DEFAULT_CHUNK = 60.0  # Simulated minutes between snapshots
+
+
+@dataclass
+class Snapshot:
+    """State of a run after a chunk of simulated time"""
+
+    time: float
+    until: float
+    monitor: DataMonitor  # Copy of the monitor, the live one for the final snapshot
+    final: bool = False  # Last snapshot of a run that reached its horizon
+
+    @property
+    def progress(self) -> float:
+        return self.time / self.until if self.until > 0 else 1.0
+
+
+class BackgroundRun:
+    """Simulation advanced in chunks on a worker thread, publishing a Snapshot after each chunk"""
+
+    def __init__(
+        self,
+        env: HubEnvironment,
+        until: float,
+        chunk: float = DEFAULT_CHUNK,
+        on_finish: Optional[Callable[[DataMonitor], Any]] = None,
+    ):
+        """
+        Args:
+            env: Environment with its hubs already set up, e.g. HubEnvironment(...) and Hub(env). It must not be used
+                by anything else until the run is done
+            until: Simulation horizon in minutes
+            chunk: Simulated minutes between snapshots
+            on_finish: Called with the monitor on the worker thread once the horizon is reached, not if cancelled
+        """
+        if chunk <= 0:
+            raise ValueError(f"ERROR: Chunk must be positive, got {chunk}")
+        self.env = env
+        self.until = until
+        self.chunk = chunk
+        self.on_finish = on_finish
+
+        self._latest: Optional[Snapshot] = None
+        self._error: Optional[BaseException] = None
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._changed = threading.Condition()
+        self._listeners: list[Callable[[Optional[Snapshot]], Any]] = []
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def finished(cls, monitor: DataMonitor, until: float) -> "BackgroundRun":
+        """Run that is already complete, e.g. for a result found in a cache"""
+        run = cls(HubEnvironment(Config(), monitor), until)
+        run._latest = Snapshot(until, until, monitor, final=True)
+        run._done.set()
+        return run
+
+    def __repr__(self):
+        state = "cancelled" if self.cancelled else "done" if self.done else "running"
+        return f"BackgroundRun({state}, {self.progress:.0%})"
+
+    @property
+    def done(self) -> bool:
+        """Whether the worker has stopped: horizon reached, cancelled or failed"""
+        return self._done.is_set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    @property
+    def progress(self) -> float:
+        return self._latest.progress if self._latest is not None else 0.0
+
+    def start(self) -> "BackgroundRun":
+        """Start the worker thread, returns self"""
+        if self._thread is not None or self.done:
+            raise RuntimeError("ERROR: BackgroundRun already started")
+        self._thread = threading.Thread(target=self._run, name="hubsim-background", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Ask the worker to stop after the current chunk. Snapshots published so far stay available"""
+        self._cancelled.set()
+
+    def _run(self):
+        env, until = self.env, self.until
+        try:
+            while env.now < until and not self.cancelled:
+                env.run(until=min(env.now + self.chunk, until))
+                if env.now >= until:
+                    if self.on_finish is not None:
+                        self.on_finish(env.monitor)
+                    self._publish(Snapshot(env.now, until, env.monitor, final=True))
+                else:
+                    self._publish(Snapshot(env.now, until, env.monitor.snapshot()))
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._done.set()
+            self._publish(None)
+
+    def _publish(self, snapshot: Optional[Snapshot]):
+        """Make snapshot the latest and wake waiting readers. None only signals that the worker stopped"""
+        with self._changed:
+            if snapshot is not None:
+                self._latest = snapshot
+            listeners = list(self._listeners)
+            self._changed.notify_all()
+        for listener in listeners:
+            listener(snapshot)
+
+    def latest(self) -> Optional[Snapshot]:
+        """Most recent snapshot, None before the first chunk finishes"""
+        return self._latest
+
+    def result(self, timeout: Optional[float] = None) -> DataMonitor:
+        """
+        Wait for the run to finish
+        Args:
+            timeout: Seconds to wait, None to wait indefinitely
+
+        Returns: Final monitor
+        """
+        if not self._done.wait(timeout):
+            raise TimeoutError(f"ERROR: Run not finished after {timeout}s")
+        if self._error is not None:
+            raise self._error
+        if self._latest is None or not self._latest.final:
+            raise RuntimeError("ERROR: Run was cancelled before reaching its horizon")
+        return self._latest.monitor
+
+    def snapshots(self, timeout: Optional[float] = None) -> Iterator[Snapshot]:
+        """
+        Iterate over snapshots as they are published, starting with the latest one. Readers slower than the worker
+        skip intermediate snapshots. Ends when the worker stops, raising its error if it failed
+        Args:
+            timeout: Seconds to wait for each snapshot, None to wait indefinitely
+        """
+        seen = None
+        while True:
+            with self._changed:
+                if self._latest is seen and not self.done:
+                    if not self._changed.wait_for(lambda: self._latest is not seen or self.done, timeout):
+                        raise TimeoutError(f"ERROR: No snapshot within {timeout}s")
+                latest, done = self._latest, self.done
+            if latest is not seen and latest is not None:
+                seen = latest
+                yield latest
+            if done and self._latest is seen:
+                break
+        if self._error is not None:
+            raise self._error
+
+    async def updates(self) -> AsyncIterator[Snapshot]:
+        """Asynchronous snapshots(): the worker hands snapshots to the running event loop as they are published"""
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Optional[Snapshot]] = asyncio.Queue()
+
+        def listener(snapshot: Optional[Snapshot]):
+            loop.call_soon_threadsafe(queue.put_nowait, snapshot)
+
+        with self._changed:
+            self._listeners.append(listener)
+            latest, done = self._latest, self.done
+        try:
+            seen = latest
+            if latest is not None:
+                yield latest
+            while not done:
+                snapshot = await queue.get()
+                done = snapshot is None
+                if not done and snapshot is not seen:
+                    seen = snapshot
+                    yield snapshot
+        finally:
+            with self._changed:
+                self._listeners.remove(listener)
+        if self._error is not None:
+            raise self._error
+
+
+def start(
+    config: Config,
+    until: float,
+    seed: Optional[int] = None,
+    chunk: float = DEFAULT_CHUNK,
+    fast_forward: bool = False,
+    on_finish: Optional[Callable[[DataMonitor], Any]] = None,
+) -> BackgroundRun:
+    """
+    Start simulating a single hub in the background
+    Args:
+        config: Hub configuration
+        until: Simulation horizon in minutes
+        seed: Simulation seed, defaults to Config.SEED unless randomized
+        chunk: Simulated minutes between snapshots
+        fast_forward: Run the environment in fast-forward mode, see HubEnvironment
+        on_finish: Called with the monitor once the horizon is reached, see BackgroundRun
+
+    Returns: Started BackgroundRun
+    """
+    env = HubEnvironment(config, DataMonitor(), seed=seed, fast_forward=fast_forward)
+    Hub(env)
+    return BackgroundRun(env, until, chunk, on_finish).start()
+
+
+if __name__ == "__main__":
+    import time
+
+    run = start(Config().replace(ORDER_CREATION_INTERVAL=(1, 3), NUM_DELIVERY_SPECIALISTS=8), until=7 * 24 * 60)
+    began = time.perf_counter()
+    for snapshot in run.snapshots():
+        delivered = snapshot.monitor.orders_delivered
+        print(
+            f"{time.perf_counter() - began:6.3f}s  t={snapshot.time:7.0f}  {snapshot.progress:4.0%}  {delivered} delivered"
+        )
@@ -3,14 +3,20 @@ Contains all classes related to battery resources
 TODO: More
 """
 
-import random
 from collections import deque
 from enum import IntEnum
-from typing import Any, Generator, Optional
+from typing import TYPE_CHECKING, Any, Generator, Optional
 
-from config import Config, DataMonitor
-from hub_resources import HubEnvironment, HubResource, HubStore
-from simpy import Timeout
+import numpy as np
+from numpy.typing import ArrayLike
+from simpy import Event, Timeout
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub_resources import HubEnvironment, HubResource, HubStore
+from hubsim.streams import BATTERY_INIT, CHARGING, DISCHARGING, substream
+
+if TYPE_CHECKING:
+    from hubsim.hub import Hub
 
 
 class BatteryStatus(IntEnum):
@@ -31,15 +37,20 @@ class BatteryStatus(IntEnum):
 
 class Battery(HubResource):
     """
-    Battery modeled as a simpy resource with capacity of 1.
-    TODO Two charged batteries required per mission.
+    Battery modeled as a simpy resource with capacity of 1. Binary battery model, see SocBattery for state of charge
     TODO: self.loggers?
     """
 
-    def __init__(self, env: HubEnvironment, _id: int):
-        super().__init__(env, capacity=1)
+    record_usage = False  # Recorded in aggregate by BatteryStore instead
+
+    def __init__(self, env: HubEnvironment, _id: int, store: Optional["BatteryStore"] = None):
+        super().__init__(env, capacity=1, hub=store.hub if store is not None else None)
         self._id = _id
-        self.charged: bool = bool(random.randint(0, 1))  # Randomly spawn batteries that are charged and discharged
+        self.store = store  # Store indexing this battery by status, notified of every status change
+        self._status: Optional[BatteryStatus] = None
+
+        # Randomly spawn batteries that are charged and discharged
+        self.charged: bool = bool(env.rng[substream(self.site, BATTERY_INIT)].randint(0, 1))
 
         # Set status as in a queue based on whether battery is charged. Assume only queues are
         # populated at the beginning of all simulations
@@ -48,9 +59,23 @@ class Battery(HubResource):
         else:
             self.status = BatteryStatus.CHARGING_QUEUE
 
+        # Duration samplers are shared by all batteries in the environment
+        self.charge_time = env.sampler(substream(self.site, CHARGING), self.config.CHARGE_BATTERIES_INTERVAL)
+        self.discharge_time = env.sampler(substream(self.site, DISCHARGING), self.config.DISCHARGE_BATTERIES_INTERVAL)
+
     def __repr__(self):
         return f"B{self._id}"  # Easier to print(batt) instead of print(batt._id)
 
+    @property
+    def status(self) -> Optional[BatteryStatus]:
+        return self._status
+
+    @status.setter
+    def status(self, status: BatteryStatus):
+        previous, self._status = self._status, status
+        if self.store is not None:
+            self.store._update_index(self, previous, status)
+
     # Battery Processes
     def charge(self) -> Generator[Timeout, Any, Any]:
         """
@@ -65,14 +90,14 @@ class Battery(HubResource):
 
         # Charge for random time in defined interval
         self.status = BatteryStatus.CHARGING_ACTIVE
-        yield self.env.timeout(random.randint(*self.config.CHARGE_BATTERIES_INTERVAL))
+        yield self.env.timeout(self.charge_time())
 
         # Finished charging, not yet moved to deployment queue
         self.charged = True
         self.status = BatteryStatus.CHARGING_INACTIVE
 
         # Queue battery after charging completes
-        yield self.env.process(self._queue())
+        yield from self.env.call(self._queue())
 
     def discharge(self) -> Generator[Timeout, Any, Any]:
         """
@@ -85,13 +110,13 @@ class Battery(HubResource):
 
         # Discharge for random time in defined interval
         self.status = BatteryStatus.DEPLOYED
-        yield self.env.timeout(random.randint(*self.config.DISCHARGE_BATTERIES_INTERVAL))
+        yield self.env.timeout(self.discharge_time())
 
         # Discharging has occurred, battery is no longer charged
         self.charged = False
 
         # Queue battery after discharging completes
-        yield self.env.process(self._queue())
+        yield from self.env.call(self._queue())
 
     def _queue(self) -> Generator[Timeout, Any, Any]:
         """
@@ -109,11 +134,12 @@ class Battery(HubResource):
         # TODO: Should I be introducing Events/Conditions here instead of Timeouts?
         # Should this take time? I dont think within battery,
         # but a person (resource) moving it from one place to another should
-        yield self.env.timeout(0)
+        if not self.env.fast_forward:
+            yield self.env.timeout(0)
 
+        # Store picks up status change and makes battery available to chargers/deployment
         if self.charged is True:
             self.status = BatteryStatus.DEPLOYMENT_QUEUE
-            # TODO: make available in BatteryStore.items  OR OR OR filter for batteries that are in deployment queue when requesting
 
         elif self.charged is False:
             self.status = BatteryStatus.CHARGING_QUEUE
@@ -125,21 +151,26 @@ class BatteryStore(HubStore):
     filtering requests based on battery states
     """
 
-    def __init__(self, env: HubEnvironment):
-        super().__init__(env, capacity=env.config.BATTERY_STORE_CAPACITY)
+    def __init__(self, env: HubEnvironment, hub: Optional["Hub"] = None):
+        config = hub.config if hub is not None else env.config
+        super().__init__(env, capacity=config.BATTERY_STORE_CAPACITY, hub=hub)
+        self.hub = hub
 
-        # Populate store with batteries
-        self.batteries = [Battery(env, i) for i in range(self.config.NUM_BATTERIES)]
+        # Batteries indexed by status, kept up to date by Battery.status so nothing has to scan all batteries
+        self.by_status: dict[BatteryStatus, set[Battery]] = {status: set() for status in BatteryStatus}
 
-        # TODO: deques/queues might be unnecessary
-        self.charge_queue = list(filter(lambda batt: not batt.charged, self.batteries))
-        self.deploy_queue = list(filter(lambda batt: batt.charged, self.batteries))
-        self.charge_process_queue = deque([])
+        # FIFO queues of batteries waiting for a charger and charged batteries available for deployment
+        self.charge_queue: deque[Battery] = deque()
+        self.deploy_queue: deque[Battery] = deque()
+        self._charge_signal: "Event" = self.env.event()  # Triggered when a battery joins an empty charge queue
 
         # List of AVAILABLE items (for requesting), put charged batteries into available queue
         self.items = self.deploy_queue  # Link lists to alias "items" TODO: potential bug with reassignment
 
-        self.chargers = HubResource(self.env, capacity=self.config.NUM_CHARGERS)
+        # Populate store with batteries, each registers itself in the queue matching its initial status
+        self.batteries = [Battery(env, i, self) for i in range(self.config.NUM_BATTERIES)]
+
+        self.chargers = HubResource(self.env, capacity=self.config.NUM_CHARGERS, name="BatteryStore.chargers", hub=hub)
 
         """
         Construct: Let simpy functionality
@@ -154,7 +185,7 @@ class BatteryStore(HubStore):
         # TODO Handle assumption that battery charging is happening "perfectly" (fixed?)
         # AKA all events happen as SOON as they are able (which is not often the case with humans)
 
-        # TODO monitor queue of uncharged batteries and operate accordingly
+        # Hand discharged batteries to chargers as soon as they are queued
         self.env.process(self.run_battery_store())
 
     # https://stackoverflow.com/questions/2024566/how-to-access-outer-class-from-an-inner-class
@@ -162,6 +193,26 @@ class BatteryStore(HubStore):
     #     """Factory method to create chargers and access BatteryStore from Charger class"""
     #     return BatteryCharger(self)
 
+    def _update_index(self, battery: Battery, previous: Optional[BatteryStatus], status: BatteryStatus):
+        """
+        Move battery between status index and queues. Called by Battery on every status change
+        Args:
+            battery: Battery that changed status
+            previous: Status before change, None for new batteries
+            status: New status
+        """
+        if previous is not None:
+            self.by_status[previous].discard(battery)
+        self.by_status[status].add(battery)
+
+        if status == BatteryStatus.CHARGING_QUEUE:
+            self.charge_queue.append(battery)
+            if not self._charge_signal.triggered:
+                self._charge_signal.succeed()
+        elif status == BatteryStatus.DEPLOYMENT_QUEUE:
+            self.deploy_queue.append(battery)
+            self._record()
+
     def _charge_battery(self, battery: Battery) -> Generator[Timeout, Any, Any]:
         """
         Charge battery using resource slot in battery charger
@@ -173,7 +224,7 @@ class BatteryStore(HubStore):
         """
         with battery.request() as req:
             yield req
-            yield self.env.process(battery.charge())
+            yield from self.env.call(battery.charge())
             self.monitor.batteries_charged += 1
 
     def _discharge_battery(self, battery: Battery) -> Generator[Timeout, Any, Any]:
@@ -187,80 +238,379 @@ class BatteryStore(HubStore):
         """
         with battery.request() as req:
             yield req
-            yield self.env.process(battery.discharge())
+            yield from self.env.call(battery.discharge())
             self.monitor.batteries_discharged += 1
 
     def _run_chargers(self, battery: Battery) -> Generator[Timeout, Any, Any]:
         with self.chargers.request() as req:
             yield req
-            yield self.env.process(self._charge_battery(battery))
-            self.charge_queue.remove(battery)
+            yield from self.env.call(self._charge_battery(battery))
 
-    def _run_deployment(self, battery: Battery) -> Generator[Timeout, Any, Any]:
-        yield self.env.process(self._discharge_battery(battery))
-        self.deploy_queue.remove(battery)
+    def _run_deployment(self, battery: Optional[Battery] = None) -> Generator[Timeout, Any, Any]:
+        # Deploy next available battery unless a specific one is requested (testing only)
+        if battery is None:
+            battery = self.deploy_queue.popleft()
+        else:
+            self.deploy_queue.remove(battery)
+        self._record()
+        yield from self.env.call(self._discharge_battery(battery))
+
+    def remove_charged(self) -> Optional[Battery]:
+        """
+        Take the next charged battery out of the store, e.g. for a transfer to another hub
+        Returns: Battery, None if no charged battery is available
+        """
+        if not self.deploy_queue:
+            return None
+        battery = self.deploy_queue.popleft()
+        self.by_status[BatteryStatus.DEPLOYMENT_QUEUE].discard(battery)
+        self.batteries.remove(battery)
+        battery.store = None
+        self._record()
+        return battery
+
+    def add(self, battery: Battery):
+        """
+        Add a battery from elsewhere to the store, indexed by its charge state
+        Args:
+            battery: Battery, usually taken from another store with remove_charged()
+        """
+        battery.store = self
+        self.batteries.append(battery)
+        battery.status = BatteryStatus.DEPLOYMENT_QUEUE if battery.charged else BatteryStatus.CHARGING_QUEUE
 
-    def run_battery_store(self):
-        """TODO: Does this get yielded to by hub or running its own while loop?"""
+    def run_battery_store(self) -> Generator["Event", Any, Any]:
+        """
+        Event-driven charger dispatch: every battery entering the charge queue is handed to a charger process
+        immediately, which waits for a free charger slot. Sleeps until a battery is queued instead of polling.
 
+        Returns: Generator object for battery store process
+        """
         while True:
-            # Spawn battery store checking process
-            rand = random.randint(15, 20)
-            yield self.env.timeout(rand)
-
-            # Collect processes to do simultaneously
-            for battery in self.batteries:
-
-                # Don't queue batteries for any processes if they're already being used (.count attr from simpy)
-                if battery.count > 0:
-                    continue
-
-                # Move batteries to appropriate queue based on their status
-                if (
-                    battery.status == BatteryStatus.DEPLOYMENT_QUEUE
-                    and battery not in self.deploy_queue
-                    and battery.charged is True
-                ):
-                    self.deploy_queue.append(battery)
-                elif (
-                    battery.status == BatteryStatus.CHARGING_QUEUE
-                    and battery not in self.charge_queue
-                    and battery.charged is not True
-                ):
-                    self.charge_queue.append(battery)
-
-                # Append appropriate process based on queue
-                # if battery in self.deploy_queue:
-                # self.charge_process_queue.append(self.env.process((self._run_deployment(battery)))) # Testing only
-
-                if battery in self.charge_queue:
-                    self.charge_process_queue.append(self.env.process((self._run_chargers(battery))))
-
-            # Kick off collected processes
-            yield self.env.all_of(self.charge_process_queue)
+            while self.charge_queue:
+                self.env.process(self._run_chargers(self.charge_queue.popleft()))
 
+            self._charge_signal = self.env.event()
+            yield self._charge_signal
+
+
+def charge_time(soc: ArrayLike, target: float, power: float, config: Config) -> ArrayLike:
+    """
+    Closed-form time to charge batteries along a CC-CV curve. Charging power is capped at `power` until the curve's
+    power demand, which falls linearly from CHARGER_POWER_W at CV_SOC to 0 at full charge, drops below it, so state of
+    charge first rises linearly and then approaches full charge exponentially
+    Args:
+        soc: State of charge at the start, 0 to 1, scalar or array
+        target: State of charge to reach, below 1
+        power: Power available to each charger in W, at most CHARGER_POWER_W
+        config: Battery and charger settings
+
+    Returns: Charging time in minutes, 0 where soc is already at target
+    """
+    energy = 60.0 * config.BATTERY_CAPACITY_WH  # W-minutes per unit of state of charge
+    knee = 1.0 - (1.0 - config.CV_SOC) * power / config.CHARGER_POWER_W  # Curve demand equals power here
+    tau = energy * (1.0 - config.CV_SOC) / config.CHARGER_POWER_W  # Time constant of the exponential phase
+    soc = np.asarray(soc, dtype=float)
+    linear_end = np.maximum(soc, min(knee, target))
+    time = (linear_end - soc) * energy / power + tau * np.log(
+        (1.0 - linear_end) / (1.0 - np.maximum(linear_end, target))
+    )
+    return float(time) if time.ndim == 0 else time
+
+
+def charge_soc(soc: ArrayLike, time: ArrayLike, power: float, config: Config) -> ArrayLike:
+    """
+    Closed-form state of charge after charging along a CC-CV curve for some time, inverse of charge_time()
+    Args:
+        soc: State of charge at the start, 0 to 1, scalar or array
+        time: Charging time in minutes, scalar or array
+        power: Power available to each charger in W, at most CHARGER_POWER_W
+        config: Battery and charger settings
+
+    Returns: State of charge
+    """
+    energy = 60.0 * config.BATTERY_CAPACITY_WH
+    knee = 1.0 - (1.0 - config.CV_SOC) * power / config.CHARGER_POWER_W
+    tau = energy * (1.0 - config.CV_SOC) / config.CHARGER_POWER_W
+    soc, time = np.asarray(soc, dtype=float), np.asarray(time, dtype=float)
+    linear = np.maximum(knee - soc, 0.0) * energy / power  # Time until the knee
+    result = np.where(
+        time <= linear,
+        soc + time * power / energy,
+        1.0 - (1.0 - np.maximum(soc, knee)) * np.exp(-np.maximum(time - linear, 0.0) / tau),
+    )
+    return float(result) if result.ndim == 0 else result
+
+
+class SocBattery:
+    """
+    Battery with a state of charge, used by SocBatteryStore. Plain object instead of a simpy resource, so fleets of
+    thousands of batteries stay cheap. Missions hold batteries through SocBatteryStore.request()
+    """
+
+    __slots__ = ("_id", "soc", "deploy_soc", "store", "_status")
+
+    def __init__(self, _id: int, soc: float, deploy_soc: float, store: Optional["SocBatteryStore"] = None):
+        self._id = _id
+        self.soc = soc
+        self.deploy_soc = deploy_soc
+        self.store = store
+        self._status: Optional[BatteryStatus] = None
+        self.status = BatteryStatus.DEPLOYMENT_QUEUE if self.charged else BatteryStatus.CHARGING_QUEUE
+
+    def __repr__(self):
+        return f"B{self._id}({self.soc:.0%})"
+
+    @property
+    def charged(self) -> bool:
+        return self.soc >= self.deploy_soc
+
+    @property
+    def status(self) -> Optional[BatteryStatus]:
+        return self._status
+
+    @status.setter
+    def status(self, status: BatteryStatus):
+        previous, self._status = self._status, status
+        if self.store is not None:
+            self.store._update_index(self, previous, status)
 
-if __name__ == "__main__":
-    from hub import Hub, HubEnvironment
 
-    random.seed(42)
+class BatteryRequest(Event):
+    """
+    Request for the batteries of one mission, triggered with the list of batteries once enough are charged. Use as a
+    context manager like simpy resource requests, leaving the block before it is granted withdraws the request
+    """
+
+    def __init__(self, store: "SocBatteryStore", count: int):
+        super().__init__(store.env)
+        self.store = store
+        self.count = count
+        store._requests.append(self)
+        store._dispatch()
+
+    def __enter__(self) -> "BatteryRequest":
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self.triggered:
+            self.store._requests.remove(self)
+
+
+class SocBatteryStore(HubStore):
+    """
+    Battery storage for the state of charge model (Config.BATTERY_MODEL = "soc"). Missions take BATTERIES_PER_MISSION
+    charged batteries and return them drained by the energy of the flight. Drained batteries wait for one of the
+    chargers, which charge along a CC-CV curve with the hub's power cap split evenly among active chargers.
+
+    Charging is computed analytically: one scheduler process holds the completion time of every charging battery and
+    sleeps until the earliest one. When a charger starts or finishes, state of charge is brought up to date in closed
+    form and completion times are recomputed for the new power split, so no process polls battery levels.
+    """
+
+    def __init__(self, env: HubEnvironment, hub: Optional["Hub"] = None):
+        config = hub.config if hub is not None else env.config
+        super().__init__(env, capacity=config.BATTERY_STORE_CAPACITY, hub=hub)
+        self.hub = hub
+        if self.config.BATTERIES_PER_MISSION > self.config.NUM_BATTERIES:
+            raise ValueError(
+                f"ERROR: Missions need {self.config.BATTERIES_PER_MISSION} batteries, "
+                f"hub has {self.config.NUM_BATTERIES}"
+            )
+
+        self.by_status: dict[BatteryStatus, set[SocBattery]] = {status: set() for status in BatteryStatus}
+        self.charge_queue: deque[SocBattery] = deque()
+        self.deploy_queue: deque[SocBattery] = deque()
+        self.items = self.deploy_queue
+        self._requests: deque[BatteryRequest] = deque()  # Missions waiting for batteries, served in order
+        self._charge_signal: Event = self.env.event()
+
+        # Charging batteries and their completion times at the current power split. A charging battery's soc is its
+        # state of charge at _since, see soc()
+        self.charging: dict[SocBattery, float] = {}
+        self._since: dict[SocBattery, float] = {}
+        self._done: dict[SocBattery, Event] = {}
+        self.power = self.config.CHARGER_POWER_W
+        self._power_signal: Event = self.env.event()  # Triggered when a battery starts charging
+
+        initial = env.rng.generator(substream(self.site, BATTERY_INIT)).random(self.config.NUM_BATTERIES)
+        self.batteries = [SocBattery(i, soc, self.config.DEPLOY_SOC, self) for i, soc in enumerate(initial.tolist())]
+
+        self.chargers = HubResource(self.env, capacity=self.config.NUM_CHARGERS, name="BatteryStore.chargers", hub=hub)
+        self.env.process(self.run_battery_store())
+        self.env.process(self.run_power_scheduler())
+
+    def _update_index(self, battery: SocBattery, previous: Optional[BatteryStatus], status: BatteryStatus):
+        """Move battery between status index and queues, see BatteryStore._update_index()"""
+        if previous is not None:
+            self.by_status[previous].discard(battery)
+        self.by_status[status].add(battery)
+
+        if status == BatteryStatus.CHARGING_QUEUE:
+            self.charge_queue.append(battery)
+            if not self._charge_signal.triggered:
+                self._charge_signal.succeed()
+        elif status == BatteryStatus.DEPLOYMENT_QUEUE:
+            self.deploy_queue.append(battery)
+            self._dispatch()
+            self._record()
+
+    @property
+    def waiting(self) -> int:
+        """Number of batteries requested by missions waiting for them"""
+        return sum(request.count for request in self._requests)
+
+    def request(self, count: Optional[int] = None) -> BatteryRequest:
+        """
+        Request charged batteries for a mission
+        Args:
+            count: Number of batteries, defaults to BATTERIES_PER_MISSION
+
+        Returns: BatteryRequest, its value is the list of batteries
+        """
+        return BatteryRequest(self, self.config.BATTERIES_PER_MISSION if count is None else count)
+
+    def _dispatch(self):
+        """Grant waiting requests in order while enough charged batteries are available"""
+        while self._requests and len(self.deploy_queue) >= self._requests[0].count:
+            request = self._requests.popleft()
+            batteries = [self.deploy_queue.popleft() for _ in range(request.count)]
+            for battery in batteries:
+                battery.status = BatteryStatus.DEPLOYED
+            request.succeed(batteries)
+        self._record()
+
+    def release(self, batteries: list[SocBattery], flight_time: float):
+        """
+        Return batteries after a mission, drained by the flight's energy
+        Args:
+            batteries: Batteries granted by request()
+            flight_time: Flight duration in minutes
+        """
+        drain = self.config.FLIGHT_POWER_W * flight_time / 60.0 / len(batteries) / self.config.BATTERY_CAPACITY_WH
+        for battery in batteries:
+            battery.soc = max(battery.soc - drain, 0.0)  # Flights are assumed to fit in the batteries' energy
+            self.monitor.batteries_discharged += 1
+            battery.status = BatteryStatus.DEPLOYMENT_QUEUE if battery.charged else BatteryStatus.CHARGING_QUEUE
+
+    def remove_charged(self) -> Optional[SocBattery]:
+        """Take the next charged battery out of the store, see BatteryStore.remove_charged()"""
+        if not self.deploy_queue:
+            return None
+        battery = self.deploy_queue.popleft()
+        self.by_status[BatteryStatus.DEPLOYMENT_QUEUE].discard(battery)
+        self.batteries.remove(battery)
+        battery.store = None
+        self._record()
+        return battery
+
+    def add(self, battery: SocBattery):
+        """Add a battery from elsewhere to the store, see BatteryStore.add()"""
+        battery.store = self
+        self.batteries.append(battery)
+        battery.status = BatteryStatus.DEPLOYMENT_QUEUE if battery.charged else BatteryStatus.CHARGING_QUEUE
+
+    def soc(self, battery: SocBattery) -> float:
+        """Current state of charge of a battery, brought up to date if it is charging"""
+        if battery not in self.charging:
+            return battery.soc
+        return charge_soc(battery.soc, self.env.now - self._since[battery], self.power, self.config)
+
+    def _reschedule(self, added: Optional[SocBattery] = None):
+        """
+        Split power among charging batteries. If the split changes, bring every battery's state of charge up to date
+        and recompute its completion time, otherwise only the added battery needs a completion time
+        Args:
+            added: Battery starting to charge now
+        """
+        now, config = self.env.now, self.config
+        power = config.CHARGER_POWER_W
+        count = len(self.charging) + (added is not None)
+        if config.HUB_POWER_CAP_W is not None and count:
+            power = min(power, config.HUB_POWER_CAP_W / count)
+
+        if power != self.power and self.charging:
+            batteries = list(self.charging)
+            since = np.fromiter((self._since[battery] for battery in batteries), dtype=float, count=len(batteries))
+            soc = np.fromiter((battery.soc for battery in batteries), dtype=float, count=len(batteries))
+            soc = charge_soc(soc, now - since, self.power, config)
+            done_at = now + charge_time(soc, config.DEPLOY_SOC, power, config)
+            for battery, battery_soc, battery_done_at in zip(batteries, soc.tolist(), done_at.tolist()):
+                battery.soc = battery_soc
+                self._since[battery] = now
+                self.charging[battery] = battery_done_at
+        self.power = power
+
+        if added is not None:
+            self._since[added] = now
+            self.charging[added] = now + charge_time(added.soc, config.DEPLOY_SOC, power, config)
+
+    def _start_charging(self, battery: SocBattery) -> Event:
+        """Add battery to the charging set, returns event triggered when it reaches DEPLOY_SOC"""
+        self._done[battery] = done = self.env.event()
+        self._reschedule(added=battery)
+        if not self._power_signal.triggered:
+            self._power_signal.succeed()
+        return done
+
+    def _charge_battery(self, battery: SocBattery) -> Generator[Event, Any, Any]:
+        with self.chargers.request() as req:
+            yield req
+            battery.status = BatteryStatus.CHARGING_ACTIVE
+            yield self._start_charging(battery)
+            self.monitor.batteries_charged += 1
+        battery.status = BatteryStatus.DEPLOYMENT_QUEUE
+
+    def run_battery_store(self) -> Generator[Event, Any, Any]:
+        """Hand every battery entering the charge queue to a charger process, see BatteryStore.run_battery_store()"""
+        while True:
+            while self.charge_queue:
+                self.env.process(self._charge_battery(self.charge_queue.popleft()))
+
+            self._charge_signal = self.env.event()
+            yield self._charge_signal
+
+    def run_power_scheduler(self) -> Generator[Event, Any, Any]:
+        """
+        Complete charging batteries at their closed-form completion times, sleeping until the earliest one or until
+        another battery starts charging and changes the power split
+
+        Returns: Generator object for charging scheduler process
+        """
+        while True:
+            if not self.charging:
+                yield self._power_signal
+            else:
+                delay = max(min(self.charging.values()) - self.env.now, 0.0)
+                yield self.env.any_of([self.env.timeout(delay), self._power_signal])
+            if self._power_signal.triggered:
+                self._power_signal = self.env.event()
+
+            now = self.env.now
+            finished = [battery for battery, done_at in self.charging.items() if done_at <= now + 1e-9]
+            if finished:
+                for battery in finished:
+                    del self.charging[battery], self._since[battery]
+                    battery.soc = self.config.DEPLOY_SOC
+                    self._done.pop(battery).succeed()
+                self._reschedule()
+
+
+if __name__ == "__main__":
+    from hubsim.hub import Hub, HubEnvironment
 
     config = Config()
     monitor = DataMonitor()
 
     hours = 12
-    hubenv = HubEnvironment(config, monitor)
+    hubenv = HubEnvironment(config, monitor, seed=42, profile=True)
     hub = Hub(hubenv)
     until = hours * 60
-    # hub.env.run(until)
 
     try:
-        while hubenv.peek() < until:
-            now = hubenv.now
-            hubenv.step()
-            if hubenv.now != now:
-                pass
+        hubenv.run(until)
     except Exception as e:
         print(f"EXITING SIMULATION | {e}")
     finally:
         print(f"Batteries Charged: {hub.monitor.batteries_charged}")
+        print(hubenv.profiler.summary())
@@ -0,0 +1,320 @@
+"""
+Benchmark suite for simulator throughput and scaling. Measures events/second and wall time per simulated day for
+Hub scenarios of increasing scale, a 50 hub network, BatteryStore in isolation and the replication path. Results
+are written as JSON so runs on different commits can be compared:
+
+    python -m hubsim.benchmark --output before.json
+    python -m hubsim.benchmark --output after.json --compare before.json
+
+Cold import times of the package entry points are checked against IMPORT_BUDGETS on every run, which fails if a
+module is over budget or pulls in an optional heavy dependency (python -m hubsim.benchmark --imports to only check).
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+from hubsim.batteries import BatteryStore
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+from hubsim.network import HubNetwork, grid_region
+from hubsim.replications import run_replications
+
+DAY = 24 * 60
+
+
+@dataclass
+class BenchmarkResult:
+    """Best-of-N measurement of a scenario"""
+
+    name: str
+    wall_time: float
+    events: int
+    sim_time: float
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.wall_time if self.wall_time else 0.0
+
+    @property
+    def wall_time_per_sim_day(self) -> float:
+        return self.wall_time / (self.sim_time / DAY) if self.sim_time else 0.0
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **asdict(self),
+            "events_per_second": self.events_per_second,
+            "wall_time_per_sim_day": self.wall_time_per_sim_day,
+        }
+
+
+def run_counting(env: HubEnvironment, until: float) -> int:
+    """
+    Run environment until a time, counting processed events (same loop as simpy's run())
+    Args:
+        env: Environment to run
+        until: Simulation time to stop at
+
+    Returns: Number of events processed
+    """
+    events = 0
+    step = env.step
+    while env.peek() < until:
+        step()
+        events += 1
+    return events
+
+
+def hub_scenario(
+    until: float, streaming: bool = False, fast_forward: bool = False, **overrides: Any
+) -> Callable[[], tuple[int, float]]:
+    """Scenario running a single Hub with config overrides"""
+
+    def scenario() -> tuple[int, float]:
+        config = Config().replace(**overrides)
+        env = HubEnvironment(config, DataMonitor(streaming=streaming), seed=0, fast_forward=fast_forward)
+        Hub(env)
+        return run_counting(env, until), until
+
+    return scenario
+
+
+def battery_store_scenario(num_batteries: int, num_chargers: int, until: float) -> Callable[[], tuple[int, float]]:
+    """Scenario running BatteryStore alone, with a process deploying one charged battery every minute"""
+
+    def scenario() -> tuple[int, float]:
+        config = Config().replace(
+            NUM_BATTERIES=num_batteries, NUM_CHARGERS=num_chargers, BATTERY_STORE_CAPACITY=num_batteries
+        )
+        env = HubEnvironment(config, DataMonitor(), seed=0)
+        store = BatteryStore(env)
+
+        def deploy():
+            while True:
+                yield env.timeout(1)
+                if store.deploy_queue:
+                    env.process(store._run_deployment())
+
+        env.process(deploy())
+        return run_counting(env, until), until
+
+    return scenario
+
+
+def network_scenario(
+    regions: int, rows: int, cols: int, until: float, fast_forward: bool = False
+) -> Callable[[], tuple[int, float]]:
+    """Scenario running a HubNetwork of grid regions in one environment"""
+
+    def scenario() -> tuple[int, float]:
+        env = HubEnvironment(Config(), DataMonitor(), seed=0, fast_forward=fast_forward)
+        HubNetwork(env, [grid_region(f"region{i}", rows, cols) for i in range(regions)], routing="least_loaded")
+        return run_counting(env, until), until
+
+    return scenario
+
+
+def replications_scenario(replications: int, until: float) -> Callable[[], tuple[int, float]]:
+    """Scenario running replications across the process pool. Events are not counted across processes"""
+
+    def scenario() -> tuple[int, float]:
+        run_replications(Config(), replications=replications, until=until)
+        return 0, replications * until
+
+    return scenario
+
+
+SCENARIOS: dict[str, Callable[[], tuple[int, float]]] = {
+    "hub_baseline": hub_scenario(DAY),
+    "hub_order_rate_x10": hub_scenario(
+        DAY, ORDER_CREATION_INTERVAL=(1, 5), NUM_DELIVERY_SPECIALISTS=20, NUM_PILOTS=10, NUM_DRONES=10
+    ),
+    "hub_batteries_2000": hub_scenario(DAY, NUM_BATTERIES=2000, NUM_CHARGERS=100, BATTERY_STORE_CAPACITY=2000),
+    "hub_soc_batteries_2000": hub_scenario(
+        DAY,
+        BATTERY_MODEL="soc",
+        HUB_POWER_CAP_W=20000.0,
+        NUM_BATTERIES=2000,
+        NUM_CHARGERS=100,
+        BATTERY_STORE_CAPACITY=2000,
+        ORDER_CREATION_INTERVAL=(1, 5),
+        NUM_DELIVERY_SPECIALISTS=20,
+        NUM_PILOTS=10,
+        NUM_DRONES=10,
+    ),
+    "hub_roster_300": hub_scenario(
+        DAY,
+        EMPLOYEE_ROSTER=(
+            {"skills": ["pick_pack"], "count": 100, "shift": [0, 720]},
+            {"skills": ["pick_pack", "rpic", "vo"], "count": 100, "shift": [360, 1080]},
+            {"skills": ["rpic", "vo"], "count": 100, "shift": [720, 1440]},
+        ),
+        FLIGHT_ROLES=("rpic", "vo"),
+        ORDER_CREATION_INTERVAL=(0.5, 1.5),
+        NUM_DRONES=60,
+        NUM_BATTERIES=120,
+        NUM_CHARGERS=60,
+    ),
+    "hub_30_days_streaming": hub_scenario(30 * DAY, streaming=True, NUM_DELIVERY_SPECIALISTS=3),
+    "hub_30_days_fast_forward": hub_scenario(30 * DAY, streaming=True, fast_forward=True, NUM_DELIVERY_SPECIALISTS=3),
+    "battery_store_1000": battery_store_scenario(1000, 50, 7 * DAY),
+    "network_50_hubs_week": network_scenario(2, 5, 5, 7 * DAY),
+    "network_50_hubs_week_fast_forward": network_scenario(2, 5, 5, 7 * DAY, fast_forward=True),
+    "replications_16": replications_scenario(16, DAY),
+}
+
+
+# Cold import budgets in seconds, in a fresh interpreter. simpy (through pkg_resources) and numpy take most of it
+IMPORT_BUDGETS = {"hubsim": 0.05, "hubsim.cli": 0.1, "hubsim.replications": 0.5}
+HEAVY_MODULES = ("lea", "pandas", "plotly", "streamlit", "pyarrow")  # Must not be imported by any IMPORT_BUDGETS module
+
+
+def import_time(module: str, repeat: int = 3) -> tuple[float, list[str]]:
+    """
+    Time a cold import in fresh interpreters
+    Args:
+        module: Module to import, e.g. "hubsim.replications"
+        repeat: Number of interpreters, fastest is kept
+
+    Returns: Import time in seconds, and HEAVY_MODULES that were imported along with the module
+    """
+    code = (
+        f"import sys, time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start); "
+        f"print(*[name for name in {HEAVY_MODULES!r} if name in sys.modules])"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [root, os.environ.get("PYTHONPATH")]))}
+    best, heavy = float("inf"), []
+    for _ in range(repeat):
+        lines = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env
+        ).stdout.splitlines()
+        best, heavy = min(best, float(lines[0])), lines[1].split() if len(lines) > 1 else []
+    return best, heavy
+
+
+def check_imports(repeat: int = 3) -> tuple[dict[str, float], list[str]]:
+    """
+    Check cold import times against IMPORT_BUDGETS
+    Args:
+        repeat: Interpreters per module, fastest is kept
+
+    Returns: Import time by module, and a message for every module over budget or importing a heavy dependency
+    """
+    times, failures = {}, []
+    for module, budget in IMPORT_BUDGETS.items():
+        times[module], heavy = import_time(module, repeat)
+        flag = ""
+        if times[module] > budget:
+            flag = "  OVER BUDGET"
+            failures.append(f"{module} imports in {times[module]:.3f}s, budget {budget:.3f}s")
+        if heavy:
+            flag += f"  IMPORTS {', '.join(heavy)}"
+            failures.append(f"{module} imports {', '.join(heavy)}")
+        print(f"import {module:<27} {times[module]:8.3f}s  (budget {budget:.3f}s){flag}")
+    return times, failures
+
+
+def run_benchmark(name: str, repeat: int = 3) -> BenchmarkResult:
+    """
+    Run a scenario several times and keep the fastest run, which is least affected by noise
+    Args:
+        name: Scenario name in SCENARIOS
+        repeat: Number of runs
+
+    Returns: BenchmarkResult of the fastest run
+    """
+    best: Optional[BenchmarkResult] = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events, sim_time = SCENARIOS[name]()
+        wall_time = time.perf_counter() - start
+        if best is None or wall_time < best.wall_time:
+            best = BenchmarkResult(name, wall_time, events, sim_time)
+    return best
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any], threshold: float) -> list[str]:
+    """
+    Print wall time change of each scenario relative to a baseline run
+    Args:
+        results: Current results (JSON structure)
+        baseline: Baseline results (JSON structure)
+        threshold: Relative slowdown reported as a regression, e.g. 0.1 for 10%
+
+    Returns: Names of regressed scenarios
+    """
+    regressions = []
+    print(f"\nComparison against {baseline.get('commit')}:")
+    for name, current in results["scenarios"].items():
+        previous = baseline["scenarios"].get(name)
+        if previous is None:
+            continue
+        change = current["wall_time"] / previous["wall_time"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"  {name:<34} {previous['wall_time']:8.3f}s -> {current['wall_time']:8.3f}s ({change:+.1%}){flag}")
+    return regressions
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Scenario(s) to run")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, fastest is kept")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown counted as regression")
+    parser.add_argument("--imports", action="store_true", help="Only check import times against IMPORT_BUDGETS")
+    args = parser.parse_args(argv)
+
+    results: dict[str, Any] = {
+        "commit": _commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "scenarios": {},
+    }
+    results["imports"], failures = check_imports(args.repeat)
+    for failure in failures:
+        print(f"ERROR: {failure}", file=sys.stderr)
+    if args.imports:
+        return 1 if failures else 0
+
+    for name in args.scenario or SCENARIOS:
+        result = run_benchmark(name, args.repeat)
+        results["scenarios"][name] = result.to_dict()
+        print(
+            f"{name:<34} {result.wall_time:8.3f}s  {result.events_per_second:12,.0f} events/s"
+            f"  {result.wall_time_per_sim_day:8.3f}s/sim-day"
+        )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        return 1 if regressions or failures else 0
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+"""
+Cache of simulation results keyed by a canonical hash of the configuration, seed and horizon. Results live in an
+in-memory LRU tier backed by an on-disk tier of .npz files with size-based eviction, so revisiting a configuration
+(e.g. moving a slider back in the app) does not rerun the simulation.
+"""
+
+import dataclasses
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from pathlib import Path
+from types import BuiltinFunctionType, FunctionType, MethodType
+from typing import Any, Optional, Union
+
+import numpy as np
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+
+CACHE_VERSION = 4  # Bump when simulation logic changes so stale results are not reused
+DEFAULT_CACHE_DIR = Path(os.environ.get("HUBSIM_CACHE_DIR", Path.home() / ".cache" / "hubsim"))
+
+
+def _canonical(value: Any) -> Any:
+    """Convert config value to a JSON-serializable form that is stable across runs and interpreters"""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, (tuple, list)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _canonical(v) for k, v in sorted(value.items(), key=lambda item: str(item[0]))}
+    if isinstance(value, (np.ndarray, np.generic)):
+        return _canonical(value.tolist())
+    if dataclasses.is_dataclass(value):
+        return {type(value).__name__: _canonical(dataclasses.asdict(value))}
+    if hasattr(value, "support") and hasattr(value, "ps"):  # lea PMF
+        return {"pmf": _canonical(dict(zip(value.support, value.ps)))}
+    # Other objects, e.g. custom samplers.Distribution classes, by their fields. repr() would embed object addresses
+    slots = [name for cls in type(value).__mro__ for name in getattr(cls, "__slots__", ()) if not name.startswith("__")]
+    if not isinstance(value, (type, FunctionType, BuiltinFunctionType, MethodType)) and (
+        hasattr(value, "__dict__") or slots
+    ):
+        state = dict(getattr(value, "__dict__", {}))
+        state.update({name: getattr(value, name) for name in slots if hasattr(value, name)})
+        return {type(value).__qualname__: _canonical(state)}
+    raise TypeError(f"ERROR: Cannot hash config value {value!r} of type {type(value).__name__}")
+
+
+def config_hash(config: Config, seed: Optional[int] = None, until: Optional[float] = None, **extra: Any) -> str:
+    """
+    Canonical hash of every Config setting plus seed and horizon
+    Args:
+        config: Hub configuration
+        seed: Simulation seed
+        until: Simulation horizon in minutes
+        **extra: Any other inputs that affect results
+
+    Returns: Hex digest identifying the simulation inputs
+    """
+    key = {"version": CACHE_VERSION, "config": _canonical(config.to_dict()), "seed": seed, "until": until}
+    key.update({name: _canonical(value) for name, value in extra.items()})
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+class ResultCache:
+    """Two-tier (memory LRU + disk) cache of DataMonitor results. Returned monitors are shared, treat as read-only"""
+
+    def __init__(
+        self,
+        directory: Optional[Union[str, Path]] = DEFAULT_CACHE_DIR,
+        memory_items: int = 32,
+        max_disk_bytes: int = 512 * 2**20,
+    ):
+        """
+        Args:
+            directory: Directory for the disk tier, None for memory only
+            memory_items: Number of results kept in memory
+            max_disk_bytes: Disk tier size limit, least recently used files are evicted beyond it
+        """
+        self.directory = Path(directory) if directory is not None else None
+        self.memory_items = memory_items
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: OrderedDict[str, DataMonitor] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._memory or (self._path(key) is not None and self._path(key).exists())
+
+    def _path(self, key: str) -> Optional[Path]:
+        return self.directory / f"{key}.npz" if self.directory is not None else None
+
+    def get(self, key: str) -> Optional[DataMonitor]:
+        """Look up result in memory, then on disk (promoting it to memory). None if not cached"""
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return self._memory[key]
+
+        path = self._path(key)
+        if path is not None and path.exists():
+            with np.load(path) as arrays:
+                monitor = DataMonitor.from_arrays(dict(arrays))
+            os.utime(path)  # Track recency for disk eviction
+            self._remember(key, monitor)
+            self.hits += 1
+            return monitor
+
+        self.misses += 1
+        return None
+
+    def put(self, key: str, monitor: DataMonitor):
+        """Store result in both tiers"""
+        self._remember(key, monitor)
+
+        path = self._path(key)
+        if path is not None:
+            # Write to temporary file first so concurrent readers never see partial files
+            tmp = path.with_suffix(".tmp")
+            with open(tmp, "wb") as f:
+                np.savez(f, **monitor.to_arrays())
+            os.replace(tmp, path)
+            self._evict_disk()
+
+    def _remember(self, key: str, monitor: DataMonitor):
+        self._memory[key] = monitor
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        files = [(f.stat(), f) for f in self.directory.glob("*.npz")]
+        total = sum(stat.st_size for stat, _ in files)
+        for stat, f in sorted(files, key=lambda item: item[0].st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            f.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self):
+        self._memory.clear()
+        if self.directory is not None:
+            for f in self.directory.glob("*.npz"):
+                f.unlink(missing_ok=True)
+
+    def run(self, config: Config, until: float, seed: Optional[int] = None) -> DataMonitor:
+        """
+        Get simulation result from cache, or simulate a Hub and cache the result
+        Args:
+            config: Hub configuration
+            until: Simulation horizon in minutes
+            seed: Simulation seed. If None, Config.SEED is used unless randomized, in which case the run is not cached
+
+        Returns: DataMonitor of the simulation
+        """
+        if seed is None and config.RANDOM is False:
+            seed = config.SEED
+        key = config_hash(config, seed, until) if seed is not None else None
+
+        monitor = self.get(key) if key is not None else None
+        if monitor is None:
+            env = HubEnvironment(config, DataMonitor(), seed=seed)
+            Hub(env)
+            env.run(until=until)
+            monitor = env.monitor
+            if key is not None:
+                self.put(key, monitor)
+        return monitor
@@ -0,0 +1,292 @@
+"""
+Checkpoints of running simulations. A Checkpoint simulates a warm-up period once and then runs any number of
+replications or what-if branches from the warmed-up state, so a sweep pays for the warm-up only once.
+
+simpy processes are Python generators, which cannot be pickled or copied, so the state cannot be written to disk and
+read back. Instead each branch runs in a child process forked from the checkpoint (POSIX only), which starts with an
+exact copy-on-write copy of everything: clock, pending events, resource queues, battery statuses, in-flight orders and
+random number generators. Branches are independent because each reseeds all random substreams. Where fork is not
+available the warm-up is simulated again for every branch, which gives the same results without the savings.
+
+Snapshot is a plain-data export of the same state for inspection, e.g. checking that a warm-up reached steady state.
+"""
+
+import multiprocessing
+import os
+from dataclasses import dataclass, field
+from multiprocessing.connection import wait
+from typing import Any, Callable, Optional, Sequence, TypeVar, Union
+
+import numpy as np
+
+from hubsim.config import (
+    ORDER_TIME_FIELDS,
+    STREAMING_STAGES,
+    Config,
+    DataMonitor,
+    OrderLog,
+    OrderStatus,
+)
+from hubsim.hub import Hub
+from hubsim.hub_resources import HubEnvironment, HubResource
+from hubsim.profiling import event_label
+from hubsim.replications import (
+    DEFAULT_QUANTILES,
+    ReplicationResult,
+    ReplicationSummary,
+    replication_result,
+    summarize,
+)
+from hubsim.streaming import StageStatistics
+
+R = TypeVar("R")
+Branch = Callable[[HubEnvironment, Any], R]  # Runs a branch given the environment and model, returns its result
+CAN_FORK = hasattr(os, "fork") and "fork" in multiprocessing.get_all_start_methods()
+
+
+@dataclass
+class ResourceState:
+    """Units of a resource at snapshot time"""
+
+    capacity: int
+    busy: int
+    queued: int
+
+
+@dataclass
+class Snapshot:
+    """Plain-data copy of simulation state, see Checkpoint.snapshot()"""
+
+    time: float
+    seed: int
+    pending_events: list[tuple[float, str, str]]  # (time, process, event type) in processing order
+    resources: dict[str, ResourceState]  # By "<hub>/<resource>"
+    battery_status: dict[str, np.ndarray]  # BatteryStatus code per battery, by hub
+    battery_charged: dict[str, np.ndarray]
+    orders: dict[str, dict[str, np.ndarray]]  # Columns of orders not yet delivered, by hub
+    rng: dict[str, object] = field(default_factory=dict)  # Substream states by name
+
+    @property
+    def orders_in_system(self) -> int:
+        return sum(len(columns["id"]) for columns in self.orders.values())
+
+
+def _hubs(model: Any) -> dict[str, Hub]:
+    """Hubs of a model, a Hub or anything with a hubs dictionary (e.g. network.HubNetwork)"""
+    if isinstance(model, Hub):
+        return {model.name or "hub": model}
+    return dict(getattr(model, "hubs", {}))
+
+
+def _in_flight(orders: OrderLog) -> dict[str, np.ndarray]:
+    status = orders.column("status")
+    ids = np.flatnonzero((status != OrderStatus.COMPLETED) & (status != OrderLog._RELEASED))
+    columns = {"id": ids, "status": status[ids].copy()}
+    columns.update({name: orders.column(name)[ids].copy() for name in ORDER_TIME_FIELDS})
+    return columns
+
+
+class Checkpoint:
+    """Warmed-up simulation that replications and what-if branches are forked from"""
+
+    def __init__(self, build: Callable[[int], tuple[HubEnvironment, Any]], warmup: float, seed: int = 0):
+        """
+        Args:
+            build: Creates the environment and model (e.g. a Hub) for a seed. Must be deterministic, it is called again
+                for every branch where fork is not available
+            warmup: Simulation time to run before branching, in minutes
+            seed: Seed of the warm-up
+        """
+        self.build = build
+        self.warmup = warmup
+        self.seed = seed
+        self.env, self.model = self._warm_up()
+
+    def _warm_up(self) -> tuple[HubEnvironment, Any]:
+        env, model = self.build(self.seed)
+        env.run(until=self.warmup)
+        return env, model
+
+    def snapshot(self) -> Snapshot:
+        """Export clock, pending events, resources, batteries, in-flight orders and random state"""
+        env = self.env
+        snapshot = Snapshot(
+            time=env.now,
+            seed=env.rng.seed,
+            pending_events=[(time, *event_label(event)) for time, _, _, event in sorted(env._queue)],
+            resources={},
+            battery_status={},
+            battery_charged={},
+            orders={},
+            rng=env.rng.state(),
+        )
+        for name, hub in _hubs(self.model).items():
+            resources = [r for r in vars(hub).values() if isinstance(r, HubResource)] + [hub.battery_store.chargers]
+            for resource in resources:
+                snapshot.resources[f"{name}/{resource.name}"] = ResourceState(
+                    resource.capacity, resource.count, len(resource.queue)
+                )
+            if hub.employees is not None:
+                employees = hub.employees
+                snapshot.resources[f"{name}/{employees.name}"] = ResourceState(
+                    employees.on_shift, employees.busy, employees._waiting_count
+                )
+            batteries = hub.battery_store.batteries
+            snapshot.battery_status[name] = np.array([b.status for b in batteries], dtype=np.int8)
+            snapshot.battery_charged[name] = np.array([b.charged for b in batteries], dtype=bool)
+            snapshot.orders[name] = _in_flight(hub.monitor.orders)
+        return snapshot
+
+    def advance(self, until: float):
+        """Move the checkpoint itself forward, e.g. to extend the warm-up or resume a paused run"""
+        self.env.run(until=until)
+        self.warmup = until
+
+    def _run(self, fn: Branch, seed: Optional[int], env: HubEnvironment, model: Any) -> Any:
+        if seed is not None:
+            env.reseed(seed)
+        return fn(env, model)
+
+    def _run_fresh(self, fn: Branch, seed: Optional[int]) -> Any:
+        """Branch without fork: simulate the warm-up again"""
+        return self._run(fn, seed, *self._warm_up())
+
+    def _child(self, connection: Any, fn: Branch, seed: Optional[int]):
+        """Entry point of forked branch processes, sends (ok, result or error message) back to the parent"""
+        try:
+            connection.send((True, self._run(fn, seed, self.env, self.model)))
+        except BaseException as e:  # Report any failure instead of dying silently
+            connection.send((False, f"{type(e).__name__}: {e}"))
+        finally:
+            connection.close()
+
+    def branch(self, fn: Branch, seed: Optional[int] = None) -> Any:
+        """
+        Run one branch from the checkpoint, leaving the checkpoint itself untouched
+        Args:
+            fn: Called with the environment and model after reseeding, runs the branch and returns its result, which
+                must be picklable
+            seed: Reseed all random substreams first, None continues the warm-up's streams
+
+        Returns: Return value of fn
+        """
+        return self.branches(fn, [seed], max_workers=1)[0]
+
+    def branches(
+        self,
+        fn: Union[Branch, Sequence[Branch]],
+        seeds: Sequence[Optional[int]],
+        max_workers: Optional[int] = None,
+    ) -> list[Any]:
+        """
+        Run branches from the checkpoint in parallel forked processes
+        Args:
+            fn: Branch function, or one per seed for what-if branches (e.g. each resizing a resource first)
+            seeds: Seed of each branch
+            max_workers: Branches running at once, defaults to the number of CPUs
+
+        Returns: Return value of each branch, in order of seeds
+        """
+        fns = list(fn) if isinstance(fn, Sequence) else [fn] * len(seeds)
+        if len(fns) != len(seeds):
+            raise ValueError(f"ERROR: Got {len(fns)} branch functions for {len(seeds)} seeds")
+        if not CAN_FORK:
+            return [self._run_fresh(f, seed) for f, seed in zip(fns, seeds)]
+
+        context = multiprocessing.get_context("fork")
+        max_workers = max_workers or os.cpu_count() or 1
+        pending = list(enumerate(zip(fns, seeds)))[::-1]
+        running: dict[Any, tuple[int, Any]] = {}
+        results: list[Any] = [None] * len(seeds)
+        try:
+            while pending or running:
+                while pending and len(running) < max_workers:
+                    i, (f, seed) = pending.pop()
+                    receiver, sender = context.Pipe(duplex=False)
+                    process = context.Process(target=self._child, args=(sender, f, seed), daemon=True)
+                    process.start()
+                    sender.close()
+                    running[receiver] = (i, process)
+
+                for receiver in wait(list(running)):
+                    i, process = running.pop(receiver)
+                    try:
+                        ok, value = receiver.recv()
+                    except EOFError:
+                        ok, value = False, f"process exited with code {process.exitcode}"
+                    receiver.close()
+                    process.join()
+                    if not ok:
+                        raise RuntimeError(f"ERROR: Branch {i} (seed {seeds[i]}) failed: {value}")
+                    results[i] = value
+        finally:
+            for _, process in running.values():
+                process.terminate()
+        return results
+
+
+def hub_checkpoint(config: Config, warmup: float, seed: int = 0, streaming: bool = False) -> Checkpoint:
+    """
+    Checkpoint of a single Hub after warm-up
+    Args:
+        config: Hub configuration
+        warmup: Warm-up period in minutes
+        seed: Seed of the warm-up
+        streaming: Use a streaming DataMonitor
+
+    Returns: Checkpoint, its model is the Hub
+    """
+
+    def build(build_seed: int) -> tuple[HubEnvironment, Hub]:
+        env = HubEnvironment(config, DataMonitor(streaming=streaming), seed=build_seed)
+        return env, Hub(env)
+
+    return Checkpoint(build, warmup, seed)
+
+
+def _replication(until: float, quantiles: Sequence[float]) -> Branch:
+    def run(env: HubEnvironment, hub: Hub) -> ReplicationResult:
+        monitor, warmup = hub.monitor, env.now
+        baseline = (monitor.orders_created, monitor.orders_delivered)
+        if monitor.streaming:
+            monitor.stages = {stage: StageStatistics(quantiles) for stage in STREAMING_STAGES}
+        env.run(until=until)
+        return replication_result(monitor, env.rng.seed, until, quantiles, warmup, baseline)
+
+    return run
+
+
+def replications_from(
+    checkpoint: Checkpoint,
+    replications: int,
+    until: float,
+    seed: Optional[int] = None,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    max_workers: Optional[int] = None,
+    confidence: float = 0.95,
+) -> ReplicationSummary:
+    """
+    Replications of a Hub checkpoint sharing its warm-up. Statistics only cover orders after the warm-up
+    Args:
+        checkpoint: Checkpoint whose model is a Hub, e.g. from hub_checkpoint()
+        replications: Number of replications
+        until: Simulation horizon in minutes, including warm-up
+        seed: Base seed, replication i uses seed + i. Defaults to the seed after the warm-up's
+        quantiles: Wait time quantiles to report
+        max_workers: Replications running at once, defaults to the number of CPUs
+        confidence: Confidence level of reported intervals
+
+    Returns: ReplicationSummary ordered by seed
+    """
+    if until <= checkpoint.warmup:
+        raise ValueError(f"ERROR: Horizon {until} must be after the end of warm-up {checkpoint.warmup}")
+    seed = checkpoint.seed + 1 if seed is None else seed
+    seeds = [seed + i for i in range(replications)]
+    return summarize(checkpoint.branches(_replication(until, quantiles), seeds, max_workers), confidence)
+
+
+if __name__ == "__main__":
+    warm = hub_checkpoint(Config().replace(NUM_DELIVERY_SPECIALISTS=3), warmup=24 * 60)
+    print(f"After warm-up: {warm.snapshot().orders_in_system} orders in system")
+    summary = replications_from(warm, replications=8, until=7 * 24 * 60)
+    print(f"Wait time (min): {summary.wait_time}")
@@ -0,0 +1,179 @@
+"""
+Headless command-line runner for batch jobs and containers. Reads a TOML/YAML config file, runs replications and
+writes results to JSON, CSV or NPZ:
+
+    python -m hubsim.cli hub.toml --until 720 --replications 20 --seed 0 --output results.json
+    python -m hubsim.cli --set NUM_PILOTS=3 --set PICK_PACK_INTERVAL=[5,15] --output results.csv
+
+Config files hold Config settings (case-insensitive) and an optional run table with defaults for the command-line
+options (seed, until, replications, workers, streaming, fast_forward). Only the standard library is imported at
+startup; the simulation modules are imported when a run starts, and streamlit, plotly and pandas are never imported.
+"""
+
+import argparse
+import csv
+import json
+import sys
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from hubsim.config import Config
+    from hubsim.replications import ReplicationSummary
+
+FORMATS = ("json", "csv", "npz")
+
+
+def parse_value(text: str) -> Any:
+    """Parse a --set value as JSON (numbers, lists, booleans, null), falling back to a plain string"""
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError:
+        return text
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("config", nargs="?", help="TOML or YAML config file, defaults to Config() settings")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Override a setting")
+    parser.add_argument("--seed", type=int, help="Base seed, replication i uses seed + i (default: Config.SEED)")
+    parser.add_argument("--until", type=float, help="Horizon in minutes (default: Config.OPERATING_HOURS_DURATION)")
+    parser.add_argument("--replications", type=int, help="Number of replications (default: 1)")
+    parser.add_argument("--workers", type=int, help="Worker processes, 1 runs in-process (default: CPUs)")
+    parser.add_argument("--streaming", action="store_true", default=None, help="Bounded-memory monitors")
+    parser.add_argument("--fast-forward", action="store_true", default=None, help="Skip zero-delay events")
+    parser.add_argument("--output", help="Results file, format from suffix unless --format is given")
+    parser.add_argument("--format", choices=FORMATS, help="Results format")
+    parser.add_argument("--quiet", action="store_true", help="Do not print a summary")
+    return parser
+
+
+def load(args: argparse.Namespace) -> tuple["Config", dict[str, Any]]:
+    """
+    Build configuration and run options from the config file, overrides and command-line options
+    Returns: Config and run options (seed, until, replications, workers, streaming, fast_forward)
+    """
+    from hubsim.config import Config, read_settings
+
+    settings = read_settings(args.config) if args.config else {}
+    run = {name.lower(): value for name, value in settings.pop("run", {}).items()}
+    for assignment in args.set:
+        name, separator, value = assignment.partition("=")
+        if not separator:
+            raise ValueError(f"ERROR: Expected NAME=VALUE, got {assignment!r}")
+        settings[name.strip()] = parse_value(value)
+    config = Config.from_mapping(settings)
+
+    for name in ("seed", "until", "replications", "workers", "streaming", "fast_forward"):
+        value = getattr(args, name)
+        if value is not None:
+            run[name] = value
+    if run.get("seed") is None and not config.RANDOM:
+        run["seed"] = config.SEED
+    elif run.get("seed") is None:
+        import random
+
+        run["seed"] = random.SystemRandom().randrange(2**31)  # Reported in the results so the run can be repeated
+    run.setdefault("until", config.OPERATING_HOURS_DURATION)
+    run.setdefault("replications", 1)
+    run.setdefault("workers", None)
+    run.setdefault("streaming", False)
+    run.setdefault("fast_forward", False)
+    return config, run
+
+
+def _rows(summary: "ReplicationSummary") -> list[dict[str, Any]]:
+    rows = []
+    for result in summary.results:
+        row = {
+            "seed": result.seed,
+            "until": result.until,
+            "orders_created": result.orders_created,
+            "orders_delivered": result.orders_delivered,
+            "mean_wait": result.mean_wait,
+            "throughput": result.throughput,
+        }
+        row.update({f"p{q * 100:g}": value for q, value in result.wait_quantiles.items()})
+        rows.append(row)
+    return rows
+
+
+def write_results(path: Path, fmt: str, config: "Config", run: dict[str, Any], summary: "ReplicationSummary"):
+    """
+    Write replication results
+    Args:
+        path: Output file
+        fmt: One of FORMATS. json holds config, run options, summary and per-replication rows, csv and npz hold
+            per-replication rows only
+        config: Configuration that was run
+        run: Run options
+        summary: Results
+    """
+    rows = _rows(summary)
+    if fmt == "json":
+        from dataclasses import asdict
+
+        from hubsim.cache import _canonical, config_hash
+
+        document = {
+            "config_hash": config_hash(config, run["seed"], run["until"], replications=run["replications"]),
+            "config": _canonical(config.to_dict()),
+            "run": run,
+            "summary": {"wait_time": asdict(summary.wait_time), "throughput": asdict(summary.throughput)},
+            "results": rows,
+        }
+        with open(path, "w") as f:
+            json.dump(document, f, indent=2)
+    elif fmt == "csv":
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]) if rows else [])
+            writer.writeheader()
+            writer.writerows(rows)
+    elif fmt == "npz":
+        import numpy as np
+
+        np.savez_compressed(
+            path, **{name: np.array([row.get(name) for row in rows]) for name in (rows[0] if rows else {})}
+        )
+    else:
+        raise ValueError(f"ERROR: Unknown format {fmt!r}, expected one of {FORMATS}")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    path = Path(args.output) if args.output else None
+    fmt = args.format or (path.suffix.lstrip(".").lower() if path else None)
+    if path is not None and fmt not in FORMATS:
+        print(f"ERROR: Cannot infer format from {path.name!r}, use --format", file=sys.stderr)
+        return 2
+    try:
+        config, run = load(args)
+    except (ValueError, AttributeError, ImportError, OSError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    from hubsim.replications import run_replications
+
+    summary = run_replications(
+        config,
+        replications=run["replications"],
+        until=run["until"],
+        seed=run["seed"],
+        max_workers=run["workers"],
+        streaming=run["streaming"],
+        fast_forward=run["fast_forward"],
+    )
+
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_results(path, fmt, config, run, summary)
+
+    if not args.quiet:
+        print(f"Replications: {run['replications']} (seed {run['seed']}, {run['until']:g} min)")
+        print(f"Wait time (min): {summary.wait_time}")
+        print(f"Throughput (orders/hr): {summary.throughput}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,11 +6,19 @@ a more appropriate configuration file format in the future (e.g., TOML, YAML, et
 TODO: Determine necessity of config file change and execute if needed
 """
 
-from dataclasses import dataclass, field
+import copy
+from dataclasses import dataclass, field, fields
 from enum import IntEnum
-from typing import Optional
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterator, Mapping, Optional, Union
 
-import lea
+import numpy as np
+
+from hubsim.streaming import StageStatistics
+from hubsim.usage import UsageRecorder
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 class Config:
@@ -21,14 +29,63 @@ class Config:
         # self.pick_pack_timeout = lea.poisson(10)
         pass
 
-    # Hub operations task duration intervals
+    def replace(self, **overrides) -> "Config":
+        """
+        Copy this configuration, optionally overriding attributes. Used to hand independent configs to replications
+        Args:
+            **overrides: Config attribute names and their new values
+
+        Returns: New Config object
+        """
+        config = Config()
+        config.__dict__.update(self.__dict__)
+        for name, value in overrides.items():
+            if not hasattr(config, name):
+                raise AttributeError(f"ERROR: Config has no attribute {name}")
+            setattr(config, name, value)
+        return config
+
+    def to_dict(self) -> dict[str, Any]:
+        """All configuration settings (upper-case attributes), including instance overrides"""
+        return {name: getattr(self, name) for name in dir(self) if name.isupper()}
+
+    @classmethod
+    def from_mapping(cls, settings: Mapping[str, Any]) -> "Config":
+        """
+        Create configuration from settings, e.g. parsed from a config file
+        Args:
+            settings: Config attribute names (case-insensitive) mapped to values. Lists become tuples, so
+                [5, 25] is read as a (low, high) interval
+
+        Returns: New Config object, defaults for settings not given
+        """
+
+        def convert(value: Any) -> Any:
+            return tuple(convert(v) for v in value) if isinstance(value, list) else value
+
+        return cls().replace(**{name.upper(): convert(value) for name, value in settings.items()})
+
+    @classmethod
+    def from_file(cls, path: Union[str, Path]) -> "Config":
+        """
+        Load configuration from a TOML (.toml) or YAML (.yaml, .yml) file of settings, see from_mapping()
+        Args:
+            path: Config file
+
+        Returns: New Config object
+        """
+        return cls.from_mapping(read_settings(path))
+
+    # Hub operations task duration intervals. Sampled durations (pick-pack, flight, drone prep, charge/discharge)
+    # also accept any samplers.Distribution, e.g. samplers.Empirical.from_histogram(...) or a lea PMF
     PICK_PACK_INTERVAL = (5, 25)  # i.e. pick-packing takes between 5 and 15 min
     FLIGHT_INTERVAL = (5, 10)
     PREP_DRONE_INTERVAL = (1, 5)
     CHARGE_BATTERIES_INTERVAL = (30, 60)
     DISCHARGE_BATTERIES_INTERVAL = CHARGE_BATTERIES_INTERVAL  # Only for testing
     BATTERY_QUEUE_INTERVAL = (5, 10)  # Time for batteries to be monitored and moved to appropriate queue
-    ORDER_CREATION_INTERVAL = (10, 45)
+    ORDER_CREATION_INTERVAL = (10, 45)  # Minutes between orders
+    ORDER_ARRIVAL_RATES = None  # Orders per hour, one per hour of the day (Poisson), replaces ORDER_CREATION_INTERVAL
     OPERATING_HOURS_DURATION = 12.0 * 60.0  # 8am - 8pm
 
     # Hub resource defaults
@@ -42,10 +99,61 @@ class Config:
     # Not used yet
     NUM_LIFTS = 1
 
+    # Pool of cross-trained employees (see employees.EmployeeStore), replaces NUM_PILOTS and NUM_DELIVERY_SPECIALISTS if
+    # set. One entry per group of employees, e.g. {"skills": ["pick_pack", "vo"], "count": 3, "shift": [480, 1200]},
+    # shift in minutes of the day (default: always on shift). Tasks are staffed with one employee per role
+    EMPLOYEE_ROSTER = None
+    PICK_PACK_ROLES = ("pick_pack",)
+    FLIGHT_ROLES = ("rpic",)  # e.g. ("rpic", "vo") for flights needing a visual observer
+
+    # Battery model: "binary" (charged or not, charge times sampled from CHARGE_BATTERIES_INTERVAL) or "soc" (state of
+    # charge drained by flights and restored along a charge curve, see batteries.SocBatteryStore)
+    BATTERY_MODEL = "binary"
+    BATTERIES_PER_MISSION = 2
+    BATTERY_CAPACITY_WH = 250.0
+    FLIGHT_POWER_W = 1200.0  # Drawn evenly from the mission's batteries while flying
+    DEPLOY_SOC = 0.95  # Batteries are charged up to and deployable from this state of charge
+    CHARGER_POWER_W = 500.0  # Constant-current power of one charger
+    CV_SOC = 0.8  # State of charge where charging switches to constant voltage and power tapers off
+    HUB_POWER_CAP_W = None  # Power shared by all chargers of a hub, None for no cap
+
     RANDOM = False
+    SEED = 42  # Used when RANDOM is False
+
+    # Record busy/queued units of hub resources over time (see usage.UsageRecorder)
+    RECORD_UTILIZATION = False
+
+
+def read_settings(path: Union[str, Path]) -> dict[str, Any]:
+    """
+    Parse a TOML or YAML settings file. Parsers are imported on use: tomllib (Python 3.11+) or tomli, and PyYAML
+    Args:
+        path: .toml, .yaml or .yml file
+
+    Returns: Parsed settings
+    """
+    path = Path(path)
+    suffix = path.suffix.lower()
+    if suffix == ".toml":
+        try:
+            import tomllib
+        except ImportError:  # Python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError as e:
+                raise ImportError("ERROR: Reading TOML config files requires Python 3.11+ or tomli") from e
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if suffix in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError as e:
+            raise ImportError("ERROR: Reading YAML config files requires PyYAML (pip install pyyaml)") from e
+        with open(path) as f:
+            return yaml.safe_load(f) or {}
+    raise ValueError(f"ERROR: Unsupported config file type {path.suffix!r}, expected .toml, .yaml or .yml")
 
 
-@dataclass
 class OrderStatus(IntEnum):
     """
     Object to hold status of a particular order
@@ -61,7 +169,22 @@ class OrderStatus(IntEnum):
     COMPLETED = 6
 
 
-@dataclass
+class StatusCode:
+    """
+    OrderStatus values as plain ints for hub processes. Order views store them in the log's int8 column without
+    converting an enum member on every status change
+    """
+
+    CREATED = int(OrderStatus.CREATED)
+    STARTED = int(OrderStatus.STARTED)
+    PREP_QUEUE = int(OrderStatus.PREP_QUEUE)
+    PREP = int(OrderStatus.PREP)
+    FLIGHT_QUEUE = int(OrderStatus.FLIGHT_QUEUE)
+    FLIGHT = int(OrderStatus.FLIGHT)
+    COMPLETED = int(OrderStatus.COMPLETED)
+
+
+@dataclass(slots=True)
 class Order:
     """
     Dataclass to hold information about individual orders. Useful for monitoring data about orders as
@@ -93,20 +216,311 @@ class Order:
     status: OrderStatus = OrderStatus.CREATED
 
 
+# Time-based Order fields, stored as float columns of OrderLog (NaN where the dataclass would hold None)
+ORDER_TIME_FIELDS = tuple(f.name for f in fields(Order) if f.name not in ("_id", "status"))
+
+
+class OrderView:
+    """
+    Lightweight view of one row of an OrderLog with the same attribute names as Order, so processes can keep
+    reading and writing order.<field> while the data lives in compact columns. Status reads as an OrderStatus and
+    accepts OrderStatus members or StatusCode ints
+    """
+
+    __slots__ = ("_log", "_id")
+
+    def __init__(self, log: "OrderLog", _id: int):
+        self._log = log
+        self._id = _id
+
+    def __repr__(self):
+        released = self._log._status[self._id] == OrderLog._RELEASED
+        return f"OrderView(_id={self._id}, status={'RELEASED' if released else self.status.name})"
+
+    @property
+    def status(self) -> OrderStatus:
+        code = self._log._status[self._id]
+        if code == OrderLog._RELEASED:
+            raise ValueError(f"ERROR: Order view {self._id} was released, its row has no order until new() reuses it")
+        return OrderStatus(code)
+
+    @status.setter
+    def status(self, value: Union[OrderStatus, int]):
+        self._log._status[self._id] = value
+
+    def to_order(self) -> Order:
+        """Materialize row as an Order dataclass"""
+        return Order(self._id, **{name: getattr(self, name) for name in ORDER_TIME_FIELDS}, status=self.status)
+
+
+def _time_field(column: int) -> property:
+    def getter(self: OrderView) -> Optional[float]:
+        value = self._log._times[self._id, column]
+        return None if value != value else float(value)  # NaN check without function call
+
+    def setter(self: OrderView, value: Optional[float]):
+        self._log._times[self._id, column] = np.nan if value is None else value
+
+    return property(getter, setter)
+
+
+for _column, _name in enumerate(ORDER_TIME_FIELDS):
+    setattr(OrderView, _name, _time_field(_column))
+
+
+class OrderLog:
+    """
+    Columnar, array-backed store of orders keyed by order id. Time fields share one preallocated 2D float32 array
+    (one row per order) that doubles in size when full, so per-order memory is a fixed ~53 bytes instead of an Order
+    object and its boxed floats (~450 bytes), and aggregates can be computed with vectorized numpy operations.
+    float32 holds integer minutes exactly for ~30 years of simulated time.
+    """
+
+    dtype = np.float32
+
+    _RELEASED = -1  # Status code of rows handed back with release()
+
+    def __init__(self, capacity: int = 1024):
+        self._times = np.full((capacity, len(ORDER_TIME_FIELDS)), np.nan, dtype=self.dtype)
+        self._status = np.zeros(capacity, dtype=np.int8)
+        self._size = 0
+        self._free: list[OrderView] = []  # Views of released rows, reused with their row before the log grows
+
+    def __len__(self) -> int:
+        return self._size - len(self._free)
+
+    def __getitem__(self, _id: int) -> OrderView:
+        if _id < 0:
+            _id += self._size
+        if not 0 <= _id < self._size:
+            raise IndexError(f"ERROR: Order {_id} not in log")
+        return OrderView(self, _id)
+
+    def __iter__(self) -> Iterator[OrderView]:
+        return (OrderView(self, _id) for _id in range(self._size) if self._status[_id] != self._RELEASED)
+
+    @property
+    def capacity(self) -> int:
+        return len(self._status)
+
+    @property
+    def nbytes(self) -> int:
+        return self._times.nbytes + self._status.nbytes
+
+    def new(self) -> OrderView:
+        """
+        Append a new order with all time fields unset
+
+        Returns: OrderView for the new order, its _id is the row in the log
+        """
+        if self._free:
+            order = self._free.pop()
+            self._status[order._id] = StatusCode.CREATED
+            return order
+
+        if self._size == self.capacity:
+            self._grow()
+        _id = self._size
+        self._size += 1
+        return OrderView(self, _id)
+
+    def release(self, order: OrderView):
+        """
+        Drop an order's data and let new() reuse its row and view, keeping the log only as large as the number of
+        orders in flight and sparing an allocation per order. The view is handed out again for a new order, so
+        released orders must not be referenced afterwards
+        Args:
+            order: Order to drop
+        """
+        self._times[order._id] = np.nan
+        self._status[order._id] = self._RELEASED
+        self._free.append(order)
+
+    @classmethod
+    def from_arrays(cls, times: np.ndarray, status: np.ndarray) -> "OrderLog":
+        """
+        Rebuild log from exported columns, e.g. loaded from disk
+        Args:
+            times: 2D array of time fields, one row per order
+            status: Status code per order
+
+        Returns: OrderLog holding copies of the arrays
+        """
+        log = cls(capacity=max(len(status), 1))
+        log._times[: len(status)] = times
+        log._status[: len(status)] = status
+        log._size = len(status)
+        return log
+
+    def _grow(self):
+        capacity = 2 * self.capacity
+        times = np.full((capacity, len(ORDER_TIME_FIELDS)), np.nan, dtype=self.dtype)
+        times[: self._size] = self._times[: self._size]
+        status = np.zeros(capacity, dtype=np.int8)
+        status[: self._size] = self._status[: self._size]
+        self._times, self._status = times, status
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get a field for all orders
+        Args:
+            name: Order field name
+
+        Returns: numpy view of the column (no copy), NaN where the field is unset
+        """
+        if name == "status":
+            return self._status[: self._size]
+        return self._times[: self._size, ORDER_TIME_FIELDS.index(name)]
+
+    def completed(self) -> np.ndarray:
+        """Boolean mask of orders that have been delivered"""
+        return self.column("status") == OrderStatus.COMPLETED
+
+    def to_frame(self) -> "pd.DataFrame":
+        """
+        Convert log to a pandas DataFrame indexed by order id. Time columns are a view of the log's storage, so
+        the log must not be appended to while the frame is in use if the frame should stay in sync
+        """
+        import pandas as pd  # Heavy import, only needed for analysis
+
+        frame = pd.DataFrame(self._times[: self._size], columns=list(ORDER_TIME_FIELDS), copy=False)
+        frame.index.name = "_id"
+        frame["status"] = self._status[: self._size]
+        return frame
+
+
+# Order stages summarized by DataMonitor in streaming mode, mapped to the Order field holding the duration
+STREAMING_STAGES = {
+    "pickpack_queue": "pickpack_queue_duration",
+    "flight_queue": "flight_queue_duration",
+    "total_duration": "total_duration",
+}
+
+
+# Integer counters of DataMonitor
+MONITOR_COUNTERS = ("batteries_charged", "batteries_discharged", "orders_created", "orders_delivered")
+USAGE_PREFIX = "usage:"  # Exported arrays of usage recorders are named usage:<recorder>:<array>
+
+
 @dataclass
 class DataMonitor:
     """
     Dataclass to hold information about the simulation as a whole. Often these will be populated
     by doing calculations on attributes from other dataclasses (like orders)
+
+    In streaming mode, delivered orders are summarized into online statistics per stage (mean/variance, P-squared
+    quantiles, time-bucketed histograms) and dropped from the order log, so memory stays bounded on long runs.
+    wait_times and delivery_times are then empty, use stages instead.
     """
 
-    wait_times: list[int] = field(default_factory=list)
     discharge_times: list[int] = field(default_factory=list)
     batteries_charged: int = 0
     batteries_discharged: int = 0
+    orders_created: int = 0
     orders_delivered: int = 0
-    delivery_times: list[int] = field(default_factory=list)
-    orders: list[Order] = field(default_factory=list)
+    orders: OrderLog = field(default_factory=OrderLog)
+    streaming: bool = False
+    stages: dict[str, StageStatistics] = field(default_factory=dict)
+    utilization: dict[str, UsageRecorder] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if self.streaming and not self.stages:
+            self.stages = {stage: StageStatistics() for stage in STREAMING_STAGES}
+
+    def add_usage_recorder(self, name: str) -> UsageRecorder:
+        """
+        Create recorder for a resource's usage, numbering names that are already taken (e.g. several hubs)
+        Args:
+            name: Name of resource
+
+        Returns: New UsageRecorder registered in utilization
+        """
+        unique, i = name, 1
+        while unique in self.utilization:
+            i += 1
+            unique = f"{name}#{i}"
+        self.utilization[unique] = UsageRecorder(unique)
+        return self.utilization[unique]
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """
+        Export counters, order log, discharge times and usage recorders as numpy arrays, e.g. for np.savez. Not
+        available in streaming mode
+
+        Returns: Dictionary of arrays, order columns and usage records are views
+        """
+        if self.streaming:
+            raise ValueError("ERROR: Streaming DataMonitor has no order records to export")
+        arrays = {name: np.array(getattr(self, name)) for name in MONITOR_COUNTERS}
+        arrays["order_times"] = self.orders._times[: self.orders._size]
+        arrays["order_status"] = self.orders._status[: self.orders._size]
+        arrays["discharge_times"] = np.array(self.discharge_times, dtype=float)
+        for name, recorder in self.utilization.items():
+            for key, values in recorder.to_arrays().items():
+                arrays[f"{USAGE_PREFIX}{name}:{key}"] = values
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: dict[str, np.ndarray]) -> "DataMonitor":
+        """Rebuild DataMonitor from to_arrays() output"""
+        monitor = cls(orders=OrderLog.from_arrays(arrays["order_times"], arrays["order_status"]))
+        for name in MONITOR_COUNTERS:
+            setattr(monitor, name, int(arrays[name]))
+        if "discharge_times" in arrays:  # Missing in arrays exported by older versions
+            monitor.discharge_times = arrays["discharge_times"].tolist()
+        usage: dict[str, dict[str, np.ndarray]] = {}
+        for key, values in arrays.items():
+            if key.startswith(USAGE_PREFIX):
+                name, _, field_name = key[len(USAGE_PREFIX) :].rpartition(":")
+                usage.setdefault(name, {})[field_name] = values
+        monitor.utilization = {name: UsageRecorder.from_arrays(name, records) for name, records in usage.items()}
+        return monitor
+
+    def snapshot(self) -> "DataMonitor":
+        """
+        Independent copy of the monitor's current state, safe to read while the simulation goes on (see
+        background.BackgroundRun). Order log, counters, stage statistics and usage recorders are copied
+        """
+        if self.streaming:
+            monitor = DataMonitor(streaming=True, stages=copy.deepcopy(self.stages))
+            for name in MONITOR_COUNTERS:
+                setattr(monitor, name, getattr(self, name))
+            monitor.discharge_times = list(self.discharge_times)
+            monitor.utilization = {
+                name: UsageRecorder.from_arrays(name, recorder.to_arrays())
+                for name, recorder in self.utilization.items()
+            }
+            return monitor
+        return DataMonitor.from_arrays(self.to_arrays())
+
+    def record_delivery(self, order: OrderView):
+        """
+        Record a completed order
+        Args:
+            order: Delivered order, released from the order log in streaming mode
+        """
+        self.orders_delivered += 1
+
+        if self.streaming:
+            now = order.completion_time
+            for stage, field_name in STREAMING_STAGES.items():
+                self.stages[stage].add(now, getattr(order, field_name))
+            self.orders.release(order)
+
+    def _completed_in_delivery_order(self) -> np.ndarray:
+        completed = np.flatnonzero(self.orders.completed())
+        completion_times = self.orders.column("completion_time")[completed]
+        return completed[np.argsort(completion_times, kind="stable")]
+
+    @property
+    def wait_times(self) -> np.ndarray:
+        """Total duration of delivered orders, in order of delivery"""
+        return self.orders.column("total_duration")[self._completed_in_delivery_order()]
+
+    @property
+    def delivery_times(self) -> np.ndarray:
+        """Completion time of delivered orders, in order of delivery"""
+        return self.orders.column("completion_time")[self._completed_in_delivery_order()]
 
 
 @dataclass
@@ -2,52 +2,365 @@
 Contains all classes related to employees
 Type of Worker, different permissions or possible tasks. Important as input to simulation
 
-TODO: More
+Hubs are staffed in one of two ways. By default each role is its own resource: DeliverySpecialist (sized by
+NUM_DELIVERY_SPECIALISTS) pick-packs and Pilot (NUM_PILOTS) flies. If Config.EMPLOYEE_ROSTER is set, an EmployeeStore
+holds a pool of cross-trained employees instead, each with a set of skills and a daily shift, and tasks request a team
+of roles from it, e.g. PICK_PACK_ROLES = ("pick_pack",) or FLIGHT_ROLES = ("rpic", "vo"). Free employees are indexed
+per skill, so a team is found without scanning the pool.
 """
 
-from typing import Optional
+import bisect
+import itertools
+from collections import Counter, deque
+from typing import TYPE_CHECKING, Any, Generator, Iterable, Mapping, Optional, Sequence
 
-from hub_resources import HubEnvironment, HubResource, HubStore
+from simpy import Event
 
-# TODO: Define resourcepool (Maybe use simpy.Stores) class? Defines resources with overlapping capabilities
+from hubsim.hub_resources import HubEnvironment, HubResource, HubStore
+
+if TYPE_CHECKING:
+    from hubsim.hub import Hub
+
+# Skills, an employee can have any number of them
+PICK_PACK = "pick_pack"
+REMOTE_PILOT_IN_COMMAND = "rpic"
+VISUAL_OBSERVER = "vo"
+SAFETY_PILOT = "safety_pilot"
+
+DAY = 24 * 60  # Shifts repeat daily
 
 
 class Pilot(HubResource):
     """Pilots modeled as a hub resource with capacity equal to number of pilots during shift"""
 
-    def __init__(self, env: HubEnvironment, num_pilots: Optional[int] = None):
+    def __init__(self, env: HubEnvironment, num_pilots: Optional[int] = None, hub: Optional["Hub"] = None):
         if num_pilots:
-            super().__init__(env, capacity=num_pilots)
+            super().__init__(env, capacity=num_pilots, hub=hub)
         else:
-            super().__init__(env, env.config.NUM_LIFTS)
+            config = hub.config if hub is not None else env.config
+            super().__init__(env, config.NUM_PILOTS, hub=hub)
 
 
 class DeliverySpecialist(HubResource):
     """Delivery Specialist modeled as a hub resource with capacity equal to number of specialists during shift"""
 
-    def __init__(self, env: HubEnvironment, num_delivery_specialists: Optional[int] = None):
+    def __init__(
+        self, env: HubEnvironment, num_delivery_specialists: Optional[int] = None, hub: Optional["Hub"] = None
+    ):
         if num_delivery_specialists:
-            super().__init__(env, capacity=num_delivery_specialists)
+            super().__init__(env, capacity=num_delivery_specialists, hub=hub)
         else:
-            super().__init__(env, env.config.NUM_DELIVERY_SPECIALISTS)
+            config = hub.config if hub is not None else env.config
+            super().__init__(env, config.NUM_DELIVERY_SPECIALISTS, hub=hub)
+
+
+class HubEmployee:
+    """
+    Employee of an EmployeeStore. Plain object instead of a simpy resource, like batteries.SocBattery, so pools of
+    hundreds of employees stay cheap
+    """
 
+    __slots__ = ("_id", "name", "skills", "shift", "busy", "on_shift")
 
-# TODO: VOs? Other employees? employee module
-class VisualObserver(HubResource):
-    pass
+    def __init__(
+        self, _id: int, skills: Iterable[str], shift: Optional[tuple[float, float]] = None, name: Optional[str] = None
+    ):
+        """
+        Args:
+            _id: Position in the store's employee list
+            skills: Roles the employee can fill, e.g. PICK_PACK or REMOTE_PILOT_IN_COMMAND
+            shift: Daily (start, end) in minutes of the day, end before start for overnight shifts. None or a shift
+                of a whole day, e.g. (0, 1440), for always
+            name: Name for display, defaults to E<_id>
+        """
+        self._id = _id
+        self.name = name if name is not None else f"E{_id}"
+        self.skills = frozenset(skills)
+        self.shift: Optional[tuple[float, float]] = None
+        if shift is not None:
+            start, end = float(shift[0]), float(shift[1])
+            if start == end:
+                raise ValueError(f"ERROR: Shift {tuple(shift)} of {self.name} has zero length")
+            if (end - start) % DAY != 0:  # Whole-day shifts stay None, start and end would coincide
+                self.shift = (start % DAY, end % DAY)
+        self.busy = False
+        self.on_shift = False
 
+    def __repr__(self):
+        return f"{self.name}({', '.join(sorted(self.skills))})"
 
-class HubEmployee(HubResource):
-    pass
+    def working(self, time: float) -> bool:
+        """Whether time falls in the employee's shift"""
+        if self.shift is None:
+            return True
+        start, end = self.shift
+        time_of_day = time % DAY
+        if start <= end:
+            return start <= time_of_day < end
+        return time_of_day >= start or time_of_day < end
 
 
-class RemotePilotInCommand(HubEmployee):
-    pass
+def parse_roster(roster: Sequence[Mapping[str, Any]]) -> list[HubEmployee]:
+    """
+    Create employees from a roster, see Config.EMPLOYEE_ROSTER
+    Args:
+        roster: Groups of employees: mappings with skills, and optionally count (default 1), shift and name
 
+    Returns: Employees, numbered in roster order
+    """
+    employees = []
+    for group in roster:
+        unknown = set(group) - {"skills", "count", "shift", "name"}
+        if unknown:
+            raise ValueError(f"ERROR: Unknown roster keys {sorted(unknown)}, expected skills, count, shift, name")
+        if not group.get("skills"):
+            raise ValueError(f"ERROR: Roster group {dict(group)} has no skills")
+        for i in range(int(group.get("count", 1))):
+            name = group.get("name")
+            if name is not None and group.get("count", 1) > 1:
+                name = f"{name}{i + 1}"
+            employees.append(HubEmployee(len(employees), group["skills"], group.get("shift"), name))
+    return employees
+
+
+def roster_staff(roster: Sequence[Mapping[str, Any]], roles: Sequence[str]) -> int:
+    """
+    Number of teams of roles a roster can staff at once, averaged over the day. Cross-trained employees are counted
+    for each of their skills, so this is an upper bound when teams compete for the same employees
+    Args:
+        roster: Groups of employees, see Config.EMPLOYEE_ROSTER
+        roles: Roles of one team, e.g. Config.FLIGHT_ROLES
+
+    Returns: Teams, 0 if a role is not covered
+    """
+    staff: Counter[str] = Counter()
+    for employee in parse_roster(roster):
+        if employee.shift is None:
+            coverage = 1.0
+        else:
+            start, end = employee.shift
+            coverage = ((end - start) % DAY) / DAY
+        for skill in employee.skills:
+            staff[skill] += coverage
+    return min(int(staff[role] // needed) for role, needed in Counter(roles).items())
 
-class SafetyPilot(HubEmployee):
-    pass
+
+class EmployeeRequest(Event):
+    """
+    Request for a team of employees, one per role, triggered with the list of employees once all are free. Use as a
+    context manager like simpy resource requests: leaving the block releases the team, or withdraws the request if it
+    was not granted yet
+    """
+
+    def __init__(self, store: "EmployeeStore", roles: Sequence[str]):
+        super().__init__(store.env)
+        self.store = store
+        self.roles = tuple(roles)
+        self._order = next(store._counter)  # Requests of all kinds are granted oldest first
+        store._request(self)
+
+    def __enter__(self) -> "EmployeeRequest":
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.triggered:
+            self.store.release(self.value)
+        else:
+            self.store._cancel(self)
 
 
 class EmployeeStore(HubStore):
-    pass
+    """
+    Pool of cross-trained employees with shifts. Free employees on shift are kept in one insertion-ordered free list
+    per skill, so a team for a request is assembled from the lists of its roles in time independent of the pool
+    size, and the employee idle the longest is picked first. Waiting requests are queued per team of roles, and only
+    the oldest request of each kind is tried when employees become free.
+
+    If Config.RECORD_UTILIZATION is set, busy employees, waiting requests and employees on shift are recorded as the
+    busy units, queue length and capacity of the store.
+    """
+
+    def __init__(
+        self,
+        env: HubEnvironment,
+        roster: Optional[Sequence[Mapping[str, Any]]] = None,
+        hub: Optional["Hub"] = None,
+    ):
+        """
+        Args:
+            env: Simulation environment
+            roster: Groups of employees, defaults to Config.EMPLOYEE_ROSTER
+            hub: Hub owning the store
+        """
+        config = hub.config if hub is not None else env.config
+        self.employees = parse_roster(roster if roster is not None else config.EMPLOYEE_ROSTER)
+        self.free: dict[str, dict[HubEmployee, None]] = {}  # Free employees on shift per skill, oldest first
+        for employee in self.employees:
+            for skill in employee.skills:
+                self.free.setdefault(skill, {})
+        self.busy = 0
+        self.on_shift = 0
+        self._waiting: dict[tuple[str, ...], deque[EmployeeRequest]] = {}  # Waiting requests per team of roles
+        self._waiting_count = 0
+        self._counter = itertools.count()
+        super().__init__(env, capacity=max(len(self.employees), 1), hub=hub)
+        # Requests for a skill nobody has would wait forever, e.g. "RPIC" instead of "rpic"
+        self._check_roles(config.PICK_PACK_ROLES, "PICK_PACK_ROLES")
+        self._check_roles(config.FLIGHT_ROLES, "FLIGHT_ROLES")
+
+        # Employees change shift at these minutes of the day
+        self._shift_starts: dict[float, list[HubEmployee]] = {}
+        self._shift_ends: dict[float, list[HubEmployee]] = {}
+        for employee in self.employees:
+            if employee.shift is not None:
+                self._shift_starts.setdefault(employee.shift[0], []).append(employee)
+                self._shift_ends.setdefault(employee.shift[1], []).append(employee)
+            if employee.working(env.now):
+                self._start_shift(employee)
+        self._record()
+        if self._shift_starts:
+            self.env.process(self.run_shifts())
+
+    def _check_roles(self, roles: Sequence[str], source: str = "Requested roles"):
+        """Raise ValueError if no employee has one of the roles"""
+        missing = sorted(set(roles) - self.free.keys())
+        if missing:
+            raise ValueError(f"ERROR: {source} {missing} not among the roster's skills {sorted(self.free)}")
+
+    def _record(self):
+        """Record busy employees, waiting requests and employees on shift if they changed"""
+        if self.usage is not None:
+            state = (self.busy, self._waiting_count, self.on_shift)
+            if state != self._last_state:
+                self._last_state = state
+                self.usage.record(self.env._now, *state)
+
+    def _add_free(self, employee: HubEmployee):
+        for skill in employee.skills:
+            self.free[skill][employee] = None
+
+    def _remove_free(self, employee: HubEmployee):
+        for skill in employee.skills:
+            del self.free[skill][employee]
+
+    def _start_shift(self, employee: HubEmployee):
+        if employee.on_shift:
+            return
+        employee.on_shift = True
+        self.on_shift += 1
+        if not employee.busy:
+            self._add_free(employee)
+
+    def _end_shift(self, employee: HubEmployee):
+        """Take employee off shift. Busy employees finish their task first"""
+        if not employee.on_shift:
+            return
+        employee.on_shift = False
+        self.on_shift -= 1
+        if not employee.busy:
+            self._remove_free(employee)
+
+    def request(self, roles: Sequence[str]) -> EmployeeRequest:
+        """
+        Request a team of employees
+        Args:
+            roles: One skill per team member, e.g. Config.FLIGHT_ROLES
+
+        Returns: EmployeeRequest, its value is the list of employees in the order of roles
+        """
+        return EmployeeRequest(self, roles)
+
+    def _team(self, roles: tuple[str, ...]) -> Optional[list[HubEmployee]]:
+        """
+        Free employees filling roles, one per role, None if there are not enough. Scarcest roles are filled first so
+        employees with several of the skills are left for roles only they can fill
+        """
+        team: dict[str, list[HubEmployee]] = {}
+        chosen: set[HubEmployee] = set()
+        for role in sorted(set(roles), key=lambda r: len(self.free.get(r, ()))):
+            needed = roles.count(role)
+            members = []
+            for employee in self.free.get(role, ()):  # Skips at most len(roles) employees chosen for other roles
+                if employee not in chosen:
+                    members.append(employee)
+                    chosen.add(employee)
+                    if len(members) == needed:
+                        break
+            if len(members) < needed:
+                return None
+            team[role] = members
+        return [team[role].pop(0) for role in roles]
+
+    def _grant(self, request: EmployeeRequest) -> bool:
+        """Assign a team to request if one is free"""
+        team = self._team(request.roles)
+        if team is None:
+            return False
+        for employee in team:
+            self._remove_free(employee)
+            employee.busy = True
+        self.busy += len(team)
+        request.succeed(team)
+        return True
+
+    def _request(self, request: EmployeeRequest):
+        self._check_roles(request.roles)
+        waiting = self._waiting.setdefault(request.roles, deque())
+        if waiting or not self._grant(request):
+            waiting.append(request)
+            self._waiting_count += 1
+        self._record()
+
+    def _cancel(self, request: EmployeeRequest):
+        self._waiting[request.roles].remove(request)
+        self._waiting_count -= 1
+        self._record()
+
+    def _dispatch(self):
+        """Grant waiting requests, oldest first across kinds, while teams can be assembled"""
+        while self._waiting_count:
+            heads = sorted((queue[0] for queue in self._waiting.values() if queue), key=lambda r: r._order)
+            for request in heads:
+                if self._grant(request):
+                    self._waiting[request.roles].popleft()
+                    self._waiting_count -= 1
+                    break
+            else:
+                break
+        self._record()
+
+    def release(self, team: Iterable[HubEmployee]):
+        """
+        Return employees after a task. Employees whose shift has ended go home
+        Args:
+            team: Employees granted by request()
+        """
+        for employee in team:
+            employee.busy = False
+            self.busy -= 1
+            if employee.on_shift:
+                self._add_free(employee)
+        self._dispatch()
+
+    def run_shifts(self) -> Generator[Event, Any, Any]:
+        """
+        Start and end shifts at their times of day, sleeping until the next change
+
+        Returns: Generator object for shift process
+        """
+        # Walk the sorted change times by index and look them up as stored: times recomputed with float arithmetic,
+        # e.g. (480.1 + DAY) % DAY, can miss their key
+        changes = sorted(self._shift_starts.keys() | self._shift_ends.keys())
+        day = self.env.now - self.env.now % DAY
+        i = bisect.bisect_right(changes, self.env.now - day)
+        while True:
+            if i == len(changes):
+                i, day = 0, day + DAY
+            change = changes[i]
+            yield self.env.timeout(max(day + change - self.env.now, 0.0))
+            for employee in self._shift_ends.get(change, ()):
+                self._end_shift(employee)
+            for employee in self._shift_starts.get(change, ()):
+                self._start_shift(employee)
+            self._dispatch()
+            i += 1
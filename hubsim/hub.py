@@ -2,40 +2,92 @@
 The Hub class is the critical block used to encapsulate all hub operations for simpy simulations
 """
 
-import random
-from typing import Any, Generator
+from typing import Any, Generator, Iterable, Optional, Union
 
-from batteries import BatteryStore
-from config import Order, OrderStatus
-from employees import DeliverySpecialist, Pilot
-from hub_resources import Drone, HubEnvironment, SimpleBattery, VerticalLift
 from simpy import Timeout
+from simpy.resources.resource import Request
+
+from hubsim.arrivals import interval_arrivals, poisson_arrivals
+from hubsim.batteries import BatteryRequest, BatteryStore, SocBatteryStore
+from hubsim.config import Config, DataMonitor, OrderView, StatusCode
+from hubsim.employees import DeliverySpecialist, EmployeeRequest, EmployeeStore, Pilot
+from hubsim.hub_resources import Drone, HubEnvironment, SimpleBattery, VerticalLift
+from hubsim.streams import FLIGHT, ORDERS, PICK_PACK, PREP_DRONE, substream
 
 
 class Hub:
     """A DroneUp Hub environment for simulating processes and operations that occur at delivery hubs"""
 
-    def __init__(self, env: HubEnvironment) -> None:
+    def __init__(
+        self,
+        env: HubEnvironment,
+        name: Optional[str] = None,
+        config: Optional[Config] = None,
+        monitor: Optional[DataMonitor] = None,
+        generate_orders: bool = True,
+        arrivals: Optional[Iterable[float]] = None,
+    ) -> None:
+        """
+        Args:
+            env: Simulation environment
+            name: Name of hub, prefixes its random substreams. Needed when several hubs share an environment
+            config: Hub configuration, defaults to the environment's
+            monitor: Hub monitor, defaults to the environment's
+            generate_orders: Run the hub's own order creation loop. Disabled when orders are routed to the hub from
+                outside, see network.HubNetwork
+            arrivals: Order creation times in minutes, e.g. arrivals.read_arrivals() to replay historical orders.
+                Defaults to Poisson arrivals if Config.ORDER_ARRIVAL_RATES is set, else gaps from
+                Config.ORDER_CREATION_INTERVAL
+        """
         self.env = env
-        self.config = env.config
-        self.monitor = env.monitor
+        self.name = name
+        self.config = config if config is not None else env.config
+        self.monitor = monitor if monitor is not None else env.monitor
+        self.orders_in_system = 0  # Orders created but not yet delivered, used for load-based routing
 
         # Hub Resources
-        self.vertical_lift = VerticalLift(env)
-        self.pilot = Pilot(env)
-        self.delivery_specialist = DeliverySpecialist(env)
-        self.drone = Drone(env)
-        self.battery = SimpleBattery(env)
-        self.battery_store = BatteryStore(env)
+        self.vertical_lift = VerticalLift(env, hub=self)
+        if self.config.EMPLOYEE_ROSTER is None:
+            self.pilot: Optional[Pilot] = Pilot(env, hub=self)
+            self.delivery_specialist: Optional[DeliverySpecialist] = DeliverySpecialist(env, hub=self)
+            self.employees: Optional[EmployeeStore] = None
+        else:
+            # Cross-trained employees fill both roles from one pool
+            self.pilot = self.delivery_specialist = None
+            self.employees = EmployeeStore(env, hub=self)
+        self.drone = Drone(env, hub=self)
+        if self.config.BATTERY_MODEL == "soc":
+            # Missions take state of charge batteries from the store, there is no separate battery resource
+            self.battery: Optional[SimpleBattery] = None
+            self.battery_store = SocBatteryStore(env, hub=self)
+        elif self.config.BATTERY_MODEL == "binary":
+            self.battery = SimpleBattery(env, hub=self)
+            self.battery_store = BatteryStore(env, hub=self)
+        else:
+            raise ValueError(f"ERROR: Unknown battery model {self.config.BATTERY_MODEL!r}, expected 'binary' or 'soc'")
+
+        # Task duration samplers
+        self.pick_pack_time = env.sampler(substream(name, PICK_PACK), self.config.PICK_PACK_INTERVAL)
+        self.flight_time = env.sampler(substream(name, FLIGHT), self.config.FLIGHT_INTERVAL)
+        self.prep_drone_time = env.sampler(substream(name, PREP_DRONE), self.config.PREP_DRONE_INTERVAL)
+
+        # Order arrivals, consumed lazily by the order creation loop
+        if arrivals is None:
+            if self.config.ORDER_ARRIVAL_RATES is not None:
+                arrivals = poisson_arrivals(self.config.ORDER_ARRIVAL_RATES, env.rng, substream(name, ORDERS))
+            else:
+                arrivals = interval_arrivals(env.sampler(substream(name, ORDERS), self.config.ORDER_CREATION_INTERVAL))
+        self.arrivals = arrivals
 
         # Order creation loop
-        self.env.process(self.create_orders())  # Schedule process to run simulation at instantiation of hub
+        if generate_orders:
+            self.env.process(self.create_orders())  # Schedule process to run simulation at instantiation of hub
 
-        if self.config.RANDOM is False:
-            random.seed(42)
+    def __repr__(self):
+        return f"Hub({self.name!r})"
 
     # Hub Processes
-    def pick_pack(self, order: Order) -> Generator[Timeout, Any, Any]:
+    def pick_pack(self, order: OrderView) -> Generator[Timeout, Any, Any]:
         """
         Execute picking and packaging. Will be obsolete eventually when WM takes over this portion of our workflow.
 
@@ -46,11 +98,11 @@ class Hub:
 
         """
         order.pickpack_start_time = self.env.now
-        order.status = OrderStatus.PREP  # TODO: Bug??? new status?
-        yield self.env.timeout(random.randint(*self.config.PICK_PACK_INTERVAL))
+        order.status = StatusCode.PREP  # TODO: Bug??? new status?
+        yield self.env.timeout(self.pick_pack_time())
         order.pickpack_duration = self.env.now - order.pickpack_start_time
 
-    def flight(self, order: Order) -> Generator[Timeout, Any, Any]:
+    def flight(self, order: OrderView) -> Generator[Timeout, Any, Any]:
         """
         Execute flight plan. Assumes all conditions for flight have been met.
         Args:
@@ -60,11 +112,11 @@ class Hub:
 
         """
         order.flight_start_time = self.env.now
-        order.status = OrderStatus.FLIGHT
-        yield self.env.timeout(random.randint(*self.config.FLIGHT_INTERVAL))
+        order.status = StatusCode.FLIGHT
+        yield self.env.timeout(self.flight_time())
         order.flight_duration = self.env.now - order.flight_start_time
 
-    def prep_drone(self, order: Order) -> Generator[Timeout, Any, Any]:
+    def prep_drone(self, order: OrderView) -> Generator[Timeout, Any, Any]:
         """
         Execute drone preparation activities. Can be used as an abstraction for all processes related to hardware
         preparation (therefore not pickpacking).
@@ -76,11 +128,29 @@ class Hub:
 
         """
         order.prep_start_time = self.env.now
-        order.status = OrderStatus.PREP
-        yield self.env.timeout(random.randint(*self.config.PREP_DRONE_INTERVAL))
+        order.status = StatusCode.PREP
+        yield self.env.timeout(self.prep_drone_time())
         order.prep_duration = self.env.now - order.prep_start_time
 
-    def deliver_order(self, order: Order) -> Generator[Timeout, Any, Any]:
+    def request_batteries(self) -> Union[Request, BatteryRequest]:
+        """Request the batteries of one mission: a unit of the battery resource, or charged batteries from the store"""
+        if self.battery is not None:
+            return self.battery.request()
+        return self.battery_store.request()
+
+    def request_pick_packer(self) -> Union[Request, EmployeeRequest]:
+        """Request staff to pick-pack one order: a delivery specialist, or PICK_PACK_ROLES from the employee pool"""
+        if self.employees is None:
+            return self.delivery_specialist.request()
+        return self.employees.request(self.config.PICK_PACK_ROLES)
+
+    def request_flight_crew(self) -> Union[Request, EmployeeRequest]:
+        """Request staff to fly one order: a pilot, or FLIGHT_ROLES from the employee pool"""
+        if self.employees is None:
+            return self.pilot.request()
+        return self.employees.request(self.config.FLIGHT_ROLES)
+
+    def deliver_order(self, order: OrderView) -> Generator[Timeout, Any, Any]:
         """
         Execute delivery process given that an order has been created. This is the main process of interest, and
         has a defined start and end.
@@ -92,27 +162,51 @@ class Hub:
         """
 
         order.start_time = self.env.now
-        order.status = OrderStatus.STARTED
+        order.status = StatusCode.STARTED
+
+        # Stages run inline, the flight stage only depends on the pick-pack stage through the time it finishes
+        yield from self.prepare_order(order)
+        yield from self.fly_order(order)
+
+    def prepare_order(self, order: OrderView) -> Generator[Timeout, Any, Any]:
+        """
+        Pick-pack stage of delivery: wait for a delivery specialist and pick-pack the order. Without an employee
+        roster it depends only on order arrivals, PICK_PACK_INTERVAL and NUM_DELIVERY_SPECIALISTS, see
+        incremental.UPSTREAM_SETTINGS
+        Args:
+            order: Order object for monitoring entity flow as created by create_orders()
 
+        Returns: Generator for pick-pack stage
+        """
         # Request delivery specialist, suspend function until available
-        with self.delivery_specialist.request() as req:  # TODO: create pool of employee resources
+        with self.request_pick_packer() as req:
             pickpack_req_time = self.env.now
-            order.status = OrderStatus.PREP_QUEUE
+            order.status = StatusCode.PREP_QUEUE
             yield req
             order.pickpack_queue_duration = self.env.now - pickpack_req_time
 
             # Pickpack order
-            yield self.env.process(self.pick_pack(order))
+            yield from self.env.call(self.pick_pack(order))
+
+    def fly_order(self, order: OrderView) -> Generator[Timeout, Any, Any]:
+        """
+        Flight stage of delivery: wait for drone, pilot and batteries, fly the order and record its delivery
+        Args:
+            order: Order that finished prepare_order()
 
-        # Request drone, pilot, and battery, suspend function until ALL are available
-        with self.drone.request() as drone_req, self.pilot.request() as pilot_req, self.battery.request() as batt_req:
+        Returns: Generator for flight stage
+        """
+        # Request drone, pilot, and batteries, suspend function until ALL are available
+        with self.drone.request() as drone_req, self.request_flight_crew() as crew_req, self.request_batteries() as batt_req:
             prep_req_time = self.env.now
-            order.status = OrderStatus.FLIGHT_QUEUE
-            yield self.env.all_of([drone_req, pilot_req, batt_req])
+            order.status = StatusCode.FLIGHT_QUEUE
+            yield self.env.all_of([drone_req, crew_req, batt_req])
             order.flight_queue_duration = self.env.now - prep_req_time
 
             # Fly order
-            yield self.env.process(self.flight(order))
+            yield from self.env.call(self.flight(order))
+            if self.battery is None:
+                self.battery_store.release(batt_req.value, order.flight_duration)
 
         # with self.delivery_specialist.request() as dsreq, self.drone.request() as dreq:
         #     yield self.env.all_of([dsreq, dreq])
@@ -125,16 +219,17 @@ class Hub:
 
         # End of delivery monitoring
         order.completion_time = self.env.now
-        order.status = OrderStatus.COMPLETED
+        order.status = StatusCode.COMPLETED
         order.total_duration = order.completion_time - order.creation_time
 
-        self.env.monitor.wait_times.append(order.total_duration)
-        self.env.monitor.delivery_times.append(order.completion_time)
-        self.env.monitor.orders_delivered += 1
+        self.orders_in_system -= 1
+        self.env.order_finished()
+        self.monitor.record_delivery(order)
 
     def create_orders(self) -> Generator[Timeout, Any, Any]:
         """
-        Infinite creation-loop for introducing orders into the system.
+        Creation-loop for introducing orders into the system at the times given by the hub's arrival source. Runs until
+        the source is exhausted or the time-limit is reached: env.run(until=12*60)
         TODO: add option to set specific # of deliveries
 
         TODO: not just order creation, running all processes (checking batteries)
@@ -142,20 +237,28 @@ class Hub:
         Returns: Generator for waiting time between order creation
         """
 
-        order_id = 0
-        while True:  # Run until time-limit or event occurs: env.run(until=12*60)
-            # Wait some time between orders
-            yield self.env.timeout(*self.env.config.ORDER_CREATION_INTERVAL)
-
-            # Create new order object, save object and relevant info
-            order = Order(order_id)
-            order.creation_time = self.env.now
-            order.status = OrderStatus.CREATED
-            self.monitor.orders.append(order)
+        for time in self.arrivals:
+            # Wait until next order, orders at or before the current time (e.g. unsorted trace rows) are placed now
+            if time > self.env.now:
+                yield self.env.timeout(time - self.env.now)
+            self.place_order()
 
-            # Queue order for delivery
-            self.env.process(self.deliver_order(order))
-            order_id += 1
+    def place_order(self) -> OrderView:
+        """
+        Create a new order at the current time and queue it for delivery
+        Returns: Order view in the monitor's order log
+        """
+        # Create new order in the monitor's order log, save relevant info
+        order = self.monitor.orders.new()
+        order.creation_time = self.env.now
+        order.status = StatusCode.CREATED
+        self.monitor.orders_created += 1
+        self.orders_in_system += 1
+        self.env.order_started()
+
+        # Queue order for delivery
+        self.env.process(self.deliver_order(order))
+        return order
 
 
 if __name__ == "__main__":
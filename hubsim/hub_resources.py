@@ -2,65 +2,256 @@
 Helper classes for clearly defining hub resources
 TODO: rename file?
 """
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Callable, Generator, Optional
 
 import simpy
-from config import Config, DataMonitor
+
+from hubsim.config import Config, DataMonitor
+from hubsim.profiling import EventProfiler
+from hubsim.samplers import DEFAULT_BLOCK_SIZE, BufferedSampler, as_distribution
+from hubsim.streams import RandomStreams
+from hubsim.usage import UsageRecorder
+
+if TYPE_CHECKING:
+    from hubsim.hub import Hub
 
 
 class HubEnvironment(simpy.Environment):
-    """Subclass of simpy.Environment for adding configuration and monitoring utilities"""
+    """
+    Subclass of simpy.Environment for adding configuration, monitoring and random number utilities.
+
+    Fast-forward mode cuts the events that do not move the clock: sub-processes run inline in their parent process
+    instead of as separate processes (no start and finish events), battery queue transitions happen immediately
+    instead of after a zero-delay timeout, and periodic housekeeping processes sleep while no orders are in the system
+    so the clock jumps straight across idle stretches. Simulated times are unaffected, but events at the same time may
+    be processed in a different order, so results match normal mode statistically rather than run for run.
+    """
 
-    def __init__(self, config: Config, monitor: DataMonitor):
+    def __init__(
+        self,
+        config: Config,
+        monitor: DataMonitor,
+        seed: Optional[int] = None,
+        profile: bool = False,
+        fast_forward: bool = False,
+    ):
         super().__init__()
         self.config = config
         self.monitor = monitor
+        self.fast_forward = fast_forward
+
+        # Orders created but not yet delivered across all hubs, and event waking processes sleeping while there are none
+        self.orders_in_system = 0
+        self._orders_arrived: Optional[simpy.Event] = None
+
+        # Use fixed seed for repeatable runs unless randomized, in which case a seed is drawn (and recorded) by rng
+        if seed is None and config.RANDOM is False:
+            seed = config.SEED
+        self.rng = RandomStreams(seed)
+        self._samplers: dict[str, BufferedSampler] = {}
+
+        # Opt-in event loop instrumentation, see profiling.EventProfiler
+        self.profiler: Optional[EventProfiler] = EventProfiler(self) if profile else None
+
+    def sampler(self, name: str, spec: Any, block_size: int = DEFAULT_BLOCK_SIZE) -> BufferedSampler:
+        """
+        Get buffered sampler for a named substream, creating it on first use. Samplers are shared by every process
+        drawing from the same substream (e.g. all batteries share the charging sampler)
+        Args:
+            name: Name of substream, e.g. streams.FLIGHT
+            spec: Duration specification from Config, (low, high) tuple or samplers.Distribution
+            block_size: Number of samples drawn at once
 
-    # TODO figure out caching
-    # @st.cache_data
-    # def run(
-    #     self, until: Optional[Union[SimTime, Event]] = None
-    # ) -> Optional[Any]:
-    #     return super().run(until)
+        Returns: BufferedSampler, call it to get the next sample
+        """
+        if name not in self._samplers:
+            self._samplers[name] = BufferedSampler(as_distribution(spec), self.rng.generator(name), block_size)
+        return self._samplers[name]
+
+    def reseed(self, seed: int):
+        """
+        Restart all random substreams from a new seed, discarding samples already drawn. Used to make independent
+        branches from a shared checkpoint, see checkpoint.Checkpoint
+        Args:
+            seed: New base seed
+        """
+        self.rng.reseed(seed)
+        for name, sampler in self._samplers.items():
+            sampler.reset(self.rng.generator(name))
+
+    def call(self, generator: Generator[simpy.Event, Any, Any]) -> Generator[simpy.Event, Any, Any]:
+        """
+        Run a sub-process to completion inside the calling process, use as `yield from env.call(...)`. Starts a
+        separate simpy process unless in fast-forward mode, where the generator is simply delegated to
+        Args:
+            generator: Process generator, e.g. hub.pick_pack(order)
+
+        Returns: Generator to delegate to, its return value is the sub-process's
+        """
+        if self.fast_forward:
+            return generator
+        return self._wait(self.process(generator))
+
+    @staticmethod
+    def _wait(event: simpy.Event) -> Generator[simpy.Event, Any, Any]:
+        return (yield event)
+
+    def order_started(self):
+        """Count an order entering the system, waking processes waiting for orders"""
+        self.orders_in_system += 1
+        if self._orders_arrived is not None:
+            self._orders_arrived.succeed()
+            self._orders_arrived = None
+
+    def order_finished(self):
+        """Count an order leaving the system"""
+        self.orders_in_system -= 1
+
+    def orders_arrived(self) -> simpy.Event:
+        """
+        Event triggered once an order is in the system, immediately if there already is one. Lets periodic processes
+        sleep through idle stretches instead of waking up with nothing to do
+        """
+        if self.orders_in_system:
+            event = self.event()
+            event.succeed()
+            return event
+        if self._orders_arrived is None:
+            self._orders_arrived = self.event()
+        return self._orders_arrived
 
 
 class HubResource(simpy.Resource):
-    """Base class for hub resources using HubEnvironment for config and simulation monitoring"""
+    """
+    Base class for hub resources using HubEnvironment for config and simulation monitoring. If Config.RECORD_UTILIZATION
+    is set, every change of busy units or queue length is recorded to a usage.UsageRecorder in the DataMonitor
+    """
+
+    record_usage = True  # Subclasses with many instances (e.g. individual batteries) opt out
 
-    def __init__(self, env: HubEnvironment, capacity: Optional[int]):
+    def __init__(
+        self, env: HubEnvironment, capacity: Optional[int], name: Optional[str] = None, hub: Optional["Hub"] = None
+    ):
+        """
+        Args:
+            env: Simulation environment
+            capacity: Number of units
+            name: Name used for usage recording, defaults to the class name
+            hub: Hub owning the resource. Its config, monitor and name (random substream prefix) are used instead of
+                the environment's, so several hubs can share one environment (see network.HubNetwork)
+        """
         super().__init__(env, capacity=capacity)
         self.env = env
-        self.monitor = env.monitor
-        self.config = env.config
+        self.monitor = hub.monitor if hub is not None else env.monitor
+        self.config = hub.config if hub is not None else env.config
+        self.site: Optional[str] = hub.name if hub is not None else None
+        self.name = name or type(self).__name__
+
+        self.usage: Optional[UsageRecorder] = None
+        if self.record_usage and self.config.RECORD_UTILIZATION:
+            self.usage = self.monitor.add_usage_recorder(self.name)
+            self.usage.record(env.now, 0, 0, self._capacity)
+            self._trigger_put = self._recorded(self._trigger_put)  # type: ignore[assignment]
+            self._trigger_get = self._recorded(self._trigger_get)  # type: ignore[assignment]
+
+    def _recorded(self, trigger: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Wrap put/get trigger so resource state is recorded after requests and releases are processed"""
+        env, users, queue, record = self.env, self.users, self.put_queue, self.usage.record
+        last = [len(users), len(queue), self._capacity]
+
+        def recorded_trigger(event: Any):
+            trigger(event)
+            # Triggers run several times per request/release, only record when state actually changed
+            if len(users) != last[0] or len(queue) != last[1] or self._capacity != last[2]:
+                last[0], last[1], last[2] = len(users), len(queue), self._capacity
+                record(env._now, last[0], last[1], last[2])
+
+        return recorded_trigger
+
+    @property
+    def idle(self) -> int:
+        """Number of units neither in use nor reserved"""
+        return self._capacity - len(self.users)
+
+    def resize(self, capacity: int):
+        """
+        Change number of units, e.g. when drones are transferred between hubs. Units in use are never taken away, so
+        capacity can only be reduced by idle units. Added units are granted to waiting requests immediately
+        Args:
+            capacity: New number of units
+        """
+        if capacity < len(self.users):
+            raise ValueError(f"ERROR: Cannot resize {self.name} to {capacity}, {len(self.users)} units in use")
+        self._capacity = capacity
+        self._trigger_put(None)
 
 
 class HubStore(simpy.FilterStore):
-    def __init__(self, env: HubEnvironment, capacity: Optional[int]):
+    """
+    Base class for hub stores. If Config.RECORD_UTILIZATION is set, the number of items in the store and the number of
+    waiting get requests are recorded to a usage.UsageRecorder in the DataMonitor
+    """
+
+    record_usage = True
+
+    def __init__(
+        self, env: HubEnvironment, capacity: Optional[int], name: Optional[str] = None, hub: Optional["Hub"] = None
+    ):
         super().__init__(env, capacity=capacity)
         self.env = env
-        self.monitor = env.monitor
-        self.config = env.config
+        self.monitor = hub.monitor if hub is not None else env.monitor
+        self.config = hub.config if hub is not None else env.config
+        self.site: Optional[str] = hub.name if hub is not None else None
+        self.name = name or type(self).__name__
+
+        self.usage: Optional[UsageRecorder] = None
+        if self.record_usage and self.config.RECORD_UTILIZATION:
+            self.usage = self.monitor.add_usage_recorder(self.name)
+            self._last_state: Optional[tuple[int, int, int]] = None
+            self._record()
+            self._trigger_put = self._recorded(self._trigger_put)  # type: ignore[assignment]
+            self._trigger_get = self._recorded(self._trigger_get)  # type: ignore[assignment]
+
+    def _record(self):
+        """Record current store state if it changed, for subclasses that change items outside of put/get"""
+        if self.usage is not None:
+            state = (len(self.items), len(self.get_queue), self._capacity)
+            if state != self._last_state:
+                self._last_state = state
+                self.usage.record(self.env._now, *state)
+
+    def _recorded(self, trigger: Callable[[Any], Any]) -> Callable[[Any], Any]:
+        """Wrap put/get trigger so store state is recorded after puts and gets are processed"""
+
+        def recorded_trigger(event: Any):
+            trigger(event)
+            self._record()
+
+        return recorded_trigger
 
 
 class VerticalLift(HubResource):
     """Vertical lift modeled as a hub resource with capacity equal to number of working lifts at a Hub"""
 
-    def __init__(self, env: HubEnvironment):
-        super().__init__(env, env.config.NUM_LIFTS)
+    def __init__(self, env: HubEnvironment, hub: Optional["Hub"] = None):
+        config = hub.config if hub is not None else env.config
+        super().__init__(env, config.NUM_LIFTS, hub=hub)
 
 
 class SimpleBattery(HubResource):
-    """Batteries modeled as a simple resource with with capacity equal to number of batteries at a hub
-    TODO: Require 2 batteries per drone per mission
-    TODO: implement more complex battery operations processes
+    """Batteries modeled as a simple resource with with capacity equal to number of batteries at a hub. Used by the
+    binary battery model, Config.BATTERY_MODEL = "soc" takes BATTERIES_PER_MISSION batteries from
+    batteries.SocBatteryStore instead
     """
 
-    def __init__(self, env: HubEnvironment):
-        super().__init__(env, env.config.NUM_BATTERIES)
+    def __init__(self, env: HubEnvironment, hub: Optional["Hub"] = None):
+        config = hub.config if hub is not None else env.config
+        super().__init__(env, config.NUM_BATTERIES, hub=hub)
 
 
 class Drone(HubResource):
     """Drones modeled as a hub resource with capacity equal to number of drones at a Hub"""
 
-    def __init__(self, env: HubEnvironment):
-        super().__init__(env, env.config.NUM_DRONES)
+    def __init__(self, env: HubEnvironment, hub: Optional["Hub"] = None):
+        config = hub.config if hub is not None else env.config
+        super().__init__(env, config.NUM_DRONES, hub=hub)
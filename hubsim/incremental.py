@@ -0,0 +1,314 @@
+"""
+Incremental re-simulation. A hub delivers orders in two stages: the pick-pack stage (order arrivals, delivery specialist
+queue and pick-packing, Hub.prepare_order) and the flight stage (drone, pilot and battery queues and the flight,
+Hub.fly_order). The pick-pack stage never waits on the flight stage and draws from its own random substreams, so its
+results only depend on the settings in UPSTREAM_SETTINGS, the seed and the horizon. With an EMPLOYEE_ROSTER both stages
+draw on the same employees, so such runs are always simulated in full.
+
+IncrementalSimulator records the pick-pack stage of every full run. When a later configuration differs from a recorded
+one only in downstream settings (e.g. FLIGHT_INTERVAL or NUM_PILOTS, as when moving a slider in the app), the recorded
+orders are handed to the flight stage at the times they finished pick-packing and only the flight stage is simulated:
+
+    simulator = IncrementalSimulator()
+    monitor = simulator.run(Config(), until=720)  # Full run, pick-pack stage recorded
+    monitor = simulator.run(Config().replace(NUM_PILOTS=3), until=720)  # Flight stage only
+
+Replayed runs give the same pick-pack results as a full run, and in practice the same results order for order, since
+orders reach the flight stage at exactly the recorded times. This is not guaranteed: flight stage events at the same
+time as a hand-over may be processed in a different order than in a full run.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Generator, Optional
+
+import numpy as np
+
+from hubsim.background import DEFAULT_CHUNK, BackgroundRun, start
+from hubsim.cache import ResultCache, config_hash
+from hubsim.config import Config, DataMonitor, OrderView, StatusCode
+from hubsim.hub import Hub, HubEnvironment
+from hubsim.usage import UsageRecorder
+
+# Config settings the pick-pack stage depends on. Every other setting only affects the flight stage. RECORD_UTILIZATION
+# is included because the delivery specialist's usage is recorded with the stage
+UPSTREAM_SETTINGS = (
+    "ORDER_CREATION_INTERVAL",
+    "ORDER_ARRIVAL_RATES",
+    "PICK_PACK_INTERVAL",
+    "NUM_DELIVERY_SPECIALISTS",
+    "EMPLOYEE_ROSTER",
+    "RECORD_UTILIZATION",
+)
+
+# Order fields set by the pick-pack stage
+UPSTREAM_FIELDS = ("creation_time", "start_time", "pickpack_queue_duration", "pickpack_start_time", "pickpack_duration")
+
+_DOWNSTREAM = -1  # Status code of recorded orders that finished pick-packing, their status is set by the flight stage
+
+
+def upstream_key(config: Config, seed: int, until: float) -> str:
+    """Hash of everything the pick-pack stage depends on"""
+    upstream = Config().replace(**{name: getattr(config, name) for name in UPSTREAM_SETTINGS})
+    return config_hash(upstream, seed, until, stage="pick_pack")
+
+
+def changed_settings(old: Config, new: Config) -> set[str]:
+    """Names of settings that differ between two configurations"""
+    old_settings, new_settings = old.to_dict(), new.to_dict()
+    return {
+        name for name in old_settings.keys() | new_settings.keys() if old_settings.get(name) != new_settings.get(name)
+    }
+
+
+def invalidates_upstream(old: Config, new: Config) -> bool:
+    """Whether changing from old to new configuration requires simulating the pick-pack stage again"""
+    return not changed_settings(old, new).isdisjoint(UPSTREAM_SETTINGS)
+
+
+@dataclass
+class UpstreamRecord:
+    """Pick-pack stage results of a run: upstream fields of every order created before the horizon"""
+
+    times: np.ndarray  # (orders, UPSTREAM_FIELDS) in order creation order
+    status: np.ndarray  # Status at the horizon of orders still in the pick-pack stage, _DOWNSTREAM for the rest
+    ready_times: np.ndarray  # Time each order finished pick-packing, NaN for orders still in the stage at the horizon
+    specialist_usage: Optional[dict[str, np.ndarray]] = None  # DeliverySpecialist UsageRecorder arrays
+
+    @classmethod
+    def from_monitor(cls, monitor: DataMonitor, ready_times: Optional[dict[int, float]] = None) -> "UpstreamRecord":
+        """
+        Extract the pick-pack stage from a finished full run
+        Args:
+            monitor: Non-streaming monitor of a single hub run
+            ready_times: Exact pick-pack completion times by order id, see RecordingHub. Otherwise they are derived
+                from the float32 order log, which can shift them by rounding error
+
+        Returns: UpstreamRecord holding copies of the upstream columns
+        """
+        if monitor.streaming:
+            raise ValueError("ERROR: Streaming monitors keep no order records to replay")
+        times = np.column_stack([monitor.orders.column(name) for name in UPSTREAM_FIELDS])
+        finished = ~np.isnan(monitor.orders.column("pickpack_duration"))
+        status = np.where(finished, _DOWNSTREAM, monitor.orders.column("status")).astype(np.int8)
+        if ready_times is None:
+            ready = (
+                times[:, UPSTREAM_FIELDS.index("pickpack_start_time")]
+                + times[:, UPSTREAM_FIELDS.index("pickpack_duration")]
+            )
+            ready = ready.astype(float)
+        else:
+            ready = np.full(len(status), np.nan)
+            ready[list(ready_times)] = list(ready_times.values())
+        usage = monitor.utilization.get("DeliverySpecialist")
+        specialist_usage = {name: array.copy() for name, array in usage.to_arrays().items()} if usage else None
+        return cls(times, status, ready, specialist_usage)
+
+    def column(self, name: str) -> np.ndarray:
+        return self.times[:, UPSTREAM_FIELDS.index(name)]
+
+    @property
+    def nbytes(self) -> int:
+        return self.times.nbytes + self.status.nbytes + self.ready_times.nbytes
+
+
+class RecordingHub(Hub):
+    """Hub recording the exact time every order finishes the pick-pack stage, for UpstreamRecord.from_monitor()"""
+
+    def __init__(self, env: HubEnvironment, **kwargs: Any):
+        self.ready_times: dict[int, float] = {}
+        super().__init__(env, **kwargs)
+
+    def prepare_order(self, order: OrderView) -> Generator[Any, Any, Any]:
+        yield from super().prepare_order(order)
+        self.ready_times[order._id] = self.env.now
+
+
+def replay_orders(hub: Hub, record: UpstreamRecord) -> Generator[Any, Any, Any]:
+    """
+    Process handing recorded orders to the flight stage at the times they finished pick-packing. All recorded orders
+    are added to the order log at the start, in creation order, so order ids match a full run
+    Args:
+        hub: Hub created with generate_orders=False
+        record: Pick-pack stage results
+
+    Returns: Generator for order replay process
+    """
+    env, orders = hub.env, hub.monitor.orders
+    views = []
+    for row, status in zip(record.times.tolist(), record.status.tolist()):
+        order = orders.new()
+        for name, value in zip(UPSTREAM_FIELDS, row):
+            setattr(order, name, None if value != value else value)
+        order.status = status if status != _DOWNSTREAM else StatusCode.PREP
+        views.append(order)
+    hub.monitor.orders_created += len(views)
+
+    ready_times = record.ready_times
+    for _id in np.argsort(ready_times, kind="stable")[: int((~np.isnan(ready_times)).sum())].tolist():
+        ready = float(ready_times[_id])
+        if ready > env.now:
+            yield env.timeout(ready - env.now)
+        hub.orders_in_system += 1  # Counted from the end of pick-packing
+        env.order_started()
+        env.process(hub.fly_order(views[_id]))
+
+
+def replay(record: UpstreamRecord, config: Config, until: float, seed: int, fast_forward: bool = False) -> DataMonitor:
+    """
+    Simulate only the flight stage of a hub, fed by recorded pick-pack stage results
+    Args:
+        record: Pick-pack stage results recorded with the same UPSTREAM_SETTINGS, seed and horizon
+        config: Hub configuration
+        until: Simulation horizon in minutes
+        seed: Simulation seed
+        fast_forward: Run the environment in fast-forward mode, see HubEnvironment
+
+    Returns: DataMonitor of the simulation
+    """
+    env = HubEnvironment(config, DataMonitor(), seed=seed, fast_forward=fast_forward)
+    hub = Hub(env, generate_orders=False)
+    env.process(replay_orders(hub, record))
+    env.run(until=until)
+    if record.specialist_usage is not None and "DeliverySpecialist" in env.monitor.utilization:
+        env.monitor.utilization["DeliverySpecialist"] = UsageRecorder.from_arrays(
+            "DeliverySpecialist", record.specialist_usage
+        )
+    return env.monitor
+
+
+class IncrementalSimulator:
+    """
+    Hub simulations that reuse the pick-pack stage of earlier runs when only downstream settings change. Complete
+    results are kept in a ResultCache, pick-pack stage records in a small in-memory LRU. One simulator can be shared
+    between threads, e.g. app sessions and their background runs: records, cache and counters are guarded by a lock,
+    simulations run outside of it
+    """
+
+    def __init__(self, cache: Optional[ResultCache] = None, max_records: int = 16):
+        """
+        Args:
+            cache: Cache of complete results, defaults to a memory-only ResultCache
+            max_records: Number of pick-pack stage records kept
+        """
+        self.cache = cache if cache is not None else ResultCache(directory=None)
+        self.max_records = max_records
+        self._records: OrderedDict[str, UpstreamRecord] = OrderedDict()
+        self.full_runs = 0
+        self.replays = 0
+        self._lock = threading.RLock()
+
+    def record(self, config: Config, until: float, seed: int) -> Optional[UpstreamRecord]:
+        """Recorded pick-pack stage for a configuration, seed and horizon. None if not recorded or not replayable"""
+        if config.EMPLOYEE_ROSTER is not None:
+            return None
+        key = upstream_key(config, seed, until)
+        with self._lock:
+            if key in self._records:
+                self._records.move_to_end(key)
+            return self._records.get(key)
+
+    def _remember(self, key: str, record: UpstreamRecord):
+        with self._lock:
+            self._records[key] = record
+            self._records.move_to_end(key)
+            while len(self._records) > self.max_records:
+                self._records.popitem(last=False)
+
+    def run(self, config: Config, until: float, seed: Optional[int] = None) -> DataMonitor:
+        """
+        Get a simulation result: from the cache, by replaying a recorded pick-pack stage, or by a full run
+        Args:
+            config: Hub configuration
+            until: Simulation horizon in minutes
+            seed: Simulation seed. If None, Config.SEED is used unless randomized, in which case the run is neither
+                cached nor recorded
+
+        Returns: DataMonitor of the simulation. Cached monitors are shared, treat as read-only
+        """
+        if seed is None and config.RANDOM is False:
+            seed = config.SEED
+        if seed is None:
+            return self.cache.run(config, until)
+
+        key = config_hash(config, seed, until)
+        with self._lock:
+            monitor = self.cache.get(key)
+        if monitor is not None:
+            return monitor
+
+        record = self.record(config, until, seed)
+        if record is not None:
+            monitor = replay(record, config, until, seed)  # Records are never modified, replays can run concurrently
+            with self._lock:
+                self.replays += 1
+                self.cache.put(key, monitor)
+            return monitor
+
+        env, finish = self._full_run(config, until, seed)
+        env.run(until=until)
+        finish(env.monitor)
+        return env.monitor
+
+    def _full_run(
+        self, config: Config, until: float, seed: int
+    ) -> tuple[HubEnvironment, Callable[[DataMonitor], None]]:
+        """Environment for a full run, and the callback storing its result and pick-pack stage once it is finished"""
+        env = HubEnvironment(config, DataMonitor(), seed=seed)
+        hub = RecordingHub(env)
+
+        def finish(monitor: DataMonitor):
+            record = UpstreamRecord.from_monitor(monitor, hub.ready_times) if config.EMPLOYEE_ROSTER is None else None
+            with self._lock:
+                if record is not None:
+                    self._remember(upstream_key(config, seed, until), record)
+                self.full_runs += 1
+                self.cache.put(config_hash(config, seed, until), monitor)
+
+        return env, finish
+
+    def start(
+        self, config: Config, until: float, seed: Optional[int] = None, chunk: float = DEFAULT_CHUNK
+    ) -> BackgroundRun:
+        """
+        Like run(), but full runs are simulated in the background with progressive snapshots, see
+        background.BackgroundRun. Cached results and replays are quick and come back as finished runs
+        Args:
+            config: Hub configuration
+            until: Simulation horizon in minutes
+            seed: Simulation seed, see run()
+            chunk: Simulated minutes between snapshots
+
+        Returns: Started or finished BackgroundRun. A full run's result is stored once it reaches the horizon
+        """
+        if seed is None and config.RANDOM is False:
+            seed = config.SEED
+        if seed is None:
+            return start(config, until, chunk=chunk)
+        with self._lock:
+            known = self.cache.get(config_hash(config, seed, until)) is not None or self.record(config, until, seed)
+        if known:
+            return BackgroundRun.finished(self.run(config, until, seed), until)
+
+        env, finish = self._full_run(config, until, seed)
+        return BackgroundRun(env, until, chunk, on_finish=finish).start()
+
+
+if __name__ == "__main__":
+    import time
+
+    simulator = IncrementalSimulator()
+    base = Config().replace(
+        ORDER_CREATION_INTERVAL=(4, 8),
+        NUM_DELIVERY_SPECIALISTS=3,
+        NUM_PILOTS=4,
+        NUM_DRONES=5,
+        NUM_BATTERIES=20,
+        NUM_CHARGERS=8,
+    )
+    for overrides in ({}, {"NUM_PILOTS": 3}, {"FLIGHT_INTERVAL": (5, 8)}, {"PICK_PACK_INTERVAL": (5, 20)}):
+        began = time.perf_counter()
+        result = simulator.run(base.replace(**overrides), until=7 * 24 * 60)
+        print(f"{str(overrides):<32} {time.perf_counter() - began:6.3f}s  mean wait {result.wait_times.mean():.1f} min")
+    print(f"Full runs: {simulator.full_runs}, replays: {simulator.replays}")
@@ -0,0 +1,439 @@
+"""
+Multi-hub network simulation. Many Hub objects share one HubEnvironment (one event heap and clock). A regional order
+generator routes each order to a hub, and a rebalancer moves idle drones and charged batteries from hubs with spare
+units to hubs where requests are waiting.
+
+Kept cheap enough for 50+ hubs over a week: one arrival process per region instead of one per hub, order locations and
+routing distances drawn in NumPy blocks, rebalancing vectorized over the hubs of a region, and every hub and region
+drawing from its own named random substreams. Regions never exchange orders or units, so independent regions can be
+partitioned across worker processes with run_partitioned() and give the same results as one shared environment.
+"""
+
+import functools
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Generator, Iterator, Optional, Sequence, Union
+
+import numpy as np
+from simpy import Timeout
+
+from hubsim.arrivals import poisson_arrivals
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub
+from hubsim.hub_resources import HubEnvironment
+from hubsim.replications import submit
+from hubsim.samplers import DEFAULT_BLOCK_SIZE
+from hubsim.streams import DEMAND, ORDERS, substream
+
+ROUTING_POLICIES = ("nearest", "least_loaded")
+TRANSFER_RESOURCES = ("drone", "battery")  # Hub attributes of resources that can move between hubs
+
+
+@dataclass
+class HubSite:
+    """Location (km) and configuration of a hub in a network"""
+
+    name: str
+    x: float
+    y: float
+    config: Optional[Config] = None  # Defaults to the environment's config
+    demand: float = 1.0  # Relative share of the region's orders originating around this hub
+
+
+@dataclass
+class Region:
+    """Group of hubs sharing demand and units. Orders and transfers never cross regions"""
+
+    name: str
+    sites: list[HubSite]
+    orders_per_hour: Union[float, Sequence[float]]  # Constant, or one rate per hour of the day
+    demand_spread: float = 3.0  # Standard deviation (km) of order locations around their hub site
+    service_radius: float = 10.0  # Hubs considered by least_loaded routing (km)
+
+
+@dataclass
+class Transfer:
+    """Units moved between hubs"""
+
+    resource: str
+    source: str
+    destination: str
+    units: int
+    departure_time: float
+    arrival_time: float
+
+
+@dataclass
+class HubResult:
+    """Summary metrics of one hub in a network run"""
+
+    name: str
+    region: str
+    orders_created: int
+    orders_delivered: int
+    mean_wait: float
+    drones: int
+    batteries: int
+
+
+@dataclass
+class NetworkResult:
+    """Summary metrics of a network run, small enough to send back from workers"""
+
+    seed: int
+    until: float
+    hubs: list[HubResult] = field(default_factory=list)
+    transfers: int = 0
+
+    @property
+    def orders_created(self) -> int:
+        return sum(hub.orders_created for hub in self.hubs)
+
+    @property
+    def orders_delivered(self) -> int:
+        return sum(hub.orders_delivered for hub in self.hubs)
+
+
+def grid_region(
+    name: str,
+    rows: int,
+    cols: int,
+    spacing: float = 8.0,
+    orders_per_hour_per_hub: float = 2.0,
+    config: Optional[Config] = None,
+) -> Region:
+    """
+    Region with hubs on a regular grid, e.g. for benchmarks and what-if studies
+    Args:
+        name: Name of region, hub names are "<name>-<row>-<col>"
+        rows: Number of grid rows
+        cols: Number of grid columns
+        spacing: Distance between neighboring hubs in km
+        orders_per_hour_per_hub: Regional order rate divided by number of hubs
+        config: Configuration of every hub, defaults to the environment's
+
+    Returns: Region
+    """
+    sites = [HubSite(f"{name}-{r}-{c}", c * spacing, r * spacing, config) for r in range(rows) for c in range(cols)]
+    return Region(name, sites, orders_per_hour_per_hub * len(sites))
+
+
+def _mean_wait(monitor: DataMonitor) -> float:
+    if monitor.streaming:
+        stats = monitor.stages["total_duration"].stats
+        return stats.mean if stats.count else math.nan
+    wait_times = monitor.wait_times
+    return float(wait_times.mean()) if len(wait_times) else math.nan
+
+
+class HubNetwork:
+    """Hubs of one or more regions sharing a HubEnvironment, with order routing and cross-hub transfers"""
+
+    def __init__(
+        self,
+        env: HubEnvironment,
+        regions: list[Region],
+        routing: str = "nearest",
+        rebalance_interval: Optional[float] = 15.0,
+        transfer_speed: float = 1.0,
+        max_transfer_distance: float = 25.0,
+        min_idle: int = 1,
+        streaming: bool = False,
+    ):
+        """
+        Args:
+            env: Simulation environment shared by all hubs
+            regions: Regions to simulate, hub names must be unique across regions
+            routing: "nearest" sends orders to the closest hub, "least_loaded" to the hub with fewest orders in the
+                system within the region's service radius (closest hub if none is in range)
+            rebalance_interval: Minutes between checks for units to transfer, None disables transfers
+            transfer_speed: Travel speed of transferred units in km per minute
+            max_transfer_distance: Units are only moved between hubs closer than this (km)
+            min_idle: Idle units a hub keeps when giving units to others
+            streaming: Give every hub a streaming DataMonitor (bounded memory for long runs)
+        """
+        if routing not in ROUTING_POLICIES:
+            raise ValueError(f"ERROR: Unknown routing policy {routing!r}, expected one of {ROUTING_POLICIES}")
+        self.env = env
+        self.regions = regions
+        self.routing = routing
+        self.rebalance_interval = rebalance_interval
+        self.transfer_speed = transfer_speed
+        self.max_transfer_distance = max_transfer_distance
+        self.min_idle = min_idle
+
+        self.hubs: dict[str, Hub] = {}
+        self.region_hubs: dict[str, list[Hub]] = {}
+        self.transfers: list[Transfer] = []
+        self._inbound: dict[tuple[str, str], int] = {}  # Units in transit per (hub, resource)
+
+        for region in regions:
+            hubs = []
+            for site in region.sites:
+                if site.name in self.hubs:
+                    raise ValueError(f"ERROR: Duplicate hub name {site.name!r}")
+                hub = Hub(env, site.name, site.config, DataMonitor(streaming=streaming), generate_orders=False)
+                self.hubs[site.name] = hub
+                hubs.append(hub)
+            self.region_hubs[region.name] = hubs
+
+            coords = np.array([(site.x, site.y) for site in region.sites], dtype=float)
+            self.env.process(self.generate_orders(region, hubs, coords))
+            if rebalance_interval and len(hubs) > 1:
+                distances = np.hypot(*(coords[:, None, :] - coords[None, :, :]).transpose(2, 0, 1))
+                self.env.process(self.rebalance(hubs, distances))
+
+    def __repr__(self):
+        return f"HubNetwork(regions={len(self.regions)}, hubs={len(self.hubs)}, routing={self.routing!r})"
+
+    def _routes(self, region: Region, coords: np.ndarray, demand: np.random.Generator, size: int) -> list[list[int]]:
+        """
+        Draw a block of order locations and rank candidate hubs for each
+        Returns: Per order, indices of candidate hubs sorted by distance (only the nearest for nearest routing)
+        """
+        weights = np.array([site.demand for site in region.sites], dtype=float)
+        origins = demand.choice(len(coords), size=size, p=weights / weights.sum())
+        points = coords[origins] + demand.normal(0.0, region.demand_spread, size=(size, 2))
+        distances = np.hypot(*(points[:, None, :] - coords[None, :, :]).transpose(2, 0, 1))
+
+        if self.routing == "nearest":
+            return [[k] for k in distances.argmin(axis=1).tolist()]
+        ranked = np.argsort(distances, axis=1)
+        in_range = np.take_along_axis(distances, ranked, axis=1) <= region.service_radius
+        in_range[:, 0] = True  # Always consider the closest hub
+        return [row[mask].tolist() for row, mask in zip(ranked, in_range)]
+
+    def _route_stream(self, region: Region, coords: np.ndarray) -> Iterator[list[int]]:
+        """Endless candidate hub lists, one per order, drawn a block at a time. Blocks are discarded on reseed"""
+        streams = self.env.rng
+        while True:
+            epoch = streams.epoch
+            for route in self._routes(
+                region, coords, streams.generator(substream(region.name, DEMAND)), DEFAULT_BLOCK_SIZE
+            ):
+                yield route
+                if streams.epoch != epoch:
+                    break
+
+    def generate_orders(self, region: Region, hubs: list[Hub], coords: np.ndarray) -> Generator[Timeout, Any, Any]:
+        """
+        Poisson order arrivals (constant or hour-of-day rates) for a region, each routed to one of its hubs
+        Args:
+            region: Region generating orders
+            hubs: Hubs of the region, in order of region.sites
+            coords: Hub locations, in order of region.sites
+
+        Returns: Generator for regional order creation process
+        """
+        arrivals = poisson_arrivals(region.orders_per_hour, self.env.rng, substream(region.name, ORDERS))
+        for time, candidates in zip(arrivals, self._route_stream(region, coords)):
+            yield self.env.timeout(time - self.env.now)
+            if len(candidates) == 1:
+                hubs[candidates[0]].place_order()
+            else:
+                # min() keeps the first of equally loaded hubs, which is the closest
+                min((hubs[k] for k in candidates), key=lambda hub: hub.orders_in_system).place_order()
+
+    @staticmethod
+    def _units(hub: Hub, kind: str) -> tuple[int, int]:
+        """Units requested but not available, and idle units, of a hub resource"""
+        if kind == "battery" and hub.battery is None:  # State of charge model, charged batteries wait in the store
+            store = hub.battery_store
+            charged = len(store.deploy_queue)
+            return max(store.waiting - charged, 0), charged
+        resource = getattr(hub, kind)
+        return len(resource.queue), resource.idle
+
+    def rebalance(self, hubs: list[Hub], distances: np.ndarray) -> Generator[Timeout, Any, Any]:
+        """
+        Periodically move idle units to hubs where requests for them are waiting, from the closest hubs first.
+        Batteries move with the binary model's SimpleBattery capacity and BatteryStore contents, or as charged
+        batteries between state of charge stores. They do not move between hubs using different battery models
+        Args:
+            hubs: Hubs of a region
+            distances: Distance matrix between the hubs (km)
+
+        Returns: Generator for rebalancing process
+        """
+        reachable = distances <= self.max_transfer_distance
+        np.fill_diagonal(reachable, False)
+        # Batteries of the binary and state of charge models are different objects, they only move within one model
+        soc = np.array([hub.battery is None for hub in hubs])
+        battery_reachable = reachable & (soc[:, None] == soc[None, :])
+        while True:
+            yield self.env.timeout(self.rebalance_interval)
+            if self.env.fast_forward and not self.env.orders_in_system:
+                # Nothing can be waiting for units, sleep until the next order instead of checking every interval
+                yield self.env.orders_arrived()
+                continue
+            for kind in TRANSFER_RESOURCES:
+                counts = [self._units(hub, kind) for hub in hubs]
+                need = np.array(
+                    [waiting - self._inbound.get((hub.name, kind), 0) for hub, (waiting, _) in zip(hubs, counts)]
+                )
+                if not (need > 0).any():
+                    continue
+                spare = np.array([idle - self.min_idle for _, idle in counts]).clip(min=0)
+                spare[need > 0] = 0
+                kind_reachable = battery_reachable if kind == "battery" else reachable
+
+                for d in np.argsort(-need, kind="stable"):
+                    if need[d] <= 0:
+                        break
+                    while need[d] > 0:
+                        donors = np.flatnonzero(kind_reachable[d] & (spare > 0))
+                        if not donors.size:
+                            break
+                        s = donors[distances[d, donors].argmin()]
+                        units = int(min(need[d], spare[s]))
+                        moved, batteries = self.depart(kind, hubs[s], hubs[d], units)
+                        need[d] -= moved
+                        spare[s] = spare[s] - units if moved == units else 0  # Source ran out of charged batteries
+                        if moved:
+                            self.env.process(
+                                self.transfer(kind, hubs[s], hubs[d], moved, float(distances[s, d]), batteries)
+                            )
+
+    def depart(self, kind: str, source: Hub, destination: Hub, units: int) -> tuple[int, list[Any]]:
+        """
+        Take idle units of a resource out of the source hub right away, before a request granted at the same time can
+        use them. Battery transfers also take charged batteries from the source's BatteryStore, and only as many units
+        leave as there are charged batteries
+        Args:
+            kind: Hub resource attribute, one of TRANSFER_RESOURCES
+            source: Hub giving units
+            destination: Hub receiving units
+            units: Number of idle units to move
+
+        Returns: Number of units that left and the batteries travelling with them
+        """
+        batteries = []
+        if kind == "battery":
+            batteries = [b for b in (source.battery_store.remove_charged() for _ in range(units)) if b is not None]
+            units = len(batteries)
+        source_resource = getattr(source, kind)
+        if source_resource is not None:  # None for state of charge batteries, which only live in the store
+            source_resource.resize(source_resource.capacity - units)
+        key = (destination.name, kind)
+        self._inbound[key] = self._inbound.get(key, 0) + units
+        return units, batteries
+
+    def transfer(
+        self, kind: str, source: Hub, destination: Hub, units: int, distance: float, batteries: Sequence[Any] = ()
+    ) -> Generator[Timeout, Any, Any]:
+        """
+        Move units that left the source with depart() to the destination, where they join after travelling
+        Args:
+            kind: Hub resource attribute, one of TRANSFER_RESOURCES
+            source: Hub giving units
+            destination: Hub receiving units
+            units: Number of units, as returned by depart()
+            distance: Distance between hubs (km)
+            batteries: Charged batteries taken from the source's BatteryStore by depart()
+
+        Returns: Generator for transfer process
+        """
+        destination_resource = getattr(destination, kind)
+        key = (destination.name, kind)
+        departure_time = self.env.now
+        yield self.env.timeout(distance / self.transfer_speed)
+
+        self._inbound[key] -= units
+        if destination_resource is not None:
+            destination_resource.resize(destination_resource.capacity + units)
+        for battery in batteries:
+            destination.battery_store.add(battery)
+        self.transfers.append(Transfer(kind, source.name, destination.name, units, departure_time, self.env.now))
+
+    def result(self, seed: int, until: float) -> NetworkResult:
+        """Summary metrics per hub"""
+        result = NetworkResult(seed, until, transfers=len(self.transfers))
+        for region in self.regions:
+            for hub in self.region_hubs[region.name]:
+                result.hubs.append(
+                    HubResult(
+                        name=hub.name,
+                        region=region.name,
+                        orders_created=hub.monitor.orders_created,
+                        orders_delivered=hub.monitor.orders_delivered,
+                        mean_wait=_mean_wait(hub.monitor),
+                        drones=hub.drone.capacity,
+                        batteries=len(hub.battery_store.batteries) if hub.battery is None else hub.battery.capacity,
+                    )
+                )
+        return result
+
+
+def run_network(
+    regions: list[Region],
+    until: float,
+    config: Optional[Config] = None,
+    seed: int = 0,
+    fast_forward: bool = False,
+    **network_args: Any,
+) -> NetworkResult:
+    """
+    Run regions in one shared environment. Top-level function so it can be sent to worker processes
+    Args:
+        regions: Regions to simulate
+        until: Simulation horizon in minutes
+        config: Configuration of hubs without their own, defaults to Config()
+        seed: Seed of the environment
+        fast_forward: Run the environment in fast-forward mode, see HubEnvironment
+        **network_args: Passed to HubNetwork
+
+    Returns: NetworkResult
+    """
+    env = HubEnvironment(config or Config(), DataMonitor(), seed=seed, fast_forward=fast_forward)
+    network = HubNetwork(env, regions, **network_args)
+    env.run(until=until)
+    return network.result(seed, until)
+
+
+def run_partitioned(
+    regions: list[Region],
+    until: float,
+    config: Optional[Config] = None,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    **network_args: Any,
+) -> NetworkResult:
+    """
+    Run independent regions in parallel, one environment per region. Every region draws from its own named
+    substreams, so results match run_network() with the same seed
+    Args:
+        regions: Regions to simulate
+        until: Simulation horizon in minutes
+        config: Configuration of hubs without their own, defaults to Config()
+        seed: Seed shared by all regions
+        max_workers: Worker processes, defaults to the number of CPUs. Use 1 to run in-process
+        **network_args: Passed to run_network() and HubNetwork, e.g. fast_forward or routing
+
+    Returns: NetworkResult with hubs in order of regions
+    """
+    pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+    try:
+        futures = {
+            submit(pool, functools.partial(run_network, **network_args), [region], until, config, seed): i
+            for i, region in enumerate(regions)
+        }
+        region_results: list[Optional[NetworkResult]] = [None] * len(regions)
+        for future in as_completed(futures):
+            region_results[futures[future]] = future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    result = NetworkResult(seed, until)
+    for region_result in region_results:
+        result.hubs.extend(region_result.hubs)
+        result.transfers += region_result.transfers
+    return result
+
+
+if __name__ == "__main__":
+    network_regions = [grid_region(f"region{i}", 5, 5) for i in range(2)]
+    network_result = run_partitioned(network_regions, until=7 * 24 * 60, routing="least_loaded")
+    print(f"Hubs: {len(network_result.hubs)}, transfers: {network_result.transfers}")
+    print(f"Orders created: {network_result.orders_created}, delivered: {network_result.orders_delivered}")
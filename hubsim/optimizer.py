@@ -0,0 +1,230 @@
+"""
+Staffing optimizer. Searches the discrete resource space (pilots, delivery specialists, drones, batteries, chargers)
+for the cheapest configuration meeting a service level on order duration, e.g. "95th percentile of
+Order.total_duration under 45 min".
+
+Search is greedy marginal allocation, the classic heuristic for staffing problems. Starting from the lower bounds, one
+unit of the resource with the best improvement per unit cost is added until the service level is met. The best
+addition is picked with successive halving, which replicates all candidates a little and gives more replications only
+to the most promising half each round. A final pass removes units that are not needed. Each step costs a few
+replications per resource instead of a grid over the whole space.
+"""
+
+import math
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Optional
+
+from hubsim.config import Config
+from hubsim.replications import (
+    ConfidenceInterval,
+    ReplicationResult,
+    confidence_interval,
+    run_replication,
+    submit,
+)
+from hubsim.sweep import RESOURCE_FIELDS, resource_cost
+
+
+@dataclass
+class ServiceLevel:
+    """
+    Target on a quantile of Order.total_duration, in minutes. A profile meets it when the upper confidence bound of the
+    quantile's mean across replications is below threshold
+    """
+
+    quantile: float = 0.95
+    threshold: float = 45.0
+
+    def __str__(self):
+        return f"p{self.quantile * 100:g} total duration < {self.threshold:g} min"
+
+
+@dataclass
+class OptimizationResult:
+    """Best configuration found and the evidence for it"""
+
+    resources: dict[str, int]
+    cost: float
+    metric: ConfidenceInterval
+    meets_target: bool
+    replications_run: int
+    history: list[tuple[dict[str, int], float]] = field(default_factory=list)
+
+
+class StaffingOptimizer:
+    """Evaluates candidate resource profiles with replications, reusing results of profiles seen before"""
+
+    def __init__(
+        self,
+        base_config: Config,
+        target: ServiceLevel,
+        bounds: Optional[dict[str, tuple[int, int]]] = None,
+        costs: Optional[dict[str, float]] = None,
+        until: float = 12 * 60,
+        seed: int = 0,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            base_config: Configuration for everything but the resources being searched
+            target: Service level to meet
+            bounds: Inclusive (min, max) count per resource field, defaults to (1, 10) for every field in
+                sweep.RESOURCE_FIELDS. Fields not given are fixed at their base_config value
+            costs: Cost per unit of each resource field, 1.0 for fields not given
+            until: Simulation horizon in minutes
+            seed: Base seed, replication i of every profile uses seed + i (common random numbers)
+            max_workers: Worker processes, defaults to the number of CPUs. Use 1 to run in-process
+        """
+        self.base_config = base_config
+        self.target = target
+        self.bounds = bounds if bounds is not None else {name: (1, 10) for name in RESOURCE_FIELDS}
+        self.costs = costs or {}
+        self.until = until
+        self.seed = seed
+        self.max_workers = max_workers
+        self._results: dict[tuple[int, ...], list[ReplicationResult]] = {}
+
+    @property
+    def replications_run(self) -> int:
+        return sum(len(results) for results in self._results.values())
+
+    def _key(self, resources: dict[str, int]) -> tuple[int, ...]:
+        return tuple(resources[name] for name in self.bounds)
+
+    def _config(self, resources: dict[str, int]) -> Config:
+        return self.base_config.replace(**resources)
+
+    def cost(self, resources: dict[str, int]) -> float:
+        return resource_cost(self._config(resources), self.costs)
+
+    def metric(self, resources: dict[str, int]) -> ConfidenceInterval:
+        """Confidence interval of the target quantile across replications run so far (inf if nothing delivered)"""
+        values = [r.wait_quantiles.get(self.target.quantile, math.inf) for r in self._results[self._key(resources)]]
+        if not all(math.isfinite(value) for value in values):  # A replication without deliveries fails the target
+            return ConfidenceInterval(math.inf, math.inf, 0.95, len(values))
+        return confidence_interval(values)
+
+    def evaluate(self, profiles: list[dict[str, int]], replications: int, pool: Optional[ProcessPoolExecutor]):
+        """
+        Make sure every profile has at least the given number of replications, running only the missing ones
+        Args:
+            profiles: Resource profiles to evaluate
+            replications: Minimum number of replications per profile
+            pool: Process pool, None to run in-process
+        """
+        futures = {}
+        for resources in profiles:
+            results = self._results.setdefault(self._key(resources), [])
+            config = self._config(resources)
+            for i in range(len(results), replications):
+                future = submit(pool, run_replication, config, self.seed + i, self.until, (self.target.quantile,))
+                futures[future] = results
+        for future in as_completed(futures):
+            futures[future].append(future.result())
+
+    def _select(
+        self, current: dict[str, int], candidates: list[dict[str, int]], pool: Optional[ProcessPoolExecutor]
+    ) -> dict[str, int]:
+        """Successive halving over candidate additions, scored by metric improvement per unit of added cost"""
+        base_cost = self.cost(current)
+        replications = 2
+        while True:
+            self.evaluate([current] + candidates, replications, pool)
+            base = self.metric(current).mean
+
+            def score(resources: dict[str, int]) -> float:
+                improvement = base - self.metric(resources).mean
+                if math.isnan(improvement):  # inf - inf, neither delivers anything
+                    improvement = 0.0
+                return improvement / max(self.cost(resources) - base_cost, 1e-9)
+
+            candidates = sorted(candidates, key=score, reverse=True)
+            if len(candidates) == 1:
+                return candidates[0]
+            candidates = candidates[: math.ceil(len(candidates) / 2)]
+            replications *= 2
+
+    def _meets(self, resources: dict[str, int]) -> bool:
+        # Upper confidence bound, so a profile whose mean only happens to fall below the threshold does not pass
+        return self.metric(resources).upper < self.target.threshold
+
+    def run(self, replications: int = 10, start: Optional[dict[str, int]] = None) -> OptimizationResult:
+        """
+        Search for the cheapest resource profile meeting the target
+        Args:
+            replications: Replications used to confirm a profile meets the target
+            start: Profile to start adding resources from, defaults to the lower bounds. E.g.
+                queueing.stable_resources() skips profiles that clearly cannot keep up, the final pass still removes
+                units that are not needed
+
+        Returns: OptimizationResult for the best profile found
+        """
+        history = []
+        current = {name: low for name, (low, _) in self.bounds.items()}
+        if start is not None:
+            current.update({name: start[name] for name in current if name in start})
+
+        pool = ProcessPoolExecutor(max_workers=self.max_workers) if self.max_workers != 1 else None
+        try:
+            # Add resources with the best marginal return until the target is met with full replications
+            while True:
+                self.evaluate([current], replications, pool)
+                history.append((dict(current), self.metric(current).mean))
+                if self._meets(current):
+                    break
+
+                candidates = [
+                    {**current, name: current[name] + 1}
+                    for name, (_, high) in self.bounds.items()
+                    if current[name] < high
+                ]
+                if not candidates:
+                    break
+                current = self._select(current, candidates, pool)
+
+            # Remove units that are not needed, most expensive resources first
+            if self._meets(current):
+                for name in sorted(self.bounds, key=lambda n: self.costs.get(n, 1.0), reverse=True):
+                    while current[name] > self.bounds[name][0]:
+                        reduced = {**current, name: current[name] - 1}
+                        self.evaluate([reduced], replications, pool)
+                        if not self._meets(reduced):
+                            break
+                        current = reduced
+                        history.append((dict(current), self.metric(current).mean))
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        return OptimizationResult(
+            resources=current,
+            cost=self.cost(current),
+            metric=self.metric(current),
+            meets_target=self._meets(current),
+            replications_run=self.replications_run,
+            history=history,
+        )
+
+
+def optimize_staffing(
+    base_config: Config,
+    target: ServiceLevel,
+    bounds: Optional[dict[str, tuple[int, int]]] = None,
+    costs: Optional[dict[str, float]] = None,
+    until: float = 12 * 60,
+    replications: int = 10,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+) -> OptimizationResult:
+    """Find the cheapest resource profile meeting a service level, see StaffingOptimizer for arguments"""
+    optimizer = StaffingOptimizer(base_config, target, bounds, costs, until, seed, max_workers)
+    return optimizer.run(replications)
+
+
+if __name__ == "__main__":
+    result = optimize_staffing(Config(), ServiceLevel(0.95, 45.0))
+    print(f"Target: {ServiceLevel(0.95, 45.0)}")
+    print(f"Resources: {result.resources} (cost {result.cost:g}, meets target: {result.meets_target})")
+    print(f"p95 total duration: {result.metric}")
+    print(f"Replications run: {result.replications_run}")
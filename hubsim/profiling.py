@@ -0,0 +1,104 @@
+"""
+Opt-in event loop instrumentation for HubEnvironment. Counts events and measures wall time per process generator
+(deliver_order, pick_pack, flight, _run_chargers, run_battery_store, ...), samples the event heap size over time,
+and exports folded stacks that flamegraph.pl and speedscope can read.
+
+Enable with HubEnvironment(config, monitor, profile=True). When disabled nothing is wrapped, so there is no overhead.
+"""
+
+import time
+from array import array
+from collections import defaultdict
+from typing import TYPE_CHECKING, Callable, Union
+
+import numpy as np
+from simpy.events import Process
+
+if TYPE_CHECKING:
+    from hubsim.hub_resources import HubEnvironment
+
+
+def event_label(event) -> tuple[str, str]:
+    """
+    Name of the process resumed by an event and the event type, used to attribute the cost of processing it
+    Args:
+        event: simpy event about to be processed
+
+    Returns: (process generator name, event class name). Process name is "<internal>" if no process is resumed
+    """
+    for callback in event.callbacks or ():
+        owner = getattr(callback, "__self__", None)
+        if isinstance(owner, Process):
+            return owner._generator.__name__, type(event).__name__
+    return "<internal>", type(event).__name__
+
+
+class EventProfiler:
+    """Wraps HubEnvironment.step() to record per-process event counts, wall time and heap size"""
+
+    def __init__(self, env: "HubEnvironment", sample_every: int = 100):
+        """
+        Args:
+            env: Environment to instrument, its step() is replaced on the instance
+            sample_every: Record heap size every this many events
+        """
+        self.env = env
+        self.sample_every = sample_every
+        self.counts: defaultdict[tuple[str, str], int] = defaultdict(int)
+        self.wall_time: defaultdict[tuple[str, str], float] = defaultdict(float)
+        self.events = 0
+        self._heap_times = array("d")
+        self._heap_sizes = array("l")
+        self._step: Callable[[], None] = env.step
+        env.step = self.step  # type: ignore[assignment]
+
+    def step(self):
+        queue = self.env._queue
+        key = event_label(queue[0][3]) if queue else ("<internal>", "EmptySchedule")
+
+        start = time.perf_counter()
+        try:
+            self._step()
+        finally:
+            self.wall_time[key] += time.perf_counter() - start
+            self.counts[key] += 1
+            self.events += 1
+            if self.events % self.sample_every == 0:
+                self._heap_times.append(self.env.now)
+                self._heap_sizes.append(len(queue))
+
+    def detach(self):
+        """Restore the environment's original step()"""
+        self.env.step = self._step  # type: ignore[assignment]
+
+    @property
+    def heap_sizes(self) -> tuple[np.ndarray, np.ndarray]:
+        """Simulation times and event heap sizes sampled during the run"""
+        return np.frombuffer(self._heap_times, dtype=float), np.frombuffer(self._heap_sizes, dtype=np.int_)
+
+    def by_process(self) -> dict[str, tuple[int, float]]:
+        """Event count and wall time (seconds) per process generator, most expensive first"""
+        totals: defaultdict[str, list[Union[int, float]]] = defaultdict(lambda: [0, 0.0])
+        for (process, event), count in self.counts.items():
+            totals[process][0] += count
+            totals[process][1] += self.wall_time[(process, event)]
+        return {k: (int(v[0]), float(v[1])) for k, v in sorted(totals.items(), key=lambda kv: -kv[1][1])}
+
+    def summary(self) -> str:
+        """Table of events and wall time per process generator"""
+        total_time = sum(self.wall_time.values()) or 1.0
+        lines = [f"{'process':<24} {'events':>10} {'time (ms)':>10} {'share':>7}"]
+        for process, (count, seconds) in self.by_process().items():
+            lines.append(f"{process:<24} {count:>10,} {seconds * 1e3:>10.1f} {seconds / total_time:>7.1%}")
+        return "\n".join(lines)
+
+    def folded_stacks(self) -> str:
+        """Folded stack profile ("hubsim;process;event microseconds" per line) for flame graph tools"""
+        return "\n".join(
+            f"hubsim;{process};{event} {round(self.wall_time[(process, event)] * 1e6)}"
+            for process, event in sorted(self.counts)
+        )
+
+    def export_folded(self, path: str):
+        with open(path, "w") as f:
+            f.write(self.folded_stacks() + "\n")
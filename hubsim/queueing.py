@@ -0,0 +1,458 @@
+"""
+Analytical approximation of a hub as a two-stage tandem queue, for instant approximate answers while exploring
+configurations. Stage one is the pick-pack stage: NUM_DELIVERY_SPECIALISTS servers with PICK_PACK_INTERVAL service.
+Stage two is the flight stage: drone, pilot and batteries are acquired jointly for the FLIGHT_INTERVAL service, so it
+is modeled by its bottleneck resource.
+
+Each stage is a GI/G/c queue: the probability of waiting is Erlang C, the mean wait follows Allen-Cunneen, and the
+variability of orders leaving pick-packing follows Whitt's linking equation. Waits are taken as exponential given
+that an order waits, and total duration percentiles come from convolving the stage waits and service times on a grid.
+
+    estimate = estimate_hub(Config())  # Microseconds to milliseconds
+    estimate.mean_wait, estimate.wait_quantiles, estimate.utilization
+
+Estimates are steady-state, while a simulation starts from an empty hub, so they overestimate waits of short or
+heavily loaded runs. Use validate() to compare them against replications of the discrete-event simulation.
+"""
+
+import functools
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+from hubsim.batteries import charge_time
+from hubsim.config import Config
+from hubsim.employees import roster_staff
+from hubsim.replications import DEFAULT_QUANTILES, ReplicationSummary, run_replications
+from hubsim.samplers import Exponential, UniformInterval, as_distribution
+
+GRID_POINTS = 512  # Upper bound on grid points used for total duration percentiles
+TAIL = 1e-6  # Tail probability of exponential waits cut off by the grid
+SAMPLES = 20000  # Draws used to tabulate distributions that are neither intervals nor discrete
+
+# Config resource count behind each station
+STATION_FIELDS = {
+    "DeliverySpecialist": "NUM_DELIVERY_SPECIALISTS",
+    "Drone": "NUM_DRONES",
+    "Pilot": "NUM_PILOTS",
+    "SimpleBattery": "NUM_BATTERIES",
+    "SocBatteryStore": "NUM_BATTERIES",
+    "BatteryStore.chargers": "NUM_CHARGERS",
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _cached_pmf(spec: Any) -> tuple[np.ndarray, np.ndarray]:
+    distribution = as_distribution(spec)
+    if isinstance(distribution, UniformInterval):
+        values = np.arange(distribution.low, distribution.high + 1, dtype=float)
+        return values, np.full(len(values), 1.0 / len(values))
+    if isinstance(distribution, Exponential):
+        # Midpoints of bins up to the TAIL quantile
+        edges = np.linspace(0.0, -distribution.mean * math.log(TAIL), GRID_POINTS + 1)
+        probs = np.diff(-np.exp(-edges / distribution.mean))
+        return (edges[:-1] + edges[1:]) / 2, probs / probs.sum()
+    values = getattr(distribution, "values", None)
+    if values is not None:
+        weights = getattr(distribution, "weights", None)
+        probs = np.ones(len(values)) if weights is None else np.asarray(weights, dtype=float)
+        return np.asarray(values, dtype=float), probs / probs.sum()
+    samples = np.asarray(distribution.draw(np.random.default_rng(0), SAMPLES), dtype=float)
+    values, counts = np.unique(samples, return_counts=True)
+    return values, counts / counts.sum()
+
+
+def pmf(spec: Any) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Probability mass function of a Config duration specification
+    Args:
+        spec: (low, high) interval tuple, samplers.Distribution or lea PMF
+
+    Returns: Values and their probabilities. Continuous distributions are tabulated
+    """
+    if isinstance(spec, list):
+        spec = tuple(spec)
+    try:
+        return _cached_pmf(spec)
+    except TypeError:  # Unhashable specification
+        return _cached_pmf.__wrapped__(spec)
+
+
+def moments(spec: Any) -> tuple[float, float]:
+    """Mean and squared coefficient of variation of a Config duration specification"""
+    values, probs = pmf(spec)
+    mean = float(values @ probs)
+    variance = float(((values - mean) ** 2) @ probs)
+    return mean, variance / mean**2 if mean > 0 else 0.0
+
+
+def erlang_c(servers: int, load: float) -> float:
+    """
+    Probability that an arriving customer waits in an M/M/c queue
+    Args:
+        servers: Number of servers c
+        load: Offered load in erlangs, arrival rate times mean service time
+
+    Returns: Probability of waiting, 1 if the queue is unstable
+    """
+    if load >= servers:
+        return 1.0
+    blocking = 1.0  # Erlang B by recursion over servers, numerically stable for large c
+    for k in range(1, servers + 1):
+        blocking = load * blocking / (k + load * blocking)
+    return blocking / (1.0 - load / servers * (1.0 - blocking))
+
+
+@dataclass
+class Station:
+    """Multi-server queue of one resource. Flight stage resources are acquired jointly, so they share arrivals"""
+
+    name: str
+    servers: int
+    service_mean: float  # Minutes a unit is held per order
+    service_scv: float  # Squared coefficient of variation of the holding time
+    per_order: int = 1  # Units held per order
+    queues_orders: bool = True  # False for resources that do not hold up orders directly, e.g. chargers
+    utilization: float = math.nan
+    prob_wait: float = math.nan
+    mean_wait: float = math.nan
+
+    @property
+    def stable(self) -> bool:
+        return self.utilization < 1.0
+
+    def solve(self, rate: float, arrival_scv: float) -> "Station":
+        """
+        Fill in utilization and waits with the Allen-Cunneen GI/G/c approximation
+        Args:
+            rate: Orders per minute
+            arrival_scv: Squared coefficient of variation of times between arrivals
+
+        Returns: self
+        """
+        rate *= self.per_order
+        load = rate * self.service_mean
+        self.utilization = load / self.servers if self.servers > 0 else math.inf
+        if not self.stable:
+            self.prob_wait, self.mean_wait = 1.0, math.inf
+            return self
+        self.prob_wait = erlang_c(self.servers, load)
+        self.mean_wait = (
+            self.prob_wait / (self.servers / self.service_mean - rate) * (arrival_scv + self.service_scv) / 2.0
+            if rate > 0
+            else 0.0
+        )
+        return self
+
+    @property
+    def capacity(self) -> float:
+        """Orders per minute the resource can serve"""
+        return self.servers / self.service_mean / self.per_order
+
+    def departure_scv(self, arrival_scv: float) -> float:
+        """Squared coefficient of variation of times between departures, Whitt's linking equation"""
+        rho = min(self.utilization, 1.0)
+        return (
+            1.0 + (1.0 - rho**2) * (arrival_scv - 1.0) + rho**2 * (self.service_scv - 1.0) / math.sqrt(self.servers)
+        )
+
+
+@dataclass
+class StageEstimate:
+    """Queue of one stage, represented by its bottleneck station"""
+
+    stations: list[Station]
+    service: tuple[np.ndarray, np.ndarray]  # Service time PMF of orders
+    arrival_scv: float
+
+    @property
+    def bottleneck(self) -> Station:
+        stations = [station for station in self.stations if station.queues_orders]
+        return max(stations, key=lambda station: (station.mean_wait, station.utilization))
+
+    @property
+    def mean_wait(self) -> float:
+        return self.bottleneck.mean_wait
+
+    @property
+    def prob_wait(self) -> float:
+        return self.bottleneck.prob_wait
+
+
+@dataclass
+class QueueEstimate:
+    """Approximate steady-state results of a hub. Field names match replications.ReplicationResult"""
+
+    arrival_rate: float  # Orders per hour
+    pick_pack: StageEstimate
+    flight: StageEstimate
+    mean_wait: float = math.nan  # Mean Order.total_duration
+    wait_quantiles: dict[float, float] = field(default_factory=dict)
+
+    @property
+    def stable(self) -> bool:
+        return all(station.stable for station in self.stations)
+
+    @property
+    def stations(self) -> list[Station]:
+        return self.pick_pack.stations + self.flight.stations
+
+    @property
+    def utilization(self) -> dict[str, float]:
+        """Utilization of every resource, at least 1 where demand exceeds capacity"""
+        return {station.name: station.utilization for station in self.stations}
+
+    @property
+    def throughput(self) -> float:
+        """Orders delivered per hour"""
+        if self.stable:
+            return self.arrival_rate
+        return 60.0 * min(station.capacity for station in self.stations)
+
+
+def arrival_moments(config: Config, until: Optional[float] = None) -> tuple[float, float]:
+    """
+    Order arrival rate and variability
+    Args:
+        config: Hub configuration
+        until: Simulation horizon in minutes, time-varying ORDER_ARRIVAL_RATES are averaged over it. Defaults to a day
+
+    Returns: Orders per minute (inf if orders come without gaps) and squared coefficient of variation of times
+        between orders
+    """
+    if config.ORDER_ARRIVAL_RATES is None:
+        mean, scv = moments(config.ORDER_CREATION_INTERVAL)
+        return (1.0 / mean if mean > 0 else math.inf), scv  # Orders without gaps overload every resource
+    rates = np.atleast_1d(np.asarray(config.ORDER_ARRIVAL_RATES, dtype=float)) / 60.0
+    period, segment = 24 * 60, 24 * 60 / len(rates)
+    until = period if until is None else until
+    # Time spent in each rate segment over [0, until)
+    starts = np.arange(len(rates)) * segment
+    cycles, rest = divmod(until, period)
+    exposure = cycles * segment + np.clip(rest - starts, 0.0, segment)
+    return float(rates @ exposure / until), 1.0  # Poisson, time variation is averaged out
+
+
+def _battery_stations(
+    config: Config, rate: float, arrival_scv: float, flight: tuple[np.ndarray, np.ndarray]
+) -> list[Station]:
+    """
+    Solved stations of state of charge batteries: chargers charge every battery of a mission back to DEPLOY_SOC, and
+    sets of BATTERIES_PER_MISSION batteries are held for the flight, the wait for a charger and the charge
+    """
+    per_mission = config.BATTERIES_PER_MISSION
+    values, probs = flight
+    drain = config.FLIGHT_POWER_W * values / 60.0 / per_mission / config.BATTERY_CAPACITY_WH
+    soc = np.maximum(config.DEPLOY_SOC - drain, 0.0)
+
+    # Power per charger under the hub's cap, with as many chargers active as the charging load needs
+    power = config.CHARGER_POWER_W
+    if config.HUB_POWER_CAP_W is not None:
+        charging = rate * per_mission * float(charge_time(soc, config.DEPLOY_SOC, power, config) @ probs)
+        active = min(max(charging, 1.0), config.NUM_CHARGERS)
+        power = min(power, config.HUB_POWER_CAP_W / active)
+    charge = np.asarray(charge_time(soc, config.DEPLOY_SOC, power, config))
+
+    def station(name: str, servers: int, hold: np.ndarray, **kwargs: Any) -> Station:
+        mean = float(hold @ probs)
+        variance = float(((hold - mean) ** 2) @ probs)
+        return Station(name, servers, mean, variance / mean**2 if mean > 0 else 0.0, **kwargs)
+
+    chargers = station("BatteryStore.chargers", config.NUM_CHARGERS, charge, per_order=per_mission, queues_orders=False)
+    chargers.solve(rate, arrival_scv)
+    charger_wait = chargers.mean_wait if chargers.stable else 0.0  # Unstable chargers make the whole hub unstable
+    batteries = station("SocBatteryStore", config.NUM_BATTERIES // per_mission, values + charger_wait + charge)
+    return [batteries.solve(rate, arrival_scv), chargers]
+
+
+def _wait_pmf(stage: StageEstimate, step: float, size: int) -> np.ndarray:
+    """Grid PMF of a stage wait: no wait with probability 1 - prob_wait, else exponential around the bottleneck's mean"""
+    result = np.zeros(size)
+    result[0] = 1.0 - stage.prob_wait
+    if stage.prob_wait > 0:
+        mean = stage.mean_wait / stage.prob_wait
+        edges = np.maximum((np.arange(size + 1) - 0.5) * step, 0.0)
+        result += stage.prob_wait * np.diff(-np.exp(-edges / mean))
+    return result
+
+
+def _grid_pmf(values: np.ndarray, probs: np.ndarray, step: float) -> np.ndarray:
+    return np.bincount(np.rint(values / step).astype(int), weights=probs)
+
+
+def _total_quantiles(stages: Sequence[StageEstimate], quantiles: Sequence[float]) -> dict[float, float]:
+    """Quantiles of the sum of stage waits and service times, by convolution on a grid"""
+    span = sum(s.service[0].max() - math.log(TAIL) * s.mean_wait / max(s.prob_wait, TAIL) for s in stages)
+    step = max(span / GRID_POINTS, 1e-3)
+    total = np.ones(1)
+    for stage in stages:
+        size = int(math.ceil(-math.log(TAIL) * stage.mean_wait / max(stage.prob_wait, TAIL) / step)) + 1
+        total = np.convolve(total, _wait_pmf(stage, step, size))
+        total = np.convolve(total, _grid_pmf(*stage.service, step))
+    cdf = np.cumsum(total)
+    return {q: float(np.searchsorted(cdf, q * cdf[-1]) * step) for q in quantiles}
+
+
+def estimate_hub(
+    config: Config, until: Optional[float] = None, quantiles: Sequence[float] = DEFAULT_QUANTILES
+) -> QueueEstimate:
+    """
+    Approximate steady-state utilization and order durations of a hub
+    Args:
+        config: Hub configuration
+        until: Simulation horizon in minutes, only used to average time-varying ORDER_ARRIVAL_RATES
+        quantiles: Order.total_duration quantiles to report
+
+    Returns: QueueEstimate, waits are inf if a resource cannot keep up with the orders
+    """
+    rate, arrival_scv = arrival_moments(config, until)
+
+    # Staff per stage. Employees of a roster are counted in every stage they are trained for, so shared staff make the
+    # estimate optimistic
+    if config.EMPLOYEE_ROSTER is None:
+        pick_pack_staff = ("DeliverySpecialist", config.NUM_DELIVERY_SPECIALISTS)
+        flight_staff = ("Pilot", config.NUM_PILOTS)
+    else:
+        pick_pack_staff = ("PickPackStaff", roster_staff(config.EMPLOYEE_ROSTER, config.PICK_PACK_ROLES))
+        flight_staff = ("FlightCrew", roster_staff(config.EMPLOYEE_ROSTER, config.FLIGHT_ROLES))
+
+    # Stage one: delivery specialists pick-pack every order
+    pick_pack_pmf = pmf(config.PICK_PACK_INTERVAL)
+    pick_pack = StageEstimate(
+        [Station(*pick_pack_staff, *moments(config.PICK_PACK_INTERVAL))],
+        pick_pack_pmf,
+        arrival_scv,
+    )
+    pick_pack.stations[0].solve(rate, arrival_scv)
+
+    # Stage two: drone, pilot and batteries held together, so the stage queues at its bottleneck
+    flight_pmf = pmf(config.FLIGHT_INTERVAL)
+    flight_mean, flight_scv = moments(config.FLIGHT_INTERVAL)
+    flight_scv_in = pick_pack.stations[0].departure_scv(arrival_scv)
+    stations = [
+        Station("Drone", config.NUM_DRONES, flight_mean, flight_scv),
+        Station(*flight_staff, flight_mean, flight_scv),
+    ]
+    if config.BATTERY_MODEL != "soc":
+        stations.append(Station("SimpleBattery", config.NUM_BATTERIES, flight_mean, flight_scv))
+    stations = [station.solve(rate, flight_scv_in) for station in stations]
+    if config.BATTERY_MODEL == "soc":
+        stations += _battery_stations(config, rate, flight_scv_in, flight_pmf)
+    flight = StageEstimate(stations, flight_pmf, flight_scv_in)
+
+    estimate = QueueEstimate(60.0 * rate, pick_pack, flight)
+    if not estimate.stable:
+        estimate.mean_wait = math.inf
+        estimate.wait_quantiles = {q: math.inf for q in quantiles}
+        return estimate
+    estimate.mean_wait = pick_pack.mean_wait + moments(config.PICK_PACK_INTERVAL)[0] + flight.mean_wait + flight_mean
+    estimate.wait_quantiles = _total_quantiles((pick_pack, flight), quantiles)
+    return estimate
+
+
+def stable_resources(
+    config: Config, bounds: dict[str, tuple[int, int]], max_utilization: float = 0.95
+) -> dict[str, int]:
+    """
+    Smallest resource counts keeping every resource below a utilization, by adding units to the busiest resource.
+    A starting point for staffing searches, profiles below it cannot keep up with orders in the long run
+    Args:
+        config: Hub configuration
+        bounds: Inclusive (min, max) count per resource field, see optimizer.StaffingOptimizer
+        max_utilization: Highest acceptable utilization
+
+    Returns: Count per field of bounds, at its upper bound where that is not enough
+    """
+    resources = {name: low for name, (low, _) in bounds.items()}
+    while True:
+        estimate = estimate_hub(config.replace(**resources))
+        busy = [
+            station
+            for station in estimate.stations
+            if station.utilization > max_utilization
+            and STATION_FIELDS.get(station.name) in resources
+            and resources[STATION_FIELDS[station.name]] < bounds[STATION_FIELDS[station.name]][1]
+        ]
+        if not busy:
+            return resources
+        resources[STATION_FIELDS[max(busy, key=lambda station: station.utilization).name]] += 1
+
+
+@dataclass
+class Validation:
+    """Estimate of one configuration next to replications of the simulation"""
+
+    config: Config
+    estimate: QueueEstimate
+    summary: ReplicationSummary
+    estimate_seconds: float
+
+    @property
+    def simulated_quantiles(self) -> dict[float, float]:
+        """Wait time quantiles averaged across replications"""
+        results = self.summary.results
+        return {
+            q: float(np.mean([r.wait_quantiles.get(q, math.nan) for r in results]))
+            for q in self.estimate.wait_quantiles
+        }
+
+    @property
+    def error(self) -> float:
+        """Relative error of the estimated mean wait"""
+        return self.estimate.mean_wait / self.summary.wait_time.mean - 1.0
+
+    @property
+    def within_interval(self) -> bool:
+        """Whether the estimated mean wait lies in the confidence interval of the simulated one"""
+        return self.summary.wait_time.lower <= self.estimate.mean_wait <= self.summary.wait_time.upper
+
+
+def validate(
+    configs: Iterable[Union[Config, dict[str, Any]]],
+    until: float,
+    replications: int = 10,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    base_config: Optional[Config] = None,
+) -> list[Validation]:
+    """
+    Compare estimates against replications of the discrete-event simulation
+    Args:
+        configs: Configurations, or Config overrides applied to base_config (e.g. sweep.grid() output)
+        until: Simulation horizon in minutes. Use long horizons, estimates are steady-state
+        replications: Replications per configuration
+        seed: Base seed, replication i uses seed + i
+        max_workers: Worker processes, defaults to the number of CPUs. Use 1 to run in-process
+        base_config: Configuration overrides are applied to, defaults to Config()
+
+    Returns: One Validation per configuration
+    """
+    base_config = base_config if base_config is not None else Config()
+    validations = []
+    for config in configs:
+        if not isinstance(config, Config):
+            config = base_config.replace(**config)
+        start = time.perf_counter()
+        estimate = estimate_hub(config, until)
+        elapsed = time.perf_counter() - start
+        summary = run_replications(config, replications, until, seed=seed, max_workers=max_workers)
+        validations.append(Validation(config, estimate, summary, elapsed))
+    return validations
+
+
+if __name__ == "__main__":
+    from hubsim.sweep import grid
+
+    points = grid({"ORDER_CREATION_INTERVAL": [(10, 45), (5, 20), (4, 10)], "NUM_DELIVERY_SPECIALISTS": [2, 3]})
+    base = Config().replace(NUM_PILOTS=3)
+    print(f"{'Overrides':<60} {'Estimate':>9} {'Simulated':>16} {'p95 est':>8} {'p95 sim':>8} {'Time':>8}")
+    for overrides, result in zip(points, validate(points, until=7 * 24 * 60, base_config=base)):
+        simulated = result.summary.wait_time
+        print(
+            f"{str(overrides):<60} {result.estimate.mean_wait:9.1f} {simulated.mean:9.1f} ± {simulated.half_width:4.1f}"
+            f" {result.estimate.wait_quantiles[0.95]:8.1f} {result.simulated_quantiles[0.95]:8.1f}"
+            f" {result.estimate_seconds * 1e6:6.0f}µs"
+        )
@@ -0,0 +1,273 @@
+"""
+Monte Carlo replication runner for hub simulations. Runs independent, seeded replications of a Hub across a
+process pool and aggregates the results into confidence intervals for staffing decisions.
+"""
+
+import functools
+import math
+import statistics
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Optional, Sequence
+
+import numpy as np
+
+from hubsim.config import STREAMING_STAGES, Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+from hubsim.streaming import StageStatistics
+
+if TYPE_CHECKING:
+    from hubsim.shared import ResultChannel
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95)
+
+
+@dataclass
+class ReplicationResult:
+    """Summary metrics of a single replication. Kept small so results are cheap to send back from workers"""
+
+    seed: int
+    until: float
+    orders_created: int = 0
+    orders_delivered: int = 0
+    mean_wait: float = math.nan
+    wait_quantiles: dict[float, float] = field(default_factory=dict)
+    warmup: float = 0.0  # Statistics cover (warmup, until]
+
+    @property
+    def throughput(self) -> float:
+        """Orders delivered per hour of simulated time after warm-up"""
+        return self.orders_delivered / ((self.until - self.warmup) / 60.0)
+
+
+@dataclass
+class ConfidenceInterval:
+    """Student-t confidence interval for the mean of a metric across replications"""
+
+    mean: float
+    half_width: float
+    confidence: float
+    n: int
+
+    @property
+    def lower(self) -> float:
+        return self.mean - self.half_width
+
+    @property
+    def upper(self) -> float:
+        return self.mean + self.half_width
+
+    def __str__(self):
+        return f"{self.mean:.2f} ± {self.half_width:.2f} ({self.confidence:.0%}, n={self.n})"
+
+
+@dataclass
+class ReplicationSummary:
+    """Aggregate of many replications of the same configuration"""
+
+    results: list[ReplicationResult]
+    wait_time: ConfidenceInterval
+    throughput: ConfidenceInterval
+
+
+def _t_quantile(p: float, dof: int) -> float:
+    """
+    Quantile of Student's t-distribution. Exact for 1 and 2 degrees of freedom, otherwise uses the
+    Cornish-Fisher expansion around the normal quantile (accurate to ~1e-3 for dof >= 3), avoiding a scipy dependency.
+    """
+    if dof == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if dof == 2:
+        return (2 * p - 1) / math.sqrt(2 * p * (1 - p))
+
+    z = statistics.NormalDist().inv_cdf(p)
+    g1 = (z**3 + z) / 4
+    g2 = (5 * z**5 + 16 * z**3 + 3 * z) / 96
+    g3 = (3 * z**7 + 19 * z**5 + 17 * z**3 - 15 * z) / 384
+    g4 = (79 * z**9 + 776 * z**7 + 1482 * z**5 - 1920 * z**3 - 945 * z) / 92160
+    return z + g1 / dof + g2 / dof**2 + g3 / dof**3 + g4 / dof**4
+
+
+def confidence_interval(values: Sequence[float], confidence: float = 0.95) -> ConfidenceInterval:
+    """
+    Compute a confidence interval for the mean of independent replication outputs
+    Args:
+        values: One observation per replication (NaNs are dropped)
+        confidence: Two-sided confidence level
+
+    Returns: ConfidenceInterval for the mean
+    """
+    values = [v for v in values if not math.isnan(v)]
+    n = len(values)
+    if n == 0:
+        return ConfidenceInterval(math.nan, math.nan, confidence, 0)
+    mean = statistics.fmean(values)
+    if n == 1:
+        return ConfidenceInterval(mean, math.inf, confidence, 1)
+
+    half_width = _t_quantile(0.5 + confidence / 2, n - 1) * statistics.stdev(values) / math.sqrt(n)
+    return ConfidenceInterval(mean, half_width, confidence, n)
+
+
+def run_replication(
+    config: Config,
+    seed: int,
+    until: float,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    streaming: bool = False,
+    fast_forward: bool = False,
+    channel: Optional["ResultChannel"] = None,
+    slot: int = 0,
+) -> ReplicationResult:
+    """
+    Run a single replication of a Hub with its own DataMonitor. Top-level function so it can be sent to worker
+    processes.
+
+    Args:
+        config: Hub configuration
+        seed: Seed for this replication
+        until: Simulation horizon in minutes
+        quantiles: Wait time quantiles to report
+        streaming: Use a streaming DataMonitor (bounded memory, quantiles are P-squared estimates)
+        fast_forward: Run the environment in fast-forward mode, see HubEnvironment
+        channel: Also write per-order and per-resource metrics to this slot of a shared.ResultChannel
+        slot: Slot of this replication in channel
+
+    Returns: ReplicationResult with summary metrics
+    """
+    monitor = DataMonitor(streaming=streaming)
+    if streaming:
+        monitor.stages = {stage: StageStatistics(quantiles) for stage in STREAMING_STAGES}
+
+    env = HubEnvironment(config, monitor, seed=seed, fast_forward=fast_forward)
+    Hub(env)
+    env.run(until=until)
+    if channel is not None:
+        channel.write(slot, monitor)
+    return replication_result(monitor, seed, until, quantiles)
+
+
+def _run_slot(run: Callable[..., ReplicationResult], seed: int, slot: int) -> ReplicationResult:
+    return run(seed, slot=slot)
+
+
+def replication_result(
+    monitor: DataMonitor,
+    seed: int,
+    until: float,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    warmup: float = 0.0,
+    baseline: tuple[int, int] = (0, 0),
+) -> ReplicationResult:
+    """
+    Summary metrics of a finished run
+    Args:
+        monitor: Monitor of the run
+        seed: Seed of the run
+        until: Simulation horizon in minutes
+        quantiles: Wait time quantiles to report
+        warmup: Only count orders created and delivered after this time. Streaming monitors cannot filter past
+            orders, their stages must be reset at the end of warm-up instead
+        baseline: Created and delivered counters of a streaming monitor at the end of warm-up
+
+    Returns: ReplicationResult with summary metrics
+    """
+    if until <= warmup:
+        raise ValueError(f"ERROR: Horizon {until} must be after the end of warm-up {warmup}")
+    result = ReplicationResult(seed=seed, until=until, warmup=warmup)
+    if monitor.streaming:
+        result.orders_created = monitor.orders_created - baseline[0]
+        result.orders_delivered = monitor.orders_delivered - baseline[1]
+        total_duration = monitor.stages["total_duration"]
+        if total_duration.stats.count:
+            result.mean_wait = total_duration.stats.mean
+            result.wait_quantiles = {q: total_duration.quantile(q) for q in quantiles}
+        return result
+
+    result.orders_created = int((monitor.orders.column("creation_time") >= warmup).sum())
+    delivery_times = monitor.delivery_times
+    wait_times = monitor.wait_times[delivery_times >= warmup]
+    result.orders_delivered = len(wait_times)
+    if len(wait_times):
+        result.mean_wait = float(wait_times.mean())
+        result.wait_quantiles = dict(zip(quantiles, np.quantile(wait_times, quantiles).tolist()))
+    return result
+
+
+def summarize(results: list[ReplicationResult], confidence: float = 0.95) -> ReplicationSummary:
+    """Aggregate replication results into confidence intervals for wait time and throughput"""
+    return ReplicationSummary(
+        results=results,
+        wait_time=confidence_interval([r.mean_wait for r in results], confidence),
+        throughput=confidence_interval([r.throughput for r in results], confidence),
+    )
+
+
+def submit(pool: Optional[ProcessPoolExecutor], fn: Callable, *args: Any) -> Future:
+    """Submit to a process pool, or run in-process if there is no pool (max_workers=1)"""
+    if pool is not None:
+        return pool.submit(fn, *args)
+    future: Future = Future()
+    future.set_result(fn(*args))
+    return future
+
+
+def run_replications(
+    config: Config,
+    replications: int,
+    until: float,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    confidence: float = 0.95,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    streaming: bool = False,
+    fast_forward: bool = False,
+    channel: Optional["ResultChannel"] = None,
+) -> ReplicationSummary:
+    """
+    Run independent replications of the same configuration across a process pool
+    Args:
+        config: Hub configuration
+        replications: Number of replications to run
+        until: Simulation horizon in minutes
+        seed: Base seed, replication i uses seed + i
+        max_workers: Worker processes, defaults to the number of CPUs. Use 1 to run in-process
+        confidence: Confidence level of reported intervals
+        quantiles: Wait time quantiles to report
+        streaming: Use streaming DataMonitors, see run_replication
+        fast_forward: Run environments in fast-forward mode, see HubEnvironment
+        channel: shared.ResultChannel with a slot per replication (slot i for seed + i). Workers write delivered orders
+            and resource usage there instead of sending them back, requires streaming=False
+
+    Returns: ReplicationSummary ordered by seed
+    """
+    if channel is not None:
+        if streaming:
+            raise ValueError("ERROR: Streaming replications keep no order records to write to a ResultChannel")
+        if channel.replications < replications:
+            raise ValueError(f"ERROR: ResultChannel has {channel.replications} slots for {replications} replications")
+    seeds = [seed + i for i in range(replications)]
+    run = functools.partial(
+        run_replication,
+        config,
+        until=until,
+        quantiles=quantiles,
+        streaming=streaming,
+        fast_forward=fast_forward,
+        channel=channel,
+    )
+    run = functools.partial(_run_slot, run)
+
+    if max_workers == 1:
+        results = [run(s, i) for i, s in enumerate(seeds)]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            results = list(pool.map(run, seeds, range(replications)))
+
+    return summarize(results, confidence)
+
+
+if __name__ == "__main__":
+    summary = run_replications(Config(), replications=20, until=12 * 60)
+    print(f"Wait time (min): {summary.wait_time}")
+    print(f"Throughput (orders/hr): {summary.throughput}")
@@ -1,18 +1,46 @@
 """
 Entrypoint for running simulations and/or streamlit app
 """
-import statistics
+from pathlib import Path
 
 import plotly.express as px
 import plotly.graph_objs as go
 import streamlit as st
-from config import Config, DataMonitor
-from hub import Hub, HubEnvironment
+
+from hubsim.cache import ResultCache, config_hash
+from hubsim.config import Config, DataMonitor
+from hubsim.incremental import IncrementalSimulator
+from hubsim.queueing import estimate_hub
+from hubsim.replications import run_replications
+
+ASSETS = Path(__file__).parent / "assets"
+PROGRESS_STEPS = 12  # Chart updates while a simulation runs
+
+
+@st.cache_resource
+def simulator() -> IncrementalSimulator:
+    """Result cache and pick-pack stage records shared by all sessions and reruns of the app"""
+    return IncrementalSimulator(ResultCache())
+
+
+def wait_time_figure(monitor: DataMonitor) -> go.Figure:
+    """Scatter plot of order wait times over simulation time, with their average"""
+    fig = px.scatter(x=monitor.delivery_times, y=monitor.wait_times, color_discrete_sequence=["#ff6c32"])
+    if monitor.orders_delivered:
+        mean_wait = monitor.wait_times.mean()
+        annot = go.layout.Annotation(text=f"Average: {mean_wait:.1f} min")
+        line = go.layout.shape.Line(color="#4e5556", dash="dash")
+        fig.add_hline(y=mean_wait, annotation=annot, line=line)
+    fig.update_layout(
+        yaxis_title="Order Wait Time",
+        xaxis_title="Simulation Environment Time (min)",
+        title_text="Delivery Wait Times",
+    )
+    return fig
 
 
 def main():
     config = Config()
-    monitor = DataMonitor()
 
     st.set_page_config(
         page_title="Hub Simulation",
@@ -20,7 +48,7 @@ def main():
         menu_items={},
     )
 
-    st.image("hubsim/assets/Black_Orange_Wordmark_Lockup_DroneUp_sm.png", width=400)
+    st.image(str(ASSETS / "Black_Orange_Wordmark_Lockup_DroneUp_sm.png"), width=400)
     st.title("Hub Simulation")
     st.markdown("---")
 
@@ -74,7 +102,7 @@ def main():
             with rerun_col:
                 st.button("Rerun", disabled=not config.RANDOM)
 
-            # TODO: simulation run count, summary stats (when randomize)
+            replications = st.number_input("Replications:", value=1, min_value=1, disabled=not config.RANDOM)
 
             st.subheader("Resource Profile")
 
@@ -99,31 +127,57 @@ def main():
 
             # TODO: Export data, export plots
 
-        env = HubEnvironment(config, monitor)
-        hub = Hub(env)
+        # Instant steady-state queueing estimate, shown before the simulation finishes
         until = hours * 60
-        hub.env.run(until=until)
-
-        fig = px.scatter(x=hub.monitor.delivery_times, y=hub.monitor.wait_times, color_discrete_sequence=["#ff6c32"])
-        annot = go.layout.Annotation(text=f"Average: {statistics.mean(hub.env.monitor.wait_times):.1f} min")
-        line = go.layout.shape.Line(color="#4e5556", dash="dash")
-        fig.add_hline(y=statistics.mean(hub.monitor.wait_times), annotation=annot, line=line)
-        fig.update_layout(
-            yaxis_title="Order Wait Time",
-            xaxis_title="Simulation Environment Time (min)",
-            title_text="Delivery Wait Times",
-        )
-
-        st.subheader(f"Total Orders: {hub.env.monitor.orders_delivered}")
-
-        st.plotly_chart(fig)
+        estimate = estimate_hub(config, until=until)
+        estimate_col, busiest_col = st.columns(2)
+        with estimate_col:
+            st.metric("Estimated Average Wait Time (min)", f"{estimate.mean_wait:.1f}")
+            st.caption(f"p95: {estimate.wait_quantiles[0.95]:.1f} min (queueing approximation)")
+        with busiest_col:
+            busiest, utilization = max(estimate.utilization.items(), key=lambda item: item[1])
+            st.metric("Busiest Resource", busiest, f"{utilization:.0%} utilized", delta_color="off")
+            if not estimate.stable:
+                st.caption("Demand exceeds capacity, waits grow over the day")
+
+        # Simulate in the background and plot results as they come in. Results of previously seen configurations and
+        # flight stage replays are shown at once. A run for a stale configuration (e.g. before a slider moved) is
+        # cancelled, randomized runs are always simulated again
+        key = None if config.RANDOM else config_hash(config, config.SEED, until)
+        run = st.session_state.get("run")
+        if run is None or key is None or st.session_state.get("run_key") != key or run.cancelled:
+            if run is not None:
+                run.cancel()
+            run = simulator().start(config, until=until, chunk=until / PROGRESS_STEPS)
+            st.session_state["run"], st.session_state["run_key"] = run, key
+
+        total_orders, chart, progress = st.empty(), st.empty(), st.empty()
+        for snapshot in run.snapshots():
+            if not snapshot.final:
+                progress.progress(snapshot.progress, text=f"Simulating... {snapshot.time:.0f} of {until:.0f} min")
+            total_orders.subheader(f"Total Orders: {snapshot.monitor.orders_delivered}")
+            chart.plotly_chart(wait_time_figure(snapshot.monitor))
+        progress.empty()
         st.caption(
             "<p style='text-align: center'; >If this chart looks 'random' then the hub is not under-resourced."
             " However, it may be over-resourced. </p>",
             unsafe_allow_html=True,
         )
 
-        # TODO: many runs, optimizers
+        if config.RANDOM and replications > 1:
+            with st.spinner(f"Running {replications} replications..."):
+                summary = run_replications(config, replications=replications, until=until)
+
+            st.subheader("Replication Summary")
+            wait_col, throughput_col = st.columns(2)
+            with wait_col:
+                st.metric("Average Wait Time (min)", f"{summary.wait_time.mean:.1f}")
+                st.caption(f"95% CI: {summary.wait_time.lower:.1f} - {summary.wait_time.upper:.1f}")
+            with throughput_col:
+                st.metric("Throughput (orders/hr)", f"{summary.throughput.mean:.2f}")
+                st.caption(f"95% CI: {summary.throughput.lower:.2f} - {summary.throughput.upper:.2f}")
+
+        # TODO: optimizers
 
 
 if __name__ == "__main__":
@@ -0,0 +1,138 @@
+"""
+Sampling layer for task durations. Distributions draw samples in large NumPy blocks and BufferedSampler hands them
+out one at a time, so hub processes pay one cheap list index per event instead of a Python-level RNG call.
+
+Distributions are pluggable: anything with a draw(generator, size) method can be used in place of the (low, high)
+interval tuples in Config, e.g. empirical histograms built from hub data or lea PMFs.
+"""
+
+from dataclasses import dataclass
+from typing import Any, Optional, Protocol, Sequence, Union
+
+import numpy as np
+
+DEFAULT_BLOCK_SIZE = 4096
+
+
+class Distribution(Protocol):
+    """Anything that can draw a block of samples from a numpy Generator"""
+
+    def draw(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        ...
+
+
+@dataclass(frozen=True)
+class UniformInterval:
+    """Integer uniform distribution over [low, high] inclusive, same semantics as random.randint"""
+
+    low: int
+    high: int
+
+    def draw(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        return generator.integers(self.low, self.high, size=size, endpoint=True)
+
+
+@dataclass(frozen=True)
+class Exponential:
+    """Exponential distribution, e.g. times between Poisson arrivals"""
+
+    mean: float
+
+    def draw(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        return generator.exponential(self.mean, size=size)
+
+
+@dataclass(frozen=True)
+class Empirical:
+    """Discrete distribution over observed values, optionally weighted (e.g. histogram counts)"""
+
+    values: tuple[float, ...]
+    weights: Optional[tuple[float, ...]] = None
+
+    @classmethod
+    def from_histogram(cls, bin_edges: Sequence[float], counts: Sequence[float]) -> "Empirical":
+        """
+        Build distribution from histogram bins, sampling bin midpoints
+        Args:
+            bin_edges: Histogram bin edges, one longer than counts
+            counts: Number of observations per bin
+
+        Returns: Empirical distribution
+        """
+        edges = np.asarray(bin_edges, dtype=float)
+        midpoints = (edges[:-1] + edges[1:]) / 2
+        return cls(tuple(midpoints.tolist()), tuple(float(c) for c in counts))
+
+    def draw(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        p = None
+        if self.weights is not None:
+            p = np.asarray(self.weights, dtype=float)
+            p = p / p.sum()
+        return generator.choice(np.asarray(self.values), size=size, p=p)
+
+
+class LeaDistribution(Empirical):
+    """Discrete distribution defined by a lea probability mass function, e.g. lea.poisson(10)"""
+
+    def __init__(self, pmf: Any):
+        super().__init__(tuple(pmf.support), tuple(pmf.ps))
+
+
+def as_distribution(spec: Union[tuple[int, int], Distribution, Any]) -> Distribution:
+    """
+    Convert a Config duration specification to a Distribution
+    Args:
+        spec: (low, high) interval tuple, Distribution, or lea PMF
+
+    Returns: Distribution object
+    """
+    if isinstance(spec, (tuple, list)) and len(spec) == 2:
+        return UniformInterval(int(spec[0]), int(spec[1]))
+    # lea objects have their own draw() method, so check for them first
+    if hasattr(spec, "support") and hasattr(spec, "ps"):
+        return LeaDistribution(spec)
+    if hasattr(spec, "draw"):
+        return spec
+    raise TypeError(f"ERROR: Cannot sample durations from {spec!r}")
+
+
+class BufferedSampler:
+    """Hands out samples one at a time from blocks drawn in bulk from a distribution"""
+
+    __slots__ = ("distribution", "generator", "block_size", "_buffer", "_index")
+
+    def __init__(
+        self, distribution: Distribution, generator: np.random.Generator, block_size: int = DEFAULT_BLOCK_SIZE
+    ):
+        self.distribution = distribution
+        self.generator = generator
+        self.block_size = block_size
+        self._buffer: list = []
+        self._index = 0
+
+    def __repr__(self):
+        return f"BufferedSampler({self.distribution!r}, block_size={self.block_size})"
+
+    def __call__(self) -> Any:
+        """Next sample, as a Python scalar"""
+        if self._index >= len(self._buffer):
+            self._refill()
+        value = self._buffer[self._index]
+        self._index += 1
+        return value
+
+    def reset(self, generator: Optional[np.random.Generator] = None):
+        """
+        Discard buffered samples, optionally switching to another generator (e.g. after reseeding)
+        Args:
+            generator: New numpy Generator, keeps the current one if None
+        """
+        if generator is not None:
+            self.generator = generator
+        self._buffer = []
+        self._index = 0
+
+    def _refill(self):
+        # tolist() converts the whole block to Python scalars at once, far cheaper than per-item numpy scalar access
+        self._buffer = self.distribution.draw(self.generator, self.block_size).tolist()
+        self._index = 0
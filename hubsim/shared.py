@@ -0,0 +1,228 @@
+"""
+Shared-memory result channel for replications in worker processes. The parent preallocates one shared memory block
+with a slot per replication. Workers attach to it by name, write the delivered orders and resource usage of their
+replication into their slot, and return only the small ReplicationResult. The parent then reads every replication's
+data as NumPy views of the same block, without pickling order logs or usage records across processes:
+
+    config = Config().replace(RECORD_UTILIZATION=True)
+    with ResultChannel(config, replications=20, until=720) as channel:
+        summary = run_replications(config, replications=20, until=720, channel=channel)
+        waits = channel.column("total_duration")  # (replications, max_orders), NaN past each replication's orders
+        busy = channel.utilization.mean(axis=0)  # Hourly utilization per resource, averaged over replications
+
+Views are only valid while the channel is open, copy anything needed after it is closed.
+"""
+
+import math
+from multiprocessing import shared_memory
+from typing import Optional, Sequence
+
+import numpy as np
+
+from hubsim.config import ORDER_TIME_FIELDS, Config, DataMonitor
+from hubsim.samplers import as_distribution
+
+
+def order_capacity(config: Config, until: float) -> int:
+    """
+    Upper estimate of the number of orders one hub creates, for sizing order slots
+    Args:
+        config: Hub configuration
+        until: Simulation horizon in minutes
+
+    Returns: Expected number of orders plus six standard deviations
+    """
+    if config.ORDER_ARRIVAL_RATES is not None:
+        expected = max(np.atleast_1d(config.ORDER_ARRIVAL_RATES)) * until / 60.0  # Bounded by the peak rate
+    else:
+        gaps = as_distribution(config.ORDER_CREATION_INTERVAL).draw(np.random.default_rng(0), 4096)
+        expected = until / max(float(np.mean(gaps)), 1e-9)
+    return int(expected + 6 * math.sqrt(expected)) + 16
+
+
+def resource_names(config: Config) -> list[str]:
+    """Names of a hub's usage recorders, in the order resources are created (empty unless RECORD_UTILIZATION)"""
+    from hubsim.hub import Hub, HubEnvironment
+
+    if not config.RECORD_UTILIZATION:
+        return []
+    env = HubEnvironment(config, DataMonitor(), seed=0)
+    Hub(env, generate_orders=False)
+    return list(env.monitor.utilization)
+
+
+class ResultChannel:
+    """
+    Preallocated shared memory holding per-order and per-resource metrics of many replications. Created by the parent
+    and passed to workers, which pickle only its layout and attach to the block by name.
+    """
+
+    def __init__(
+        self,
+        config: Config,
+        replications: int,
+        until: float,
+        max_orders: Optional[int] = None,
+        resolution: float = 60.0,
+    ):
+        """
+        Args:
+            config: Hub configuration of the replications. Resource usage is only collected if RECORD_UTILIZATION is
+                set
+            replications: Number of slots
+            until: Simulation horizon in minutes
+            max_orders: Delivered orders kept per replication, estimated from the arrival settings by default.
+                Further orders are counted but not stored, see truncated
+            resolution: Bin width of utilization and queue length series, in minutes
+        """
+        self.replications = replications
+        self.until = until
+        self.max_orders = order_capacity(config, until) if max_orders is None else max_orders
+        self.resolution = resolution
+        self.resources = resource_names(config)
+        bins = math.ceil(until / resolution)
+
+        # name -> (shape, dtype, offset) of each array in the block
+        self._layout: dict[str, tuple[tuple[int, ...], np.dtype, int]] = {}
+        size = 0
+        for name, shape, dtype in (
+            ("orders", (replications, self.max_orders, len(ORDER_TIME_FIELDS)), np.float32),
+            ("order_count", (replications,), np.int64),
+            ("written", (replications,), np.bool_),
+            ("utilization", (replications, len(self.resources), bins), np.float64),
+            ("queue_length", (replications, len(self.resources), bins), np.float64),
+        ):
+            dtype = np.dtype(dtype)
+            size = -(-size // dtype.alignment) * dtype.alignment
+            self._layout[name] = (shape, dtype, size)
+            size += int(np.prod(shape)) * dtype.itemsize
+
+        self._owner = True
+        self._memory = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        self.name = self._memory.name
+        self._arrays = self._views()
+        for name in ("orders", "utilization", "queue_length"):
+            self._arrays[name].fill(np.nan)
+        self._arrays["order_count"].fill(0)
+        self._arrays["written"].fill(False)
+
+    def _views(self) -> dict[str, np.ndarray]:
+        return {
+            name: np.ndarray(shape, dtype=dtype, buffer=self._memory.buf, offset=offset)
+            for name, (shape, dtype, offset) in self._layout.items()
+        }
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        state.update(_memory=None, _arrays=None, _owner=False)  # Workers attach by name
+        return state
+
+    def __enter__(self) -> "ResultChannel":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _attach(self):
+        if self._memory is None:
+            self._memory = shared_memory.SharedMemory(name=self.name)
+            self._arrays = self._views()
+
+    def close(self):
+        """Release the block, and free it if this is the channel that created it"""
+        if self._memory is None:
+            return
+        self._arrays = None  # Views must go before the buffer can be released
+        try:
+            self._memory.close()
+        except BufferError:  # Views still referenced elsewhere, the mapping goes when they are garbage collected
+            pass
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
+
+    def write(self, slot: int, monitor: DataMonitor):
+        """
+        Write a finished replication into its slot. Called in the worker
+        Args:
+            slot: Replication index
+            monitor: Non-streaming monitor of the replication
+        """
+        if monitor.streaming:
+            raise ValueError("ERROR: Streaming monitors keep no order records to write to a ResultChannel")
+        attached = self._memory is None
+        self._attach()
+        try:
+            self._write(self._arrays, slot, monitor)
+        finally:
+            if attached:  # Pickled copy in a worker, detach so the next task does not map the block again
+                self.close()
+
+    def _write(self, arrays: dict[str, np.ndarray], slot: int, monitor: DataMonitor):
+        delivered = monitor._completed_in_delivery_order()
+        stored = delivered[: self.max_orders]
+        arrays["orders"][slot, : len(stored)] = monitor.orders._times[stored]
+        arrays["order_count"][slot] = len(delivered)
+
+        bins = arrays["utilization"].shape[-1]
+        for k, name in enumerate(self.resources):
+            recorder = monitor.utilization.get(name)
+            if recorder is None:
+                continue
+            utilization = recorder.utilization(self.until, self.resolution)[1][:bins]
+            queue_length = recorder.queue_length(self.until, self.resolution)[1][:bins]
+            arrays["utilization"][slot, k, : len(utilization)] = utilization
+            arrays["queue_length"][slot, k, : len(queue_length)] = queue_length
+        arrays["written"][slot] = True
+
+    @property
+    def written(self) -> np.ndarray:
+        """Boolean mask of slots that hold a finished replication"""
+        return self._arrays["written"]
+
+    @property
+    def order_count(self) -> np.ndarray:
+        """Delivered orders per replication, including any that did not fit in max_orders"""
+        return self._arrays["order_count"]
+
+    @property
+    def truncated(self) -> np.ndarray:
+        """Boolean mask of replications that delivered more than max_orders orders"""
+        return self.order_count > self.max_orders
+
+    @property
+    def orders(self) -> np.ndarray:
+        """(replications, max_orders, ORDER_TIME_FIELDS) view of delivered orders in delivery order, NaN padded"""
+        return self._arrays["orders"]
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Get an order field for all replications
+        Args:
+            name: Order time field, e.g. "total_duration"
+
+        Returns: (replications, max_orders) view, NaN past each replication's orders
+        """
+        return self._arrays["orders"][:, :, ORDER_TIME_FIELDS.index(name)]
+
+    @property
+    def utilization(self) -> np.ndarray:
+        """(replications, resources, bins) view of time-weighted utilization, resources as in self.resources"""
+        return self._arrays["utilization"]
+
+    @property
+    def queue_length(self) -> np.ndarray:
+        """(replications, resources, bins) view of time-weighted mean queue length"""
+        return self._arrays["queue_length"]
+
+    def mean_wait(self) -> np.ndarray:
+        """Mean total duration of stored orders per replication"""
+        waits = self.column("total_duration")
+        counts = np.minimum(self.order_count, self.max_orders)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, np.nansum(waits, axis=1, dtype=float) / counts, np.nan)
+
+    def wait_quantiles(self, quantiles: Sequence[float]) -> np.ndarray:
+        """Quantiles of total duration pooled over all stored orders of all replications"""
+        waits = self.column("total_duration")
+        return np.quantile(waits[~np.isnan(waits)], quantiles)
@@ -0,0 +1,207 @@
+"""
+Online statistics for bounded-memory simulation monitoring. Each estimator updates in O(1) per observation and
+keeps a fixed amount of state no matter how many orders are simulated, so DataMonitor can drop per-order records.
+"""
+
+import bisect
+import math
+from typing import Optional, Sequence
+
+import numpy as np
+
+
+class RunningStats:
+    """Count, mean, variance (Welford's algorithm), min and max of a stream of values"""
+
+    __slots__ = ("count", "mean", "_m2", "min", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __repr__(self):
+        return f"RunningStats(count={self.count}, mean={self.mean:.2f}, stdev={self.stdev:.2f})"
+
+    def add(self, value: float):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        """
+        Combine with statistics of another stream (Chan et al. parallel update), e.g. from another replication
+        Args:
+            other: RunningStats to merge in
+
+        Returns: self, updated in place
+        """
+        if other.count == 0:
+            return self
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self._m2 += other._m2 + delta**2 * self.count * other.count / count
+        self.mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Sample variance"""
+        return self._m2 / (self.count - 1) if self.count > 1 else math.nan
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+
+class P2Quantile:
+    """
+    Streaming quantile estimate using the P-squared algorithm (Jain & Chlamtac, 1985). Tracks five markers whose
+    heights are adjusted with piecewise-parabolic interpolation, so state is constant regardless of stream length.
+    """
+
+    __slots__ = ("p", "count", "_heights", "_positions", "_desired", "_increments")
+
+    def __init__(self, p: float):
+        if not 0 < p < 1:
+            raise ValueError(f"ERROR: Quantile must be in (0, 1), got {p}")
+        self.p = p
+        self.count = 0
+        self._heights: list[float] = []
+        self._positions = [0, 1, 2, 3, 4]
+        self._desired = [0.0, 2 * p, 4 * p, 2 + 2 * p, 4.0]
+        self._increments = [0.0, p / 2, p, (1 + p) / 2, 1.0]
+
+    def __repr__(self):
+        return f"P2Quantile(p={self.p}, value={self.value:.2f})"
+
+    def add(self, value: float):
+        self.count += 1
+        q = self._heights
+
+        # Collect the first five observations exactly
+        if self.count <= 5:
+            bisect.insort(q, value)
+            return
+
+        # Find cell containing the new observation, extending the extremes if needed
+        if value < q[0]:
+            q[0] = value
+            k = 0
+        elif value >= q[4]:
+            q[4] = value
+            k = 3
+        else:
+            k = bisect.bisect_right(q, value, 1, 4) - 1
+
+        n = self._positions
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self._desired
+        for i in range(5):
+            desired[i] += self._increments[i]
+
+        # Adjust the three middle markers if they drifted from their desired positions
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                step = 1 if d > 0 else -1
+                height = self._parabolic(i, step)
+                if not q[i - 1] < height < q[i + 1]:
+                    height = q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+                q[i] = height
+                n[i] += step
+
+    def _parabolic(self, i: int, step: int) -> float:
+        q, n = self._heights, self._positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    @property
+    def value(self) -> float:
+        """Current quantile estimate, exact while fewer than six values have been seen"""
+        if self.count == 0:
+            return math.nan
+        if self.count <= 5:
+            return float(np.quantile(self._heights, self.p))
+        return self._heights[2]
+
+
+class TimeHistogram:
+    """
+    Histograms of values bucketed by simulation time, e.g. wait time distribution per hour of operation.
+    Value bins are uniform with the last bin collecting overflow, so memory grows only with the simulated horizon
+    divided by the bucket width, never with the number of observations.
+    """
+
+    __slots__ = ("bucket_width", "bin_width", "num_bins", "_counts")
+
+    def __init__(self, bucket_width: float = 60.0, bin_width: float = 5.0, num_bins: int = 48):
+        self.bucket_width = bucket_width
+        self.bin_width = bin_width
+        self.num_bins = num_bins
+        self._counts: dict[int, list[int]] = {}
+
+    def add(self, time: float, value: float):
+        bucket = int(time // self.bucket_width)
+        counts = self._counts.get(bucket)
+        if counts is None:
+            counts = self._counts[bucket] = [0] * self.num_bins
+        counts[min(max(int(value // self.bin_width), 0), self.num_bins - 1)] += 1
+
+    @property
+    def bin_edges(self) -> np.ndarray:
+        """Left edges of value bins, the last bin is open-ended"""
+        return np.arange(self.num_bins) * self.bin_width
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Export histograms
+
+        Returns: Start time of each bucket, and 2D array of counts with one row per bucket
+        """
+        buckets = sorted(self._counts)
+        counts = np.array([self._counts[b] for b in buckets], dtype=np.int64).reshape(len(buckets), self.num_bins)
+        return np.array(buckets, dtype=float) * self.bucket_width, counts
+
+
+class StageStatistics:
+    """All streaming estimators for one stage of order processing"""
+
+    def __init__(self, quantiles: Sequence[float] = (0.5, 0.9, 0.95), histogram: Optional[TimeHistogram] = None):
+        self.stats = RunningStats()
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+        self.histogram = histogram if histogram is not None else TimeHistogram()
+
+    def __repr__(self):
+        quantiles = ", ".join(f"p{round(p * 100)}={q.value:.1f}" for p, q in self.quantiles.items())
+        return f"StageStatistics({self.stats!r}, {quantiles})"
+
+    def add(self, time: float, value: Optional[float]):
+        """
+        Record an observation
+        Args:
+            time: Simulation time of observation, used for the time buckets
+            value: Observed duration, ignored if None
+        """
+        if value is None:
+            return
+        self.stats.add(value)
+        for estimator in self.quantiles.values():
+            estimator.add(value)
+        self.histogram.add(time, value)
+
+    def quantile(self, p: float) -> float:
+        return self.quantiles[p].value
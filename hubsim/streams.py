@@ -0,0 +1,93 @@
+"""
+Random number streams for simulations. Each HubEnvironment owns a RandomStreams object so replications never share
+global RNG state, and each source of randomness draws from its own named substream so changing how often one process
+draws does not shift the numbers seen by another (common random numbers across configurations).
+"""
+
+import random
+import zlib
+from typing import Optional
+
+import numpy as np
+
+# Named substreams used by hub processes
+ORDERS = "orders"
+PICK_PACK = "pick_pack"
+FLIGHT = "flight"
+PREP_DRONE = "prep_drone"
+CHARGING = "charging"
+DISCHARGING = "discharging"
+BATTERY_INIT = "battery_init"
+DEMAND = "demand"  # Order locations in a hub network
+
+
+def substream(site: Optional[str], name: str) -> str:
+    """
+    Name of a substream owned by one hub when several hubs share an environment
+    Args:
+        site: Name of hub, None for a single hub (plain stream names, so single hub runs are unchanged)
+        name: Name of substream, e.g. streams.FLIGHT
+
+    Returns: Substream name, e.g. "hub-3/flight"
+    """
+    return f"{site}/{name}" if site else name
+
+
+class RandomStreams:
+    """Seeded collection of independent random.Random and numpy generators, created on first use and keyed by name"""
+
+    def __init__(self, seed: Optional[int] = None):
+        # Draw a seed from OS entropy when not given, but keep it so the run can be reproduced
+        self.seed: int = seed if seed is not None else random.SystemRandom().randrange(2**63)
+        self._streams: dict[str, random.Random] = {}
+        self._generators: dict[str, np.random.Generator] = {}
+        self.epoch = 0  # Incremented by reseed(), so holders of pre-drawn numbers know to discard them
+
+    def __repr__(self):
+        return f"RandomStreams(seed={self.seed}, streams={sorted(self._streams.keys() | self._generators.keys())})"
+
+    def stream(self, name: str) -> random.Random:
+        """
+        Get the generator for a named substream
+        Args:
+            name: Name of substream, e.g. streams.FLIGHT
+
+        Returns: random.Random seeded deterministically from the base seed and the stream name
+        """
+        if name not in self._streams:
+            # String seeds are hashed with sha512 by random.Random, so this is stable across interpreters
+            self._streams[name] = random.Random(f"{self.seed}:{name}")
+        return self._streams[name]
+
+    def __getitem__(self, name: str) -> random.Random:
+        return self.stream(name)
+
+    def reseed(self, seed: int):
+        """
+        Restart every substream from a new base seed, e.g. for independent branches from a checkpoint. Generators
+        handed out before are left untouched, get them again by name
+        Args:
+            seed: New base seed
+        """
+        self.seed = seed
+        self._streams.clear()
+        self._generators.clear()
+        self.epoch += 1
+
+    def state(self) -> dict[str, object]:
+        """Current state of every substream created so far, by name (numpy bit generator state or random.Random state)"""
+        states: dict[str, object] = {name: stream.getstate() for name, stream in self._streams.items()}
+        states.update({name: generator.bit_generator.state for name, generator in self._generators.items()})
+        return states
+
+    def generator(self, name: str) -> np.random.Generator:
+        """
+        Get the numpy generator for a named substream, used for drawing samples in blocks
+        Args:
+            name: Name of substream, e.g. streams.FLIGHT
+
+        Returns: numpy Generator seeded deterministically from the base seed and the stream name
+        """
+        if name not in self._generators:
+            self._generators[name] = np.random.default_rng([self.seed, zlib.crc32(name.encode())])
+        return self._generators[name]
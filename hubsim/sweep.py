@@ -0,0 +1,176 @@
+"""
+Parameter sweeps over Config resources. Fans the Cartesian product of parameter ranges (times replications) across
+worker processes, streams results back per point as they finish, and stops replicating points that are clearly
+dominated by a cheaper configuration.
+"""
+
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Iterator, Optional
+
+import numpy as np
+
+from hubsim.config import Config
+from hubsim.replications import (
+    ReplicationResult,
+    ReplicationSummary,
+    run_replication,
+    submit,
+    summarize,
+)
+
+RESOURCE_FIELDS = ("NUM_PILOTS", "NUM_DELIVERY_SPECIALISTS", "NUM_DRONES", "NUM_BATTERIES", "NUM_CHARGERS")
+
+
+def resource_cost(config: Config, costs: Optional[dict[str, float]] = None) -> float:
+    """
+    Cost of the resources in a configuration
+    Args:
+        config: Hub configuration
+        costs: Cost per unit of each resource field, 1.0 for fields not given
+
+    Returns: Weighted sum of resource counts
+    """
+    costs = costs or {}
+    return sum(costs.get(name, 1.0) * getattr(config, name) for name in RESOURCE_FIELDS)
+
+
+def grid(ranges: dict[str, Iterable[Any]]) -> list[dict[str, Any]]:
+    """
+    Cartesian product of parameter ranges
+    Args:
+        ranges: Config attribute names mapped to the values to try, e.g. {"NUM_PILOTS": range(1, 5)}
+
+    Returns: One dictionary of Config overrides per point
+    """
+    names = list(ranges)
+    return [dict(zip(names, values)) for values in itertools.product(*(list(ranges[n]) for n in names))]
+
+
+@dataclass
+class SweepPoint:
+    """Result of one sweep point. Pruned points stopped early because a cheaper point was clearly better"""
+
+    overrides: dict[str, Any]
+    cost: float
+    results: list[ReplicationResult] = field(default_factory=list)
+    pruned: bool = False
+
+    @property
+    def summary(self) -> ReplicationSummary:
+        return summarize(sorted(self.results, key=lambda r: r.seed))
+
+
+def dominated(costs: np.ndarray, lower: np.ndarray, upper: np.ndarray) -> np.ndarray:
+    """
+    Find points whose mean wait time is significantly worse than that of a point costing no more, i.e. some point with
+    cost <= ours has a confidence interval entirely below ours. O(n log n) via a running minimum over points sorted
+    by cost.
+    Args:
+        costs: Resource cost per point
+        lower: Lower confidence bound of mean wait time per point
+        upper: Upper confidence bound of mean wait time per point
+
+    Returns: Boolean mask of dominated points
+    """
+    order = np.argsort(costs, kind="stable")
+    best_upper = np.fmin.accumulate(upper[order])  # fmin ignores NaN (points without deliveries)
+    # Include all points with equal cost, not only those sorted before
+    last_with_cost = np.searchsorted(costs[order], costs, side="right") - 1
+    return best_upper[last_with_cost] < lower
+
+
+def comparable_groups(overrides: list[dict[str, Any]]) -> list[np.ndarray]:
+    """
+    Group sweep points that differ only in resource counts. Dominance is only meaningful within a group: a cheap point
+    under light demand says nothing about a costlier point under heavier demand
+    Args:
+        overrides: Config overrides per point
+
+    Returns: Indices of the points in each group
+    """
+    groups: dict[tuple, list[int]] = {}
+    for i, o in enumerate(overrides):
+        key = tuple((name, repr(value)) for name, value in o.items() if name not in RESOURCE_FIELDS)
+        groups.setdefault(key, []).append(i)
+    return [np.array(indices) for indices in groups.values()]
+
+
+def sweep(
+    base_config: Config,
+    ranges: dict[str, Iterable[Any]],
+    replications: int = 10,
+    until: float = 12 * 60,
+    seed: int = 0,
+    max_workers: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    prune: bool = True,
+    costs: Optional[dict[str, float]] = None,
+) -> Iterator[SweepPoint]:
+    """
+    Sweep over the Cartesian product of parameter ranges. Replications are run in rounds of batch_size per point,
+    all points use the same seeds (common random numbers) so comparisons between points are sharper. After each
+    round, points that are clearly dominated by a point with the same non-resource overrides are pruned and yielded
+    without further replications.
+
+    Args:
+        base_config: Configuration to apply overrides to
+        ranges: Config attribute names mapped to the values to try, e.g. resource counts or interval tuples
+        replications: Replications per point
+        until: Simulation horizon in minutes
+        seed: Base seed, replication i of every point uses seed + i
+        max_workers: Worker processes, defaults to the number of CPUs. Use 1 to run in-process
+        batch_size: Replications per point per round, defaults to a quarter of replications (at least 2)
+        prune: Stop replicating dominated points
+        costs: Cost per unit of each resource field, used for dominance
+
+    Returns: Iterator yielding each SweepPoint as soon as it is finished or pruned
+    """
+    batch_size = batch_size or max(2, replications // 4)
+    overrides = grid(ranges)
+    configs = [base_config.replace(**o) for o in overrides]
+    points = [SweepPoint(o, resource_cost(config, costs)) for o, config in zip(overrides, configs)]
+    groups = comparable_groups(overrides)
+    point_costs = np.array([p.cost for p in points])
+
+    pool = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 1 else None
+    try:
+        alive = list(range(len(points)))
+        done = 0
+        while alive:
+            # Run next round of replications for every point still in the sweep
+            n = min(batch_size, replications - done)
+            futures = {
+                submit(pool, run_replication, configs[i], seed + done + r, until): i for i in alive for r in range(n)
+            }
+            for future in as_completed(futures):
+                point = points[futures[future]]
+                point.results.append(future.result())
+                if len(point.results) == replications:
+                    yield point
+            done += n
+
+            alive = [i for i in alive if len(points[i].results) < replications]
+            if prune and alive and done >= 2:
+                summaries = [p.summary.wait_time for p in points]
+                lower = np.array([s.lower for s in summaries])
+                upper = np.array([s.upper for s in summaries])
+                mask = np.zeros(len(points), dtype=bool)
+                for group in groups:
+                    mask[group] = dominated(point_costs[group], lower[group], upper[group])
+                for i in alive:
+                    if mask[i]:
+                        points[i].pruned = True
+                        yield points[i]
+                alive = [i for i in alive if not mask[i]]
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    ranges = {"NUM_DELIVERY_SPECIALISTS": range(1, 5), "NUM_DRONES": range(1, 5)}
+    for result in sweep(Config(), ranges, replications=8):
+        status = "pruned" if result.pruned else "done"
+        print(f"{result.overrides} cost={result.cost:.0f} wait={result.summary.wait_time} ({status})")
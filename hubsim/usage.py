@@ -0,0 +1,111 @@
+"""
+Resource usage recording. HubResource and HubStore objects append their state (units busy, queue length, capacity)
+to compact arrays whenever a request or release changes it, and the recorded step functions are turned into
+time-weighted utilization and queue length series at any resolution afterwards.
+"""
+
+import math
+from array import array
+
+import numpy as np
+
+
+class UsageRecorder:
+    """Step-function record of a resource's busy units, queue length and capacity over simulation time"""
+
+    __slots__ = ("name", "_times", "_busy", "_queue", "_capacity")
+
+    def __init__(self, name: str):
+        self.name = name
+        self._times = array("d")
+        self._busy = array("l")
+        self._queue = array("l")
+        self._capacity = array("l")
+
+    def __repr__(self):
+        return f"UsageRecorder({self.name!r}, records={len(self._times)})"
+
+    def __len__(self) -> int:
+        return len(self._times)
+
+    def record(self, now: float, busy: int, queue: int, capacity: int):
+        """Record state at a point in time, a later state at the same time replaces the earlier one"""
+        times = self._times
+        if times and times[-1] == now:
+            self._busy[-1] = busy
+            self._queue[-1] = queue
+            self._capacity[-1] = capacity
+            return
+        times.append(now)
+        self._busy.append(busy)
+        self._queue.append(queue)
+        self._capacity.append(capacity)
+
+    def to_arrays(self) -> dict[str, np.ndarray]:
+        """Raw records: each state holds from its time until the next record"""
+        return {
+            "times": np.frombuffer(self._times, dtype=float),
+            "busy": np.frombuffer(self._busy, dtype=np.int_),
+            "queue": np.frombuffer(self._queue, dtype=np.int_),
+            "capacity": np.frombuffer(self._capacity, dtype=np.int_),
+        }
+
+    @classmethod
+    def from_arrays(cls, name: str, arrays: dict[str, np.ndarray]) -> "UsageRecorder":
+        """Rebuild recorder from to_arrays() output"""
+        recorder = cls(name)
+        recorder._times.extend(np.asarray(arrays["times"], dtype=float).tolist())
+        recorder._busy.extend(np.asarray(arrays["busy"]).tolist())
+        recorder._queue.extend(np.asarray(arrays["queue"]).tolist())
+        recorder._capacity.extend(np.asarray(arrays["capacity"]).tolist())
+        return recorder
+
+    def _binned_area(self, values: np.ndarray, until: float, resolution: float) -> tuple[np.ndarray, np.ndarray]:
+        """Integral of the step function over consecutive bins of width resolution covering [0, until]"""
+        times = np.frombuffer(self._times, dtype=float)
+        # Integer bin count, float arange can leave a zero-width last bin. The last bin may be partial
+        bins = max(1, math.ceil(until / resolution - 1e-9))
+        edges = np.minimum(np.arange(bins + 1) * resolution, until)
+        edges[-1] = until
+        if not len(times):
+            return edges[:-1], np.zeros(len(edges) - 1)
+
+        # Cumulative area at each record time, then interpolate to bin edges (constant value between records)
+        values = values.astype(float)
+        area = np.concatenate(([0.0], np.cumsum(values[:-1] * np.diff(times))))
+        k = np.searchsorted(times, edges, side="right") - 1
+        before_first = k < 0
+        k = np.maximum(k, 0)
+        at_edges = np.where(before_first, 0.0, area[k] + values[k] * (edges - times[k]))
+        return edges[:-1], np.diff(at_edges)
+
+    def utilization(self, until: float, resolution: float = 60.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Time-weighted utilization (busy units / capacity) per time bin
+        Args:
+            until: End of the series, usually the simulation horizon
+            resolution: Bin width in simulation minutes
+
+        Returns: Bin start times and utilization per bin
+        """
+        starts, busy = self._binned_area(np.frombuffer(self._busy, dtype=np.int_), until, resolution)
+        _, capacity = self._binned_area(np.frombuffer(self._capacity, dtype=np.int_), until, resolution)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return starts, np.where(capacity > 0, busy / capacity, 0.0)
+
+    def queue_length(self, until: float, resolution: float = 60.0) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Time-weighted mean queue length per time bin
+        Args:
+            until: End of the series, usually the simulation horizon
+            resolution: Bin width in simulation minutes
+
+        Returns: Bin start times and mean queue length per bin
+        """
+        starts, area = self._binned_area(np.frombuffer(self._queue, dtype=np.int_), until, resolution)
+        widths = np.diff(np.append(starts, until))
+        return starts, np.divide(area, widths, out=np.zeros_like(area), where=widths > 0)
+
+    def mean_utilization(self, until: float) -> float:
+        """Time-weighted utilization over the whole run"""
+        return float(self.utilization(until, resolution=until)[1][0]) if until > 0 else 0.0
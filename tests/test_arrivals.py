@@ -0,0 +1,37 @@
+import pytest
+
+from hubsim.arrivals import read_arrivals, read_routed_arrivals
+
+ORDERS = "created_at,hub\n2023-01-02T08:00:00,a\n2023-01-02T08:30:00,b\n2023-01-02T09:15:00,a\n"
+
+
+@pytest.fixture
+def orders(tmp_path):
+    path = tmp_path / "orders.csv"
+    path.write_text(ORDERS)
+    return path
+
+
+def test_orders_are_read_per_hub(orders):
+    assert list(read_arrivals(orders)) == [480.0, 510.0, 555.0]
+    assert list(read_arrivals(orders, hub_column="hub", hub="a")) == [480.0, 555.0]
+    assert list(read_routed_arrivals(orders)) == [(480.0, "a"), (510.0, "b"), (555.0, "a")]
+
+
+def test_bad_arguments_raise_before_iterating(orders):
+    with pytest.raises(ValueError, match="hub_column"):
+        read_arrivals(orders, hub="a")
+    with pytest.raises(ValueError, match="'site'"):
+        read_arrivals(orders, hub_column="site", hub="a")
+    with pytest.raises(ValueError, match="'hub_name'"):
+        read_routed_arrivals(orders, hub_column="hub_name")
+
+
+def test_parquet_header_is_checked(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = tmp_path / "orders.parquet"
+    pq.write_table(pa.table({"created_at": [1.0, 2.0], "hub": ["a", "b"]}), path)
+    assert list(read_arrivals(path, hub_column="hub", hub="b")) == [2.0]
+    with pytest.raises(ValueError, match="'site'"):
+        read_arrivals(path, hub_column="site", hub="a")
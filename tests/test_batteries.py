@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from hubsim.batteries import charge_soc, charge_time
+from hubsim.config import Config
+
+CONFIG = Config()
+
+
+@pytest.mark.parametrize("power", [CONFIG.CHARGER_POWER_W, CONFIG.CHARGER_POWER_W / 3])
+def test_charge_soc_inverts_charge_time(power):
+    soc = np.linspace(0.0, 0.9, 10)
+    time = charge_time(soc, CONFIG.DEPLOY_SOC, power, CONFIG)
+    assert charge_soc(soc, time, power, CONFIG) == pytest.approx(np.full(10, CONFIG.DEPLOY_SOC))
+
+
+def test_charge_time_inverts_charge_soc():
+    soc, time = 0.2, np.array([0.0, 5.0, 30.0, 120.0])
+    reached = charge_soc(soc, time, CONFIG.CHARGER_POWER_W, CONFIG)
+    assert np.all(np.diff(reached) > 0)
+    elapsed = [charge_time(soc, target, CONFIG.CHARGER_POWER_W, CONFIG) for target in reached]
+    assert elapsed == pytest.approx(time.tolist())
+
+
+def test_no_charging_needed_at_target():
+    assert charge_time(CONFIG.DEPLOY_SOC, CONFIG.DEPLOY_SOC, CONFIG.CHARGER_POWER_W, CONFIG) == 0.0
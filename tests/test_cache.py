@@ -0,0 +1,49 @@
+import numpy as np
+import pytest
+
+from hubsim.cache import ResultCache, config_hash
+from hubsim.config import ORDER_TIME_FIELDS, Config
+
+
+class Shifted:
+    def __init__(self, low: int):
+        self.low = low
+
+    def draw(self, generator: np.random.Generator, size: int) -> np.ndarray:
+        return generator.integers(self.low, self.low + 5, size=size, endpoint=True)
+
+
+def test_disk_round_trip_matches_fresh_run(tmp_path):
+    config = Config().replace(RECORD_UTILIZATION=True)
+    fresh = ResultCache(tmp_path).run(config, until=720)
+    cached = ResultCache(tmp_path)  # Empty memory tier, read from disk
+    loaded = cached.run(config, until=720)
+    assert cached.hits == 1 and loaded is not fresh
+
+    for name in ("orders_created", "orders_delivered", "batteries_charged", "batteries_discharged"):
+        assert getattr(loaded, name) == getattr(fresh, name)
+    for name in ORDER_TIME_FIELDS:
+        assert np.array_equal(loaded.orders.column(name), fresh.orders.column(name), equal_nan=True)
+    assert loaded.utilization.keys() == fresh.utilization.keys()
+    for name, recorder in fresh.utilization.items():
+        for key, values in recorder.to_arrays().items():
+            assert np.array_equal(loaded.utilization[name].to_arrays()[key], values)
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = ResultCache(directory=None, memory_items=2)
+    for seed in (1, 2, 3):
+        cache.run(Config(), until=60, seed=seed)
+    assert config_hash(Config(), 1, 60) not in cache
+    assert config_hash(Config(), 3, 60) in cache
+
+
+def test_hash_is_stable_for_custom_distributions():
+    assert config_hash(Config().replace(FLIGHT_INTERVAL=Shifted(3))) == config_hash(
+        Config().replace(FLIGHT_INTERVAL=Shifted(3))
+    )
+    assert config_hash(Config().replace(FLIGHT_INTERVAL=Shifted(3))) != config_hash(
+        Config().replace(FLIGHT_INTERVAL=Shifted(4))
+    )
+    with pytest.raises(TypeError):
+        config_hash(Config().replace(FLIGHT_INTERVAL=lambda: 5))
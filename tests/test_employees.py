@@ -0,0 +1,118 @@
+import pytest
+
+from hubsim.config import Config, DataMonitor
+from hubsim.employees import EmployeeStore, parse_roster, roster_staff
+from hubsim.hub import Hub, HubEnvironment
+
+# Standalone stores only serve the roles requested in the tests, not those of hub processes
+STANDALONE = Config().replace(PICK_PACK_ROLES=(), FLIGHT_ROLES=())
+
+
+def store(roster, config=None):
+    env = HubEnvironment(config or STANDALONE, DataMonitor(), seed=0)
+    return env, EmployeeStore(env, roster)
+
+
+def test_team_leaves_cross_trained_employee_for_scarce_role():
+    # Only "both" can observe, so the pilot role goes to "pilot" even though "both" is free too
+    env, employees = store([{"skills": ["rpic", "vo"], "name": "both"}, {"skills": ["rpic"], "name": "pilot"}])
+    request = employees.request(("rpic", "vo"))
+    env.run(until=1)
+    assert [e.name for e in request.value] == ["pilot", "both"]
+    assert employees.busy == 2
+    assert not employees.free["rpic"] and not employees.free["vo"]
+
+
+def test_waiting_requests_are_granted_oldest_first_on_release():
+    env, employees = store([{"skills": ["pick_pack", "rpic"]}])
+    granted = []
+
+    def task(name, roles, duration):
+        with employees.request(roles) as request:
+            yield request
+            granted.append((name, env.now))
+            yield env.timeout(duration)
+
+    env.process(task("first", ("pick_pack",), 5))
+    env.process(task("flight", ("rpic",), 3))
+    env.process(task("second", ("pick_pack",), 1))
+    env.run(until=20)
+    assert granted == [("first", 0), ("flight", 5), ("second", 8)]
+    assert employees.busy == 0 and employees._waiting_count == 0
+
+
+def test_withdrawn_request_leaves_queue():
+    env, employees = store([{"skills": ["pick_pack"]}])
+    holding = employees.request(("pick_pack",))
+    with employees.request(("pick_pack",)):
+        assert employees._waiting_count == 1
+    assert employees._waiting_count == 0
+    employees.release(holding.value)
+    assert employees.busy == 0 and len(employees.free["pick_pack"]) == 1
+
+
+def test_shift_changes_and_busy_employees_finish_their_task():
+    env, employees = store(
+        [
+            {"skills": ["pick_pack"], "shift": [0, 60], "name": "day"},
+            {"skills": ["pick_pack"], "shift": [60, 120], "name": "late"},
+        ]
+    )
+    assert employees.on_shift == 1
+    served = []
+
+    def task(duration):
+        with employees.request(("pick_pack",)) as request:
+            yield request
+            served.append((request.value[0].name, env.now))
+            yield env.timeout(duration)
+
+    env.process(task(90))  # Runs past the end of the day shift
+    env.run(until=61)
+    assert employees.on_shift == 1 and employees.busy == 1
+    env.process(task(10))
+    env.run(until=200)
+    assert served == [("day", 0), ("late", 61)]
+    assert employees.on_shift == 0 and not employees.free["pick_pack"]
+    env.run(until=24 * 60 + 1)  # Next day
+    assert employees.on_shift == 1 and [e.name for e in employees.free["pick_pack"]] == ["day"]
+
+
+def test_fractional_shift_changes_repeat_every_day():
+    env, employees = store([{"skills": ["pick_pack"], "shift": [480.1, 1000.3]}])
+    for day in range(3):
+        env.run(until=day * 24 * 60 + 480.2)
+        assert employees.on_shift == 1, day
+        env.run(until=day * 24 * 60 + 1000.4)
+        assert employees.on_shift == 0, day
+
+
+def test_whole_day_shift_is_always_on_shift():
+    roster = [{"skills": ["pick_pack", "rpic"], "count": 3, "shift": [0, 1440]}]
+    env, employees = store(roster)
+    assert employees.on_shift == 3
+    assert roster_staff(roster, ("rpic",)) == 3
+    with pytest.raises(ValueError):
+        parse_roster([{"skills": ["rpic"], "shift": [480, 480]}])
+
+
+def test_unknown_roles_are_rejected():
+    roster = ({"skills": ["pick_pack", "rpic"], "count": 2},)
+    env = HubEnvironment(Config().replace(EMPLOYEE_ROSTER=roster, FLIGHT_ROLES=("RPIC",)), DataMonitor(), seed=0)
+    with pytest.raises(ValueError):
+        Hub(env)
+    env, employees = store(roster)
+    with pytest.raises(ValueError):
+        employees.request(("vo",))
+    with pytest.raises(ValueError, match="FLIGHT_ROLES"):  # Checked without a hub too
+        store(roster, Config().replace(FLIGHT_ROLES=("RPIC",)))
+
+
+def test_hub_with_roster_delivers_orders():
+    roster = ({"skills": ["pick_pack"], "count": 2}, {"skills": ["rpic", "vo"], "count": 2}, {"skills": ["vo"]})
+    config = Config().replace(EMPLOYEE_ROSTER=roster, FLIGHT_ROLES=("rpic", "vo"))
+    env = HubEnvironment(config, DataMonitor(), seed=1)
+    hub = Hub(env)
+    env.run(until=720)
+    assert hub.pilot is None and hub.delivery_specialist is None
+    assert env.monitor.orders_delivered > 0.8 * env.monitor.orders_created
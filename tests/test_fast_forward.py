@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        Config(),
+        Config().replace(ORDER_CREATION_INTERVAL=(60, 240)),  # Idle stretches between orders
+        Config().replace(ORDER_ARRIVAL_RATES=[0.0] * 8 + [4.0] * 12 + [0.0] * 4),  # Idle nights to skip
+        Config().replace(BATTERY_MODEL="soc", HUB_POWER_CAP_W=1000.0),
+    ],
+)
+def test_fast_forward_matches_statistically(config):
+    # Events at the same time may be processed in a different order, so compare summaries rather than orders
+    monitors = []
+    for fast_forward in (False, True):
+        env = HubEnvironment(config, DataMonitor(), seed=9, fast_forward=fast_forward)
+        Hub(env)
+        env.run(until=3 * 24 * 60)
+        monitors.append(env.monitor)
+    normal, fast = monitors
+    assert fast.orders_created == normal.orders_created
+    assert fast.orders_delivered == pytest.approx(normal.orders_delivered, rel=0.02)
+    assert fast.wait_times.mean() == pytest.approx(normal.wait_times.mean(), rel=0.05)
+    for q in (0.5, 0.9):
+        assert np.quantile(fast.wait_times, q) == pytest.approx(np.quantile(normal.wait_times, q), rel=0.05, abs=1.0)
@@ -0,0 +1,10 @@
+import pytest
+
+from hubsim.benchmark import IMPORT_BUDGETS, import_time
+
+
+@pytest.mark.parametrize("module", IMPORT_BUDGETS)
+def test_imports_pull_in_no_heavy_dependencies(module):
+    # Fresh interpreter, so modules imported by other tests do not count. Timing is left to benchmark --imports.
+    _, heavy = import_time(module, repeat=1)
+    assert not heavy, f"{module} imports {', '.join(heavy)}"
@@ -0,0 +1,54 @@
+import numpy as np
+
+from hubsim.config import ORDER_TIME_FIELDS, Config, DataMonitor
+from hubsim.hub import HubEnvironment
+from hubsim.incremental import (
+    IncrementalSimulator,
+    RecordingHub,
+    UpstreamRecord,
+    invalidates_upstream,
+    replay,
+)
+
+BASE = Config().replace(ORDER_CREATION_INTERVAL=(4, 8), NUM_DELIVERY_SPECIALISTS=3, NUM_PILOTS=4, NUM_DRONES=5)
+
+
+def full_run(config: Config, until: float, seed: int) -> tuple[DataMonitor, RecordingHub]:
+    env = HubEnvironment(config, DataMonitor(), seed=seed)
+    hub = RecordingHub(env)
+    env.run(until=until)
+    return env.monitor, hub
+
+
+def assert_same_orders(left: DataMonitor, right: DataMonitor):
+    assert left.orders_created == right.orders_created
+    assert left.orders_delivered == right.orders_delivered
+    for name in ORDER_TIME_FIELDS:
+        assert np.array_equal(left.orders.column(name), right.orders.column(name), equal_nan=True), name
+
+
+def test_replay_matches_full_run_of_downstream_change():
+    until, seed = 3 * 24 * 60, 4
+    monitor, hub = full_run(BASE, until, seed)
+    record = UpstreamRecord.from_monitor(monitor, hub.ready_times)
+
+    changed = BASE.replace(NUM_PILOTS=2, FLIGHT_INTERVAL=(6, 12))
+    assert not invalidates_upstream(BASE, changed)
+    assert_same_orders(replay(record, changed, until, seed), full_run(changed, until, seed)[0])
+
+
+def test_simulator_replays_downstream_changes_only():
+    simulator = IncrementalSimulator()
+    simulator.run(BASE, until=720)
+    simulator.run(BASE.replace(NUM_DRONES=3), until=720)
+    simulator.run(BASE.replace(PICK_PACK_INTERVAL=(5, 10)), until=720)
+    simulator.run(BASE.replace(NUM_DRONES=3), until=720)  # Cached
+    assert (simulator.full_runs, simulator.replays) == (2, 1)
+
+
+def test_rosters_are_never_replayed():
+    simulator = IncrementalSimulator()
+    roster = ({"skills": ["pick_pack", "rpic"], "count": 3},)
+    simulator.run(BASE.replace(EMPLOYEE_ROSTER=roster), until=720)
+    simulator.run(BASE.replace(EMPLOYEE_ROSTER=roster, NUM_DRONES=3), until=720)
+    assert (simulator.full_runs, simulator.replays) == (2, 0)
@@ -0,0 +1,25 @@
+import pytest
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub_resources import HubEnvironment
+from hubsim.network import HubNetwork, HubSite, Region
+
+
+@pytest.mark.parametrize("model", ["binary", "soc"])
+def test_batteries_move_to_hub_waiting_for_them(model):
+    # Busy hub with two batteries next to a hub without orders and plenty of them
+    busy = Config().replace(
+        BATTERY_MODEL=model, NUM_BATTERIES=2, NUM_DRONES=4, NUM_PILOTS=4, NUM_DELIVERY_SPECIALISTS=4
+    )
+    quiet = Config().replace(BATTERY_MODEL=model, NUM_BATTERIES=12)
+    sites = [HubSite("busy", 0.0, 0.0, busy), HubSite("quiet", 5.0, 0.0, quiet, demand=0.0)]
+    env = HubEnvironment(Config(), DataMonitor(), seed=1)
+    network = HubNetwork(env, [Region("region", sites, orders_per_hour=20, demand_spread=0.5)])
+    env.run(until=600)
+
+    moved = sum(t.units for t in network.transfers if t.resource == "battery" and t.destination == "busy")
+    assert moved > 0
+    stores = {name: hub.battery_store for name, hub in network.hubs.items()}
+    assert len(stores["busy"].batteries) == 2 + moved
+    assert len(stores["busy"].batteries) + len(stores["quiet"].batteries) == 14
+    assert all(battery.store is stores["busy"] for battery in stores["busy"].batteries)
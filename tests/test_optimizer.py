@@ -0,0 +1,25 @@
+import math
+
+from hubsim.config import Config
+from hubsim.optimizer import ServiceLevel, StaffingOptimizer, optimize_staffing
+from hubsim.replications import ReplicationResult
+
+
+def test_profiles_without_deliveries_fail_target():
+    # 15 minutes is too short to deliver any order, every replication's quantile is inf
+    result = optimize_staffing(
+        Config(), ServiceLevel(0.95, 45), bounds={"NUM_PILOTS": (1, 2)}, until=15, replications=4, max_workers=1
+    )
+    assert not result.meets_target
+    assert math.isinf(result.metric.mean)
+    assert result.resources == {"NUM_PILOTS": 2}
+
+
+def test_target_is_met_by_upper_confidence_bound():
+    optimizer = StaffingOptimizer(Config(), ServiceLevel(0.95, 45), bounds={"NUM_PILOTS": (1, 2)})
+    resources = {"NUM_PILOTS": 1}
+    optimizer._results[optimizer._key(resources)] = [
+        ReplicationResult(seed, 720, wait_quantiles={0.95: value}) for seed, value in enumerate((30.0, 50.0, 40.0))
+    ]
+    assert optimizer.metric(resources).mean < 45 < optimizer.metric(resources).upper
+    assert not optimizer._meets(resources)
@@ -0,0 +1,61 @@
+import math
+
+import numpy as np
+import pytest
+
+from hubsim.config import OrderLog, StatusCode
+
+
+def test_new_orders_get_consecutive_rows_with_unset_fields():
+    log = OrderLog(capacity=2)
+    orders = [log.new() for _ in range(5)]  # Grows past the initial capacity
+    assert [order._id for order in orders] == list(range(5))
+    assert len(log) == 5 and log.capacity >= 5
+    assert orders[3].creation_time is None
+    assert orders[3].status == StatusCode.CREATED
+
+
+def test_fields_are_stored_in_columns():
+    log = OrderLog()
+    order = log.new()
+    order.creation_time = 12.0
+    order.status = StatusCode.PREP
+    assert log.column("creation_time")[0] == 12.0
+    assert log.column("status")[0] == StatusCode.PREP
+    assert log[0].creation_time == 12.0
+
+
+def test_released_rows_and_views_are_recycled():
+    log = OrderLog()
+    first, second = log.new(), log.new()
+    first.creation_time = 3.0
+    first.status = StatusCode.COMPLETED
+    log.release(first)
+    assert len(log) == 1
+    assert math.isnan(log.column("creation_time")[0])
+
+    recycled = log.new()
+    assert recycled is first and recycled._id == 0
+    assert recycled.creation_time is None
+    assert recycled.status == StatusCode.CREATED
+    assert len(log) == 2 and log.capacity >= 2
+    assert second._id == 1
+
+
+def test_released_view_status_raises_until_reused():
+    log = OrderLog()
+    order = log.new()
+    log.release(order)
+    with pytest.raises(ValueError, match="released"):
+        order.status
+    assert "RELEASED" in repr(order)
+    log.new()
+    assert order.status == StatusCode.CREATED
+
+
+def test_round_trip_through_arrays():
+    log = OrderLog()
+    for time in (1.0, 2.0, 3.0):
+        log.new().creation_time = time
+    copy = OrderLog.from_arrays(log._times[: len(log)], log._status[: len(log)])
+    assert np.array_equal(copy.column("creation_time"), log.column("creation_time"))
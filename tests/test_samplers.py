@@ -0,0 +1,49 @@
+import numpy as np
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+from hubsim.samplers import BufferedSampler, Empirical, UniformInterval
+from hubsim.streams import FLIGHT, PICK_PACK, RandomStreams
+
+
+def test_generators_are_deterministic_per_seed_and_stream():
+    first, second = RandomStreams(seed=7), RandomStreams(seed=7)
+    assert (first.generator(FLIGHT).random(8) == second.generator(FLIGHT).random(8)).all()
+    assert first.stream(PICK_PACK).random() == second.stream(PICK_PACK).random()
+    assert not (
+        RandomStreams(seed=8).generator(FLIGHT).random(8) == RandomStreams(seed=7).generator(FLIGHT).random(8)
+    ).all()
+
+
+def test_buffered_sampler_matches_bulk_draws():
+    distribution = UniformInterval(5, 10)
+    sampler = BufferedSampler(distribution, RandomStreams(seed=3).generator(FLIGHT), block_size=16)
+    samples = [sampler() for _ in range(40)]  # Spans several refills
+    generator = RandomStreams(seed=3).generator(FLIGHT)
+    expected = np.concatenate([distribution.draw(generator, 16) for _ in range(3)])[:40]
+    assert samples == expected.tolist()
+    assert all(5 <= s <= 10 for s in samples)
+
+
+def test_substreams_are_independent():
+    # Drawing more from one substream does not shift another (common random numbers)
+    streams = RandomStreams(seed=11)
+    streams.generator(FLIGHT).random(1000)
+    assert (streams.generator(PICK_PACK).random(4) == RandomStreams(seed=11).generator(PICK_PACK).random(4)).all()
+
+
+def test_empirical_draws_only_observed_values():
+    distribution = Empirical((1.0, 2.0, 3.0), weights=(0.0, 1.0, 1.0))
+    values = distribution.draw(np.random.default_rng(0), 500)
+    assert set(values.tolist()) == {2.0, 3.0}
+
+
+def test_hub_runs_are_reproducible_per_seed():
+    def run(seed: int) -> np.ndarray:
+        env = HubEnvironment(Config(), DataMonitor(), seed=seed)
+        Hub(env)
+        env.run(until=720)
+        return env.monitor.wait_times
+
+    assert (run(5) == run(5)).all()
+    assert len(run(5)) != len(run(6)) or (run(5) != run(6)).any()
@@ -0,0 +1,40 @@
+import pickle
+
+import numpy as np
+
+from hubsim.config import Config, DataMonitor
+from hubsim.hub import Hub, HubEnvironment
+from hubsim.replications import run_replications
+from hubsim.shared import ResultChannel
+
+
+def test_replications_write_their_slots():
+    config = Config().replace(RECORD_UTILIZATION=True)
+    with ResultChannel(config, replications=3, until=720) as channel:
+        summary = run_replications(config, replications=3, until=720, max_workers=1, channel=channel)
+        assert channel.written.all()
+        assert channel.order_count.tolist() == [r.orders_delivered for r in summary.results]
+        assert np.allclose(channel.mean_wait(), [r.mean_wait for r in summary.results])
+        assert channel.utilization.shape == (3, len(channel.resources), 12)
+        assert not channel.truncated.any()
+
+
+def test_worker_copy_attaches_by_name():
+    config = Config()
+    env = HubEnvironment(config, DataMonitor(), seed=2)
+    Hub(env)
+    env.run(until=720)
+    with ResultChannel(config, replications=2, until=720) as channel:
+        pickle.loads(pickle.dumps(channel)).write(1, env.monitor)
+        assert channel.written.tolist() == [False, True]
+        delivered = channel.column("total_duration")[1, : channel.order_count[1]]
+        assert np.allclose(np.sort(delivered), np.sort(env.monitor.wait_times))
+        assert np.isnan(channel.column("total_duration")[0]).all()
+
+
+def test_orders_beyond_capacity_are_counted_not_stored():
+    config = Config()
+    with ResultChannel(config, replications=1, until=720, max_orders=4) as channel:
+        run_replications(config, replications=1, until=720, max_workers=1, channel=channel)
+        assert channel.truncated.all()
+        assert not np.isnan(channel.column("total_duration")).any()
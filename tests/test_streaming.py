@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from hubsim.streaming import P2Quantile, RunningStats
+
+
+@pytest.mark.parametrize("p", [0.5, 0.9, 0.95])
+def test_p2_quantile_tracks_exact_quantile(p):
+    values = np.random.default_rng(1).exponential(20.0, 20000)
+    estimate = P2Quantile(p)
+    for value in values.tolist():
+        estimate.add(value)
+    exact = np.quantile(values, p)
+    assert estimate.value == pytest.approx(exact, rel=0.02)
+
+
+def test_p2_quantile_is_exact_for_few_values():
+    estimate = P2Quantile(0.5)
+    for value in (5.0, 1.0, 3.0):
+        estimate.add(value)
+    assert estimate.value == 3.0
+
+
+def test_running_stats_merge_matches_single_pass():
+    values = np.random.default_rng(2).normal(10.0, 3.0, 1000)
+    left, right, both = RunningStats(), RunningStats(), RunningStats()
+    for value in values[:400].tolist():
+        left.add(value)
+    for value in values[400:].tolist():
+        right.add(value)
+    for value in values.tolist():
+        both.add(value)
+    merged = left.merge(right)
+    assert merged.count == both.count
+    assert merged.mean == pytest.approx(both.mean)
+    assert merged.variance == pytest.approx(both.variance)
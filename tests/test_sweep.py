@@ -0,0 +1,18 @@
+from hubsim.config import Config
+from hubsim.sweep import comparable_groups, grid, sweep
+
+# Heavy and light demand, the light points are cheap and fast but not comparable with the heavy ones
+RANGES = {"ORDER_CREATION_INTERVAL": [(1, 3), (120, 240)], "NUM_DELIVERY_SPECIALISTS": [1, 3]}
+
+
+def test_groups_differ_only_in_resources():
+    groups = comparable_groups(grid(RANGES))
+    assert [group.tolist() for group in groups] == [[0, 1], [2, 3]]
+
+
+def test_points_are_only_pruned_within_their_group():
+    points = list(sweep(Config(), RANGES, replications=4, batch_size=2, max_workers=1))
+    heavy = [p for p in points if p.overrides["ORDER_CREATION_INTERVAL"] == (1, 3)]
+    # The cheap light demand point has a far lower wait than any heavy demand point, but only compares with its group
+    assert len(points) == 4 and not any(p.pruned for p in heavy)
+    assert all(len(p.results) == 4 for p in heavy)
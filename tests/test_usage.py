@@ -0,0 +1,30 @@
+import numpy as np
+
+from hubsim.usage import UsageRecorder
+
+
+def recorder() -> UsageRecorder:
+    usage = UsageRecorder("drones")
+    usage.record(0.0, busy=1, queue=2, capacity=2)
+    usage.record(0.5, busy=2, queue=0, capacity=2)
+    return usage
+
+
+def test_series_are_time_weighted_per_bin():
+    starts, utilization = recorder().utilization(until=1.0, resolution=0.5)
+    assert starts.tolist() == [0.0, 0.5]
+    assert utilization.tolist() == [0.5, 1.0]
+    assert recorder().mean_utilization(until=1.0) == 0.75
+
+
+def test_float_resolution_leaves_no_empty_last_bin():
+    # np.arange(0, 0.2 + 0.1, 0.1) has 4 edges, the last two both at 0.2 once clamped to until
+    starts, queue = recorder().queue_length(until=0.2, resolution=0.1)
+    assert len(starts) == 2 and np.isfinite(queue).all()
+    assert queue.tolist() == [2.0, 2.0]
+
+
+def test_last_bin_may_be_partial():
+    starts, queue = recorder().queue_length(until=0.75, resolution=0.5)
+    assert starts.tolist() == [0.0, 0.5]
+    assert queue.tolist() == [2.0, 0.0]